@@ -0,0 +1,94 @@
+from dataclasses import dataclass
+import json
+import os
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import numpy as np
+import config as cfg
+
+# Define the structure of each aisle info entry
+@dataclass
+class AisleInfo():
+    impulse_index: float
+    name: str
+    product_count: int
+    cells: List[Tuple[int, int]]
+
+
+class AisleRegistry:
+    """
+    Información inmutable de los pasillos en columnas indexadas por id de pasillo.
+    Se carga una sola vez por proceso y todos los grids la comparten por referencia.
+
+    Attributes:
+        ids: Ids de pasillo presentes en el archivo, ordenados.
+        present: Máscara por id indicando si el pasillo existe.
+        impulse_index: Índice de impulsividad por id (0 si no existe).
+        product_count: Cantidad de productos por id (0 si no existe).
+        names: Nombre por id ("" si no existe).
+    """
+
+    def __init__(self, aisle_info_raw: Dict[str, Dict[str, Any]], source: str = "") -> None:
+        ids = sorted(int(aisle_id) for aisle_id in aisle_info_raw.keys())
+        size = (ids[-1] if ids else 0) + 1
+
+        self.source: str = source
+        self.ids: np.ndarray = np.array(ids, dtype=np.int32)
+        self.present: np.ndarray = np.zeros(size, dtype=bool)
+        self.impulse_index: np.ndarray = np.zeros(size, dtype=np.float64)
+        self.product_count: np.ndarray = np.zeros(size, dtype=np.int32)
+        names: List[str] = [""] * size
+
+        for aisle_id_str, info in aisle_info_raw.items():
+            aisle_id = int(aisle_id_str)
+            self.present[aisle_id] = True
+            self.impulse_index[aisle_id] = info['impulse_index']
+            self.product_count[aisle_id] = info['product_count']
+            names[aisle_id] = info['aisle_name']
+        self.names: Tuple[str, ...] = tuple(names)
+
+        for column in (self.ids, self.present, self.impulse_index, self.product_count):
+            column.flags.writeable = False
+
+    @classmethod
+    def from_file(cls, aisle_info_filename: str) -> 'AisleRegistry':
+        with open(aisle_info_filename, 'r') as f:
+            return cls(json.load(f), source=aisle_info_filename)
+
+    @property
+    def max_id(self) -> int:
+        return len(self.present) - 1
+
+    def __contains__(self, aisle_id: object) -> bool:
+        return isinstance(aisle_id, (int, np.integer)) and 0 <= aisle_id < len(self.present) and bool(self.present[aisle_id])
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.ids.tolist())
+
+    def info(self, aisle_id: int, cells: Optional[List[Tuple[int, int]]] = None) -> AisleInfo:
+        """Entrada de un pasillo en el formato AisleInfo"""
+        return AisleInfo(
+            impulse_index=float(self.impulse_index[aisle_id]),
+            name=self.names[aisle_id],
+            product_count=int(self.product_count[aisle_id]),
+            cells=cells if cells is not None else []
+        )
+
+    def to_dict(self) -> Dict[int, AisleInfo]:
+        """Diccionario id -> AisleInfo, sin celdas"""
+        return {aisle_id: self.info(aisle_id) for aisle_id in self}
+
+
+_registries: Dict[str, AisleRegistry] = {}
+
+def load_aisle_registry(aisle_info_filename: str = cfg.AISLE_INFO_FILE) -> AisleRegistry:
+    """
+    Devuelve el registro de pasillos del archivo indicado, leyéndolo solo la
+    primera vez que se pide en el proceso.
+    """
+    key = os.path.abspath(aisle_info_filename)
+    if key not in _registries:
+        _registries[key] = AisleRegistry.from_file(aisle_info_filename)
+    return _registries[key]
@@ -0,0 +1,397 @@
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+from core.customer import CustomerSimulator
+from core.grid import SupermarketGrid
+from core.pathfinding import DistanceTable, neighbor_slots
+from core.shelf_adjacency import ShelfAdjacency
+from core.random_streams import CustomerStreams
+from core.shopping_lists import ShoppingListStore
+
+BATCH_MODES = ("search", "direct")
+
+
+@dataclass
+class BatchSimulationResult:
+    """
+    Resultado de simular un grupo de clientes sobre un layout.
+
+    Attributes:
+        impulsive_purchases: Compras por impulso de cada cliente (su valor esperado si se simuló con expected_impulse).
+        steps: Pasos de la ruta completa de cada cliente.
+        num_products: Largo de la lista de compras de cada cliente.
+        walk_counts: Veces que se pisó cada celda (rows, cols), sumando todos los clientes.
+        impulse_counts: Clientes que compraron por impulso en cada estantería (rows, cols), o su valor esperado.
+    """
+    impulsive_purchases: np.ndarray
+    steps: np.ndarray
+    num_products: np.ndarray
+    walk_counts: np.ndarray
+    impulse_counts: np.ndarray
+
+    @property
+    def adjusted_purchases(self) -> np.ndarray:
+        return self.impulsive_purchases / self.num_products
+
+    @property
+    def adjusted_steps(self) -> np.ndarray:
+        return self.steps / self.num_products
+
+
+class BatchSimulator:
+    """
+    Simula a todos los clientes a la vez con el mismo modelo que
+    CustomerSimulator.simulate: en cada ronda cada cliente activo avanza un
+    tramo hasta la celda más cercana (en orden de BFS entre empates) junto a
+    una estantería que le interesa y, al llegar, compra el producto o marca la
+    estantería como visitada.
+
+    Los destinos de todos los clientes de una ronda salen de una sola consulta
+    a la tabla de distancias del layout. Como las compras por impulso no
+    cambian el recorrido, los tramos se recorren todos juntos al final, paso a
+    paso sobre next_hop, y las compras por impulso se sortean de una vez: una
+    estantería tocada k veces por un cliente se compra con probabilidad
+    1 - (1 - p)^k, igual que con k sorteos independientes que se detienen en
+    la primera compra.
+    """
+
+    def __init__(self, store: ShoppingListStore, customers: Optional[Sequence[int]] = None) -> None:
+        """
+        Args:
+            store: Listas de compras.
+            customers: Índices en store de los clientes a simular; por defecto, todos.
+        """
+        self.store: ShoppingListStore = store
+        self.customers: np.ndarray = np.arange(len(store)) if customers is None else np.asarray(customers, dtype=np.int64)
+        self.num_customers: int = len(self.customers)
+        self.num_products: np.ndarray = store.lengths[self.customers].astype(np.float64)
+        # Pares (cliente, pasillo) de todas las listas, agrupados por pasillo, para sortear los productos de una vez
+        self._list_owners, self._list_aisles = store.select(self.customers)
+
+    @classmethod
+    def for_customers(cls, customers: Sequence[CustomerSimulator]) -> 'BatchSimulator':
+        """Simulador para los clientes indicados; usa su almacén de listas si todos comparten el mismo"""
+        stores = {id(customer.store) for customer in customers}
+        if len(stores) == 1:
+            return cls(customers[0].store, [customer.index for customer in customers])
+        return cls(ShoppingListStore.from_lists([list(customer.shopping_list) for customer in customers]))
+
+    def draw_products(self,
+                      grid: SupermarketGrid,
+                      rng: Optional[np.random.Generator],
+                      generators: Optional[Sequence[np.random.Generator]] = None
+                      ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Sortea un id de producto por cada pasillo de cada lista que exista en el
+        registro, como CustomerSimulator.get_product_ids_by_aisle.
+
+        Args:
+            grid: Layout, para el registro de pasillos.
+            rng: Generador para todos los sorteos.
+            generators: Un generador por cliente; si se indica, cada cliente sortea con el suyo en vez de con rng.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray]: Cliente, pasillo e id de producto de cada sorteo.
+        """
+        aisles = grid.aisles
+        known = (self._list_aisles >= 0) & (self._list_aisles < len(aisles.present))
+        known[known] = aisles.present[self._list_aisles[known]]
+        owners, aisle_ids = self._list_owners[known], self._list_aisles[known]
+        product_counts = aisles.product_count[aisle_ids].astype(np.int64)
+        if generators is None:
+            return owners, aisle_ids, rng.integers(1, product_counts, endpoint=True)
+
+        # owners está ordenado: los sorteos de cada cliente son un tramo contiguo
+        bounds = np.searchsorted(owners, np.arange(self.num_customers + 1)).tolist()
+        product_ids = np.empty(len(owners), dtype=np.int64)
+        for customer, generator in enumerate(generators):
+            start, end = bounds[customer], bounds[customer + 1]
+            product_ids[start:end] = generator.integers(1, product_counts[start:end], endpoint=True)
+        return owners, aisle_ids, product_ids
+
+    def simulate(self,
+                 grid: SupermarketGrid,
+                 rng: Optional[np.random.Generator],
+                 mode: str = "search",
+                 products: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None,
+                 streams: Optional[CustomerStreams] = None,
+                 expected_impulse: bool = False
+                 ) -> BatchSimulationResult:
+        """
+        Simula a todos los clientes sobre el layout.
+
+        Args:
+            grid: Layout a recorrer; necesita su tabla de distancias con bfs_order (ver
+                SupermarketGrid.distance_table).
+            rng: Generador para los productos y las compras por impulso.
+            mode: "search" o "direct", como en CustomerSimulator.simulate.
+            products: Productos ya sorteados (ver draw_products); por defecto se sortean con rng.
+            streams: Corrientes por cliente; si se indican reemplazan a rng. Cada cliente sortea sus
+                productos de una subcorriente y, de otra, un número uniforme por celda del grid que
+                decide la compra por impulso en la estantería de esa celda. Así, con las mismas
+                corrientes, una estantería que queda en la misma celda en dos layouts recibe el mismo
+                sorteo en ambos.
+            expected_impulse: Si es True no se sortean las compras por impulso: cada estantería tocada
+                suma su probabilidad de compra a los resultados, que pasan a ser valores esperados.
+        """
+        if mode not in BATCH_MODES:
+            raise ValueError(f"Modo de simulación desconocido: {mode} (opciones: {', '.join(BATCH_MODES)})")
+        table = grid.distance_table(bfs_order=True)
+        if table is None:
+            raise ValueError("La simulación por lotes necesita la tabla de distancias del layout y su orden de BFS")
+
+        impulse_draws = None
+        if streams is not None:
+            if len(streams) != self.num_customers:
+                raise ValueError(f"Se esperaban {self.num_customers} corrientes, hay {len(streams)}")
+            generators = streams.generators()
+            if products is None:
+                products = self.draw_products(grid, None, generators)
+            num_cells = grid.rows * grid.cols
+            impulse_draws = np.stack([generator.random(num_cells) for generator in streams.impulse_generators()]) \
+                if generators else np.zeros((0, num_cells))
+        elif rng is None:
+            raise ValueError("Hace falta un generador o corrientes por cliente")
+        elif products is None:
+            products = self.draw_products(grid, rng)
+        return _BatchRun(self, grid, table, rng, mode, products, impulse_draws, expected_impulse).run()
+
+
+class _BatchRun:
+    """
+    Estado de una simulación por lotes sobre un layout concreto.
+
+    Todo el estado de los clientes vive en matrices con una fila por cliente,
+    así que cada ronda (elegir destinos, llegar a ellos) son unas pocas
+    operaciones sobre las filas de los clientes activos, sin recorrerlos uno a
+    uno. Un cliente aparece a lo sumo una vez por ronda, de modo que las
+    actualizaciones por fila no se pisan entre sí.
+    """
+
+    def __init__(self,
+                 simulator: BatchSimulator,
+                 grid: SupermarketGrid,
+                 table: DistanceTable,
+                 rng: Optional[np.random.Generator],
+                 mode: str,
+                 products: Tuple[np.ndarray, np.ndarray, np.ndarray],
+                 impulse_draws: Optional[np.ndarray] = None,
+                 expected_impulse: bool = False
+                 ) -> None:
+        self.grid = grid
+        self.table = table
+        self.rng = rng
+        self.impulse_draws = impulse_draws  # Número uniforme por (cliente, celda), o None para sortear con rng
+        self.expected_impulse = expected_impulse
+        self.mode = mode
+        num_customers = simulator.num_customers
+        self.num_products = simulator.num_products
+        num_cells = grid.rows * grid.cols
+        num_walkable = len(table.cells)
+
+        self.bfs_order: np.ndarray = table.bfs_order()
+        self.rows = np.arange(num_customers)
+        adjacency = grid.shelf_adjacency()
+        # Estanterías vecinas de cada celda transitable (índice compacto de la tabla) y sus pasillos; los
+        # huecos apuntan a la columna extra de pending_shelf y visited
+        cells = table.cells.astype(np.int64)
+        self.slot_shelves: np.ndarray = np.where(adjacency.shelves >= 0, adjacency.shelves, num_cells).reshape(
+            -1, ShelfAdjacency.CAPACITY
+        )[cells].astype(np.int64)
+        self.slot_aisles: np.ndarray = adjacency.aisles.reshape(-1, ShelfAdjacency.CAPACITY)[cells]
+        self.shelf_aisles: np.ndarray = grid.aisle_ids.ravel().astype(np.int64)
+        # Probabilidad de compra por impulso de cada estantería (id plano)
+        known = self.shelf_aisles < len(grid.aisles.impulse_index)
+        self.shelf_impulse: np.ndarray = np.where(
+            known & (self.shelf_aisles > 0), grid.aisles.impulse_index[np.where(known, self.shelf_aisles, 0)], 0.0
+        )
+        # Celdas transitables (índice compacto de la tabla) junto a cada estantería; los huecos apuntan a
+        # la columna extra de candidates
+        shelf_slots = neighbor_slots(grid.aisle_ids > 0, grid.walkable)
+        self.shelf_access: np.ndarray = np.where(shelf_slots >= 0, table.index[shelf_slots], num_walkable).astype(np.int64)
+
+        owners, aisle_ids, product_ids = products
+        shelves = grid.product_index().locate(aisle_ids, product_ids)
+        # En modo "direct" los productos sin estantería se ignoran; en "search" se buscan sin encontrarlos
+        kept = (shelves >= 0) | (mode == "search")
+        # pending_shelf[c, s]: productos pendientes del cliente c en la estantería s; la última columna
+        # guarda los que no están en ninguna
+        self.pending_shelf = np.zeros((num_customers, num_cells + 1), dtype=np.int32)
+        np.add.at(self.pending_shelf, (owners[kept], np.where(shelves[kept] >= 0, shelves[kept], num_cells)), 1)
+        self.remaining: np.ndarray = np.bincount(owners[kept], minlength=num_customers)
+        num_aisles = max(int(grid.aisle_ids.max()), int(aisle_ids.max(initial=0))) + 1
+        self.pending_aisles = np.zeros((num_customers, num_aisles), dtype=np.int32)
+        np.add.at(self.pending_aisles, (owners, aisle_ids), 1)
+        # visited[c, s]: el cliente c pasó por la estantería s sin encontrar su producto desde el último que
+        # encontró. La columna extra (huecos de la tabla de vecinas) cuenta siempre como visitada
+        self.visited = np.zeros((num_customers, num_cells + 1), dtype=bool)
+        self.visited[:, num_cells] = True
+
+        # candidates[c, w]: estanterías que interesan al cliente c junto a la celda transitable w, y
+        # penalty[c, w] las visitadas entre ellas; la celda tiene candidatas si hay más de las primeras que
+        # de las segundas. Caben en int8 porque una celda tiene como mucho ShelfAdjacency.CAPACITY
+        # estanterías vecinas. La columna extra recoge los huecos
+        self.candidates = np.zeros((num_customers, num_walkable + 1), dtype=np.int8)
+        self.penalty = np.zeros((num_customers, num_walkable + 1), dtype=np.int8)
+        if mode == "search":
+            has_shelf = adjacency.shelves >= 0
+            access_cells = table.index[np.repeat(np.arange(num_cells), ShelfAdjacency.CAPACITY)[has_shelf]]
+            # aisle_access[a, w]: estanterías del pasillo a junto a la celda transitable w (con la columna extra)
+            self.aisle_access = np.bincount(
+                adjacency.aisles[has_shelf].astype(np.int64) * (num_walkable + 1) + access_cells,
+                minlength=num_aisles * (num_walkable + 1)
+            ).reshape(num_aisles, num_walkable + 1).astype(np.int8)
+            # En coma flotante el producto matricial usa BLAS; los conteos son exactos en float32
+            self.candidates[:] = (self.pending_aisles > 0).astype(np.float32) @ self.aisle_access.astype(np.float32)
+        else:
+            customers, shelves = np.nonzero(self.pending_shelf[:, :num_cells])
+            np.add.at(self.candidates, (customers[:, None], self.shelf_access[shelves]), 1)
+
+        # Posición de cada cliente como índice compacto de la tabla
+        self.current = np.full(num_customers, table.index[grid.flat_id(grid.entrance)], dtype=np.int64)
+        # Tramos de todas las rondas como (cliente, celda de inicio, celda de destino) en índices compactos,
+        # un arreglo por ronda
+        self.leg_customers: List[np.ndarray] = []
+        self.leg_starts: List[np.ndarray] = []
+        self.leg_targets: List[np.ndarray] = []
+
+    def _choose_targets(self, customers: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Celda de destino y estantería de cada cliente, con la misma regla de
+        desempate que el BFS: la primera celda en orden de BFS con estanterías
+        candidatas y, en ella, la primera candidata de la tabla de vecinas.
+        """
+        num_walkable = len(self.bfs_order)
+        # Las celdas sin candidatas pasan a valer num_walkable, como las inalcanzables en bfs_order
+        without_candidates = self.candidates[customers, :num_walkable] <= self.penalty[customers, :num_walkable]
+        order = np.maximum(self.bfs_order[self.current[customers]],
+                           without_candidates * self.bfs_order.dtype.type(num_walkable))
+        targets = order.argmin(axis=1)
+        rows = self.rows[:len(customers)]
+        if (order[rows, targets] == num_walkable).any():
+            raise Exception("No se puede llegar a ningún pasillo de la lista de compras.")
+
+        shelves = self.slot_shelves[targets]
+        owners = customers[:, None]
+        if self.mode == "search":
+            is_candidate = (self.pending_aisles[owners, self.slot_aisles[targets]] > 0) & ~self.visited[owners, shelves]
+        else:
+            is_candidate = self.pending_shelf[owners, shelves] > 0
+        return targets, shelves[rows, is_candidate.argmax(axis=1)]
+
+    def _arrive(self, customers: np.ndarray, shelves: np.ndarray) -> None:
+        """Cada cliente compra el producto de su estantería si lo tiene pendiente, o la marca como visitada"""
+        if self.mode == "direct":
+            # Todas las estanterías elegidas tienen producto pendiente; las que se vacían dejan de ser candidatas
+            self.pending_shelf[customers, shelves] -= 1
+            self.remaining[customers] -= 1
+            emptied = self.pending_shelf[customers, shelves] == 0
+            self.candidates[customers[emptied, None], self.shelf_access[shelves[emptied]]] -= 1
+            return
+
+        found = self.pending_shelf[customers, shelves] > 0
+        if not found.all():
+            # El producto buscado no está en esta estantería: deja de ser candidata hasta encontrar otro
+            missed_customers, missed_shelves = customers[~found], shelves[~found]
+            self.visited[missed_customers, missed_shelves] = True
+            self.penalty[missed_customers[:, None], self.shelf_access[missed_shelves]] += 1
+            customers, shelves = customers[found], shelves[found]
+
+        self.pending_shelf[customers, shelves] -= 1
+        self.remaining[customers] -= 1
+        aisle_ids = self.shelf_aisles[shelves]
+        self.pending_aisles[customers, aisle_ids] -= 1
+        # Pasillo completo: sus estanterías dejan de ser candidatas
+        dropped = self.pending_aisles[customers, aisle_ids] == 0
+        if dropped.any():
+            self.candidates[customers[dropped]] -= self.aisle_access[aisle_ids[dropped]]
+        # Se encontró un producto: las estanterías visitadas vuelven a ser candidatas, salvo las de un
+        # pasillo completo, que ya no están en candidates
+        self.penalty[customers] = 0
+        self.visited[customers, :-1] = False
+
+    def _add_legs(self, customers: np.ndarray, targets: np.ndarray) -> None:
+        """Registra un tramo por cliente desde su posición actual y lo mueve al destino"""
+        self.leg_customers.append(customers)
+        self.leg_starts.append(self.current[customers])
+        self.leg_targets.append(targets)
+        self.current[customers] = targets
+
+    def _walk(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Recorre a la vez todos los tramos registrados siguiendo next_hop.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray]: Cliente, índice compacto y
+            marca de inicio de tramo de cada celda recorrida.
+        """
+        table = self.table
+        leg_customers = np.concatenate(self.leg_customers)
+        position = np.concatenate(self.leg_starts)
+        target = np.concatenate(self.leg_targets)
+        lengths = table.dist[position, target].astype(np.int64)
+        if (lengths < 0).any():
+            raise Exception("No se puede llegar a la estantería más cercana.")
+
+        # Cada tramo ocupa lengths + 1 posiciones consecutivas, empezando por la celda donde ya estaba el cliente
+        offsets = np.cumsum(lengths + 1) - (lengths + 1)
+        cells = np.empty(int((lengths + 1).sum()), dtype=np.int64)
+        cells[offsets] = position
+        walking = np.flatnonzero(lengths > 0)
+        step = 0
+        while len(walking):
+            step += 1
+            position[walking] = table.next_hop[position[walking], target[walking]]
+            cells[offsets[walking] + step] = position[walking]
+            walking = walking[lengths[walking] > step]
+
+        is_start = np.zeros(len(cells), dtype=bool)
+        is_start[offsets] = True
+        owners = np.repeat(leg_customers, lengths + 1)
+        self.steps = np.bincount(leg_customers, weights=lengths, minlength=len(self.current)).astype(np.int64)
+        return owners, cells, is_start
+
+    def run(self) -> BatchSimulationResult:
+        grid = self.grid
+        num_customers = len(self.current)
+        num_cells = grid.rows * grid.cols
+        exit_cell = self.table.index[grid.flat_id(grid.exit)]
+        shopping = self.rows
+        while len(shopping):
+            is_shopping = self.remaining[shopping] > 0
+            if not is_shopping.all():
+                leaving = shopping[~is_shopping]
+                self._add_legs(leaving, np.full(len(leaving), exit_cell, dtype=np.int64))
+                shopping = shopping[is_shopping]
+                if not len(shopping):
+                    break
+            targets, shelves = self._choose_targets(shopping)
+            self._add_legs(shopping, targets)
+            self._arrive(shopping, shelves)
+
+        owners, compact_cells, is_start = self._walk()
+        cells = self.table.cells[compact_cells].astype(np.int64)
+        # El inicio de cada tramo no suma pisadas, pero sí compras por impulso
+        walk_counts = np.bincount(cells[~is_start], minlength=num_cells)
+
+        # Un sorteo por par (cliente, estantería), con tantos intentos como celdas recorridas la tocan
+        shelves = self.slot_shelves[compact_cells]
+        touched = shelves < num_cells
+        keys, trials = np.unique(np.broadcast_to(owners[:, None], shelves.shape)[touched] * num_cells + shelves[touched],
+                                 return_counts=True)
+        key_owners, key_shelves = np.divmod(keys, num_cells)
+        probability = 1.0 - (1.0 - self.shelf_impulse[key_shelves]) ** trials
+        if self.expected_impulse:
+            # Valor esperado: cada par suma su probabilidad en vez de 0 o 1
+            weights = probability
+        else:
+            draws = self.rng.random(len(keys)) if self.impulse_draws is None else self.impulse_draws[key_owners, key_shelves]
+            weights = (draws < probability).astype(np.float64)
+
+        return BatchSimulationResult(
+            impulsive_purchases=np.bincount(key_owners, weights=weights, minlength=num_customers),
+            steps=self.steps,
+            num_products=self.num_products,
+            walk_counts=walk_counts.reshape(grid.rows, grid.cols).astype(np.float64),
+            impulse_counts=np.bincount(key_shelves, weights=weights, minlength=num_cells).reshape(grid.rows, grid.cols),
+        )
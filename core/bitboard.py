@@ -0,0 +1,155 @@
+"""
+Búsquedas en anchura bit a bit sobre máscaras del grid.
+
+Una máscara (rows, cols) se empaqueta en un único entero de Python: la celda
+(fila, columna) es el bit fila * stride + columna, con stride = cols + 1. La
+columna extra de cada fila siempre está a 0, así que desplazar un bit a la
+izquierda o a la derecha nunca lo pasa de una fila a otra dentro de la
+máscara. Un nivel completo del BFS se calcula con cuatro desplazamientos y un
+AND, sin recorrer las celdas una por una.
+"""
+from typing import Iterator, List
+import numpy as np
+
+BACKENDS = ("queue", "bitboard")
+
+
+def check_backend(backend: str) -> str:
+    """Comprueba que el nombre del motor de búsqueda sea válido y lo devuelve"""
+    if backend not in BACKENDS:
+        raise ValueError(f"Motor de búsqueda desconocido: {backend} (opciones: {', '.join(BACKENDS)})")
+    return backend
+
+
+class Bitboard:
+    """
+    Máscara de celdas transitables empaquetada en un entero, con las
+    operaciones de expansión que usan las búsquedas.
+
+    Attributes:
+        rows: Número de filas del grid.
+        cols: Número de columnas del grid.
+        stride: Bits por fila (cols + 1, por la columna de separación).
+        mask: Bits de las celdas transitables.
+    """
+
+    def __init__(self, walkable: np.ndarray) -> None:
+        self.rows, self.cols = walkable.shape
+        self.stride = self.cols + 1
+        self.mask: int = self.pack(walkable)
+
+    def pack(self, cells: np.ndarray) -> int:
+        """Empaqueta una máscara booleana (rows, cols) o plana (rows*cols) en un entero"""
+        padded = np.zeros((self.rows, self.stride), dtype=bool)
+        padded[:, :self.cols] = np.asarray(cells, dtype=bool).reshape(self.rows, self.cols)
+        return int.from_bytes(np.packbits(padded, bitorder='little').tobytes(), 'little')
+
+    def unpack(self, bits: int) -> np.ndarray:
+        """Máscara booleana (rows, cols) de los bits indicados"""
+        num_bits = self.rows * self.stride
+        raw = np.frombuffer(bits.to_bytes((num_bits + 7) // 8, 'little'), dtype=np.uint8)
+        return np.unpackbits(raw, count=num_bits, bitorder='little').reshape(self.rows, self.stride)[:, :self.cols].astype(bool)
+
+    def cell_bit(self, cell: int) -> int:
+        """Bit de una celda dada por su id plano"""
+        row, col = divmod(cell, self.cols)
+        return 1 << (row * self.stride + col)
+
+    def spread(self, bits: int) -> int:
+        """Celdas vecinas (arriba, abajo, izquierda, derecha) de las indicadas, sin filtrar por la máscara"""
+        return (bits >> self.stride) | (bits << self.stride) | (bits >> 1) | (bits << 1)
+
+    def layers(self, seeds: int) -> Iterator[int]:
+        """
+        Niveles del BFS desde las celdas indicadas: primero las semillas
+        transitables y después, en cada paso, las celdas transitables que se
+        alcanzan por primera vez.
+        """
+        frontier = seeds & self.mask
+        reached = frontier
+        while frontier:
+            yield frontier
+            frontier = self.spread(frontier) & self.mask & ~reached
+            reached |= frontier
+
+    def flood_fill(self, seeds: int) -> int:
+        """Todas las celdas transitables alcanzables desde las indicadas"""
+        reached = 0
+        for frontier in self.layers(seeds):
+            reached |= frontier
+        return reached
+
+    def has_path(self, start: int, end: int) -> bool:
+        """Indica si hay un camino entre dos celdas (ids planos); se detiene al alcanzar end"""
+        end_bit = self.cell_bit(end)
+        if not self.mask & end_bit:
+            return False
+        for frontier in self.layers(self.cell_bit(start)):
+            if frontier & end_bit:
+                return True
+        return False
+
+    def distances(self, seeds: int, unreachable: int) -> np.ndarray:
+        """
+        Distancia en pasos desde cada celda (id plano) hasta la semilla más
+        cercana, o unreachable si no se puede llegar.
+        """
+        dist = np.full(self.rows * self.cols, unreachable, dtype=np.int16)
+        for level, frontier in enumerate(self.layers(seeds)):
+            dist[self.unpack(frontier).ravel()] = level
+        return dist
+
+
+def validate_bitboard(aisle_ids: np.ndarray) -> bool:
+    """
+    Igual que validate_aisle_ids: todos los pasillos (valor 0) conectados y
+    cada estantería (valor > 0) tocando alguno, calculado con un flood fill
+    bit a bit desde la primera casilla de pasillo.
+    """
+    if aisle_ids.size == 0:
+        return False
+    board = Bitboard(aisle_ids == 0)
+    if not board.mask:
+        return False
+    first_walkway = board.mask & -board.mask
+    if board.flood_fill(first_walkway) != board.mask:
+        return False
+    shelves = board.pack(aisle_ids > 0)
+    return shelves & ~board.spread(board.mask) == 0
+
+
+def reachable_shelves(aisle_ids: np.ndarray, walkable: np.ndarray, start: int) -> np.ndarray:
+    """
+    Estanterías que tocan alguna celda transitable alcanzable desde start.
+
+    Args:
+        aisle_ids: Plano (rows, cols) de ids de pasillo.
+        walkable: Máscara (rows, cols) de celdas transitables.
+        start: Id plano de la celda de partida.
+
+    Returns:
+        np.ndarray: Máscara booleana (rows, cols) de las estanterías alcanzables.
+    """
+    board = Bitboard(walkable)
+    reached = board.flood_fill(board.cell_bit(start))
+    return board.unpack(board.pack(aisle_ids > 0) & board.spread(reached))
+
+
+def distance_fields_bitboard(walkable: np.ndarray, sources: np.ndarray, unreachable: int) -> np.ndarray:
+    """
+    Campos de distancia con múltiples orígenes, uno por fila de sources,
+    expandiendo cada campo nivel a nivel con operaciones de bits.
+
+    Args:
+        walkable: Máscara (rows, cols) de celdas transitables.
+        sources: Máscara (K, rows*cols) con las celdas de origen de cada campo.
+        unreachable: Valor para las celdas a las que no se puede llegar.
+
+    Returns:
+        np.ndarray: Arreglo int16 (K, rows*cols) de distancias.
+    """
+    board = Bitboard(walkable)
+    fields: List[np.ndarray] = [board.distances(board.pack(row), unreachable) for row in sources]
+    if not fields:
+        return np.full(sources.shape, unreachable, dtype=np.int16)
+    return np.stack(fields)
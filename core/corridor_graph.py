@@ -0,0 +1,186 @@
+import heapq
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from core.pathfinding import GridGraph
+
+
+class CorridorGraph:
+    """
+    Grafo contraído de las celdas transitables.
+
+    Los nodos son los cruces y extremos (celdas con un número de vecinos
+    distinto de 2) y las celdas marcadas en keep (por ejemplo, las que dan a
+    una estantería). Cada tramo de celdas de paso entre dos nodos se guarda
+    como una arista con peso igual a su número de pasos, junto con sus celdas
+    para poder reconstruir la ruta completa solo cuando hace falta.
+
+    Attributes:
+        chains: Celdas de cada tramo, ordenadas desde chain_ends[c][0] hacia chain_ends[c][1].
+        chain_ends: Nodos en los extremos de cada tramo.
+        chain_of: Tramo de cada celda (id plano), -1 si la celda es un nodo o no es transitable.
+        chain_index: Posición de cada celda dentro de su tramo.
+        edges: Aristas de cada nodo como (vecino, pasos, tramo); el tramo es -1 si los nodos son adyacentes.
+    """
+
+    def __init__(self, graph: GridGraph, keep: np.ndarray) -> None:
+        """
+        Args:
+            graph: Adyacencia de las celdas transitables.
+            keep: Máscara plana de celdas que deben ser nodos aunque solo tengan dos vecinos.
+        """
+        num_cells = len(graph.walkable)
+        is_node: List[bool] = (graph.walkable & ((graph.degree != 2) | keep.ravel())).tolist()
+        chain_of = [-1] * num_cells
+        chain_index = [-1] * num_cells
+        self.chains: List[List[int]] = []
+        self.chain_ends: List[Tuple[int, int]] = []
+        self.edges: Dict[int, List[Tuple[int, int, int]]] = {}
+
+        def add_edges(node: int) -> None:
+            self.edges.setdefault(node, [])
+            for first in graph.neighbors_of(node):
+                if is_node[first]:
+                    self.edges[node].append((first, 1, -1))
+                    continue
+                if chain_of[first] >= 0:
+                    continue  # Tramo ya recorrido desde el otro extremo
+
+                # Avanzar por las celdas de paso hasta llegar a otro nodo
+                cells: List[int] = []
+                previous, current = node, first
+                while not is_node[current]:
+                    chain_of[current] = len(self.chains)
+                    chain_index[current] = len(cells)
+                    cells.append(current)
+                    a, b = graph.neighbors_of(current)
+                    previous, current = current, (b if a == previous else a)
+
+                chain_id = len(self.chains)
+                self.chains.append(cells)
+                self.chain_ends.append((node, current))
+                if current != node:  # Un tramo que vuelve al mismo nodo nunca acorta una ruta
+                    self.edges[node].append((current, len(cells) + 1, chain_id))
+                    self.edges.setdefault(current, []).append((node, len(cells) + 1, chain_id))
+
+        for node in np.flatnonzero(is_node).tolist():
+            add_edges(node)
+        # Los ciclos formados solo por celdas de paso no tocan ningún nodo: una de sus celdas pasa a serlo
+        for cell in np.flatnonzero(graph.walkable).tolist():
+            if not is_node[cell] and chain_of[cell] < 0:
+                is_node[cell] = True
+                add_edges(cell)
+
+        self.walkable: np.ndarray = graph.walkable.copy()
+        self.chain_of: np.ndarray = np.array(chain_of, dtype=np.int32)
+        self.chain_index: np.ndarray = np.array(chain_index, dtype=np.int32)
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.edges)
+
+    def _endpoints(self, cell: int) -> List[Tuple[int, int, int]]:
+        """
+        Nodos desde los que se entra o sale de una celda, como (nodo, pasos, lado):
+        la propia celda si es un nodo (lado -1), o los dos extremos de su tramo
+        (lado 0 hacia chain_ends[c][0], lado 1 hacia chain_ends[c][1]).
+        """
+        chain = int(self.chain_of[cell])
+        if chain < 0:
+            return [(cell, 0, -1)]
+        index = int(self.chain_index[cell])
+        first, last = self.chain_ends[chain]
+        return [(first, index + 1, 0), (last, len(self.chains[chain]) - index, 1)]
+
+    def _chain_walk(self, cell: int, side: int) -> List[int]:
+        """Celdas recorridas desde cell (sin incluirla) hasta el extremo de su tramo indicado, sin incluirlo"""
+        chain = int(self.chain_of[cell])
+        index = int(self.chain_index[cell])
+        cells = self.chains[chain]
+        return cells[:index][::-1] if side == 0 else cells[index + 1:]
+
+    def _search(self, start: int, end: int, want_path: bool) -> Tuple[int, Optional[List[int]]]:
+        """Dijkstra sobre los nodos entre los extremos de start y end; devuelve (pasos, ruta o None)"""
+        if not (self.walkable[start] and self.walkable[end]):
+            return -1, None
+        if start == end:
+            return 0, [start]
+
+        best = -1
+        best_node = -1
+        # Dentro del mismo tramo, el camino directo puede no pasar por ningún nodo
+        same_chain = self.chain_of[start] >= 0 and self.chain_of[start] == self.chain_of[end]
+        if same_chain:
+            best = abs(int(self.chain_index[start]) - int(self.chain_index[end]))
+
+        targets: Dict[int, Tuple[int, int]] = {}
+        for node, steps, side in self._endpoints(end):
+            if node not in targets or steps < targets[node][0]:
+                targets[node] = (steps, side)
+
+        dist: Dict[int, int] = {}
+        parents: Dict[int, Tuple[int, int]] = {}  # nodo -> (nodo anterior, tramo); (-1, lado) para los de salida
+        heap: List[Tuple[int, int]] = []
+        for node, steps, side in self._endpoints(start):
+            if steps < dist.get(node, steps + 1):
+                dist[node] = steps
+                parents[node] = (-1, side)
+                heapq.heappush(heap, (steps, node))
+
+        while heap:
+            steps, node = heapq.heappop(heap)
+            if steps > dist[node]:
+                continue
+            if best >= 0 and steps >= best:
+                break
+            if node in targets and (best < 0 or steps + targets[node][0] < best):
+                best = steps + targets[node][0]
+                best_node = node
+            for neighbor, weight, chain in self.edges[node]:
+                new_steps = steps + weight
+                if new_steps < dist.get(neighbor, new_steps + 1):
+                    dist[neighbor] = new_steps
+                    parents[neighbor] = (node, chain)
+                    heapq.heappush(heap, (new_steps, neighbor))
+
+        if best < 0 or not want_path:
+            return best, None
+        if best_node < 0:
+            # Camino directo por el tramo compartido
+            chain = self.chains[int(self.chain_of[start])]
+            i, j = int(self.chain_index[start]), int(self.chain_index[end])
+            return best, chain[i:j + 1] if i <= j else chain[j:i + 1][::-1]
+        return best, self._expand(start, end, best_node, parents, targets[best_node][1])
+
+    def _expand(self, start: int, end: int, last_node: int, parents: Dict[int, Tuple[int, int]], end_side: int) -> List[int]:
+        """Reconstruye la ruta completa en celdas a partir de los predecesores de la búsqueda"""
+        reversed_path: List[int] = []
+        # Tramo final desde el último nodo hasta end, recorrido al revés
+        if end != last_node:
+            reversed_path.append(end)
+            reversed_path.extend(self._chain_walk(end, end_side))
+
+        node = last_node
+        while True:
+            previous, chain_or_side = parents[node]
+            reversed_path.append(node)
+            if previous < 0:
+                if node != start:
+                    reversed_path.extend(reversed(self._chain_walk(start, chain_or_side)))
+                    reversed_path.append(start)
+                break
+            if chain_or_side >= 0:
+                cells = self.chains[chain_or_side]
+                # Las celdas se agregan desde node hacia previous
+                reversed_path.extend(reversed(cells) if self.chain_ends[chain_or_side][0] == previous else cells)
+            node = previous
+
+        reversed_path.reverse()
+        return reversed_path
+
+    def distance(self, start: int, end: int) -> int:
+        """Distancia en pasos entre dos ids planos sin reconstruir la ruta, -1 si no hay ruta"""
+        return self._search(start, end, want_path=False)[0]
+
+    def path(self, start: int, end: int) -> Optional[List[int]]:
+        """Ruta mínima entre dos ids planos, expandida a celdas e incluyendo inicio y fin"""
+        return self._search(start, end, want_path=True)[1]
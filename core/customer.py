@@ -1,18 +1,23 @@
-from collections import deque
-from dataclasses import dataclass
-from os import path
+from dataclasses import dataclass, field
 import random
-from copy import deepcopy
-from typing import List, Any, Tuple, Set, Optional, Dict
-from networkx import neighbors
+from typing import Container, Iterable, List, Any, Sequence, Tuple, Set, Optional, Dict
+import numpy as np
+import config as cfg
 from core.grid import SupermarketGrid
-import networkx as nx
+from core.pathfinding import DIRECTIONS
+from core.shelf_adjacency import ShelfAdjacency
+from core.shopping_lists import ShoppingListStore
 
 @dataclass
 class SimulationResult:
     impulsive_purchases: int
-    path: List[Tuple[int, int]] # Coords
-    impulsive_shelfs: List[Tuple[int, int]] # Coords
+    # path, impulsive_shelfs and impulse_probabilities are None when the trip went into a TripAccumulator
+    path: Optional[List[Tuple[int, int]]] # Coords
+    impulsive_shelfs: Optional[List[Tuple[int, int]]] # Coords
+    # Probability of an impulse buy over the whole trip for every shelf the path touches, by coords
+    impulse_probabilities: Optional[Dict[Tuple[int, int], float]] = field(default_factory=dict)
+    steps: int = 0
+    expected_impulsive_purchases: float = 0.0 # Without the Monte Carlo draws
 
 @dataclass
 class GetPathResult:
@@ -20,57 +25,200 @@ class GetPathResult:
     
     Attributes:
         closest_shelf_pos: Position of the closest shelf.
-        path_to_shelf: Path from start to the shelf.
+        path_to_shelf: Path from start to the shelf, shared with the leg cache so it must not be modified.
         impulsive_purchases: Count of impulsive buys along the path.
-        impulsive_shelfs: List of shelves where impulsive buys were made.
+        flat_path: The same path as flat cell ids.
     """
     closest_shelf_pos: Tuple[int, int]
-    path_to_shelf: List[Tuple[int, int]]
+    path_to_shelf: Sequence[Tuple[int, int]]
     impulsive_purchases: int
+    flat_path: np.ndarray
 
 @dataclass
 class TargetShelf:
     shelf_pos: Tuple[int, int]
     adj_walkable_pos: Tuple[int, int]
+    # Flat ids from the search start to adj_walkable_pos, kept when the search that found the target
+    # already walked the graph (no distance table), so the leg does not need a second search
+    path: Optional[List[int]] = None
+
+
+class PendingShelfCells:
+    """Walkable cells next to a pending, not yet visited shelf, checked on demand during a BFS."""
+
+    def __init__(self,
+                 customer: 'CustomerSimulator',
+                 pending_cell_ids: Set[int],
+                 grid: SupermarketGrid,
+                 visited_shelves: Set[Tuple[int, int]]
+                 ) -> None:
+        self.customer = customer
+        self.pending_cell_ids = pending_cell_ids
+        self.grid = grid
+        self.visited_shelves = visited_shelves
+        self.shelf_count = grid.shelf_adjacency().count
+
+    def __contains__(self, cell: object) -> bool:
+        return self.shelf_count[cell] > 0 and self.customer.get_pending_shelf(
+            cell, self.pending_cell_ids, self.grid, self.visited_shelves
+        ) >= 0
+
+
+class TripAccumulator:
+    """
+    Running totals of many trips over one layout, filled by simulate(..., accumulator=...) instead
+    of returning each path: visits per cell, impulse buys per shelf (sampled and expected) and steps.
+    The counts are flat arrays indexed by cell id.
+    """
+
+    def __init__(self, grid: SupermarketGrid) -> None:
+        num_cells = grid.rows * grid.cols
+        self.shape: Tuple[int, int] = (grid.rows, grid.cols)
+        self.walk_counts: np.ndarray = np.zeros(num_cells)
+        self.impulse_counts: np.ndarray = np.zeros(num_cells)
+        self.expected_impulse_counts: np.ndarray = np.zeros(num_cells)
+        self.steps: int = 0
+        self.trips: int = 0
+
+    def add_leg(self, flat_path: np.ndarray) -> None:
+        """Count the cells of a leg but the first one, where the customer already stood"""
+        # A shortest path never repeats a cell, so plain fancy indexing counts every visit
+        self.walk_counts[flat_path[1:]] += 1.0
+        self.steps += len(flat_path) - 1
+
+    def add_impulse(self, bought_shelves: Iterable[int], impulse_survival: Dict[int, float]) -> None:
+        """Count the shelves bought on impulse in one trip and their buying probabilities"""
+        self.impulse_counts[list(bought_shelves)] += 1.0
+        self.expected_impulse_counts[list(impulse_survival)] += 1.0 - np.fromiter(impulse_survival.values(), dtype=np.float64)
+        self.trips += 1
+
+
+PRODUCT_LOCATION_MODES = ("search", "direct")
+
+
+def _impulse_probabilities(grid: SupermarketGrid, impulse_survival: Dict[int, float]) -> Dict[Tuple[int, int], float]:
+    """Probability of buying each touched shelf on impulse, by coords, from the chances it was never bought"""
+    return {grid.cell_position(shelf): 1.0 - survival for shelf, survival in impulse_survival.items()}
+
+
+def default_rng() -> np.random.Generator:
+    """NumPy generator seeded from the random module, so random.seed still makes runs reproducible."""
+    return np.random.default_rng(random.getrandbits(64))
 
 
 class CustomerSimulator:
     def __init__(self, shopping_list: List[int]) -> None:
-        self.shopping_list:List[int] = shopping_list
+        # The list lives in a store, which precomputes its distinct aisles and their multiplicities
+        self.store: ShoppingListStore = ShoppingListStore.from_lists([shopping_list])
+        self.index: int = 0
+
+    @classmethod
+    def from_store(cls, store: ShoppingListStore, index: int) -> 'CustomerSimulator':
+        """Customer backed by entry index of a shared ShoppingListStore, without copying the list."""
+        customer: 'CustomerSimulator' = cls.__new__(cls)
+        customer.store = store
+        customer.index = index
+        return customer
+
+    @property
+    def shopping_list(self) -> np.ndarray:
+        """The customer's aisle ids, as a view on its store"""
+        return self.store.shopping_list(self.index)
 
-    def get_product_ids_by_aisle(self, grid: SupermarketGrid) -> Dict[int, List[int]]:
+    def get_product_ids_by_aisle(self, grid: SupermarketGrid, rng: Optional[np.random.Generator] = None) -> Dict[int, List[int]]:
         """
         Get the product IDs from the shopping list by aisle.
         Each aisle can have multiple products, so we need to randomly select one product ID from each aisle to look for.
+        The ids are drawn from rng when given, otherwise from the random module.
 
         Returns:
             Dict[int, List[int]]: A dictionary where the keys are aisle IDs and the values are lists of product IDs.
         """
         
+        def draw(product_count: int) -> int:
+            return random.randint(1, product_count) if rng is None else int(rng.integers(1, product_count, endpoint=True))
+
         aisle_with_product_ids : Dict[int, List[int]] = dict()
-        for aisle_id in self.shopping_list:
-            if aisle_id in grid.aisle_info.keys():
-                # Get the product IDs from the aisle info
-                product_count = grid.aisle_info[aisle_id].product_count
-                if aisle_id not in aisle_with_product_ids.keys():
-                    aisle_with_product_ids[aisle_id] = []
-                aisle_with_product_ids[aisle_id].append(random.randint(1, product_count))
+        # The store already counts how many times each aisle appears in the list; the ids are drawn aisle by
+        # aisle in increasing id order, like BatchSimulator.draw_products, so the same rng gives the same ids
+        aisles, counts = self.store.aisle_multiplicities(self.index)
+        for aisle_id, count in zip(aisles.tolist(), counts.tolist()):
+            if aisle_id in grid.aisles:
+                product_count = int(grid.aisles.product_count[aisle_id])
+                aisle_with_product_ids[aisle_id] = [draw(product_count) for _ in range(count)]
 
         return aisle_with_product_ids
 
     def get_surrounding_shelves(self, pos: Tuple[int, int], grid: SupermarketGrid, include_exit: bool = False) -> List[Tuple[int, int]]:
         shelves = []
-        directions = [(-1, 0), (1, 0), (0, -1), (0, 1)]  # Up, Down, Left, Right
-
-        for dx, dy in directions:
+        for dx, dy in DIRECTIONS:  # Up, Down, Left, Right
             nx_, ny = pos[0] + dx, pos[1] + dy
             if 0 <= nx_ < grid.rows and 0 <= ny < grid.cols:
-                cell_info = grid.grid[nx_][ny]
-                if cell_info.aisle_id > 0 or (include_exit and cell_info.is_exit):  # Aisle or exit
+                if grid.aisle_ids[nx_, ny] > 0 or (include_exit and grid.exit_mask[nx_, ny]):  # Aisle or exit
                     shelves.append((nx_, ny))
 
         return shelves
 
+    def get_target_cells(self,
+                         pending_cell_ids: Set[int],
+                         grid: SupermarketGrid,
+                         visited_shelves: Set[Tuple[int, int]],
+                         find_exit: bool = False
+                         ) -> Dict[int, int]:
+        """
+        Map every walkable cell next to a pending shelf (or to the exit) to that shelf.
+        When a cell touches several of them, the first one in DIRECTIONS order is kept.
+
+        Returns:
+            Dict[int, int]: Flat id of the walkable cell -> flat id of the shelf.
+        """
+        if find_exit:
+            exit_id = grid.flat_id(grid.exit)
+            return {cell: exit_id for cell in grid.graph.neighbors_of(exit_id)}
+
+        # The extra False entry is what the -1 (no shelf) slots of the table point to
+        target_mask = np.zeros(grid.rows * grid.cols + 1, dtype=bool)
+        target_mask[:-1] = np.isin(grid.aisle_ids, list(pending_cell_ids)).ravel() & (grid.aisle_ids > 0).ravel()
+        for shelf in visited_shelves:
+            target_mask[grid.flat_id(shelf)] = False
+
+        shelf_slots = grid.shelf_adjacency().shelves.reshape(-1, ShelfAdjacency.CAPACITY)
+        is_target = target_mask[shelf_slots]
+        walkable_cells = np.flatnonzero(is_target.any(axis=1))
+        first_slot = is_target[walkable_cells].argmax(axis=1)
+        return dict(zip(walkable_cells.tolist(), shelf_slots[walkable_cells, first_slot].tolist()))
+
+    def get_pending_shelf(self,
+                          cell: int,
+                          pending_cell_ids: Set[int],
+                          grid: SupermarketGrid,
+                          visited_shelves: Set[Tuple[int, int]]
+                          ) -> int:
+        """
+        First shelf next to a walkable cell, in DIRECTIONS order, that belongs to a pending aisle
+        and has not been visited yet.
+
+        Returns:
+            int: Flat id of the shelf, -1 if there is none.
+        """
+        table = grid.shelf_adjacency()
+        start = cell * ShelfAdjacency.CAPACITY
+        for slot in range(start, start + int(table.count[cell])):
+            shelf = int(table.shelves[slot])
+            if int(table.aisles[slot]) in pending_cell_ids and grid.cell_position(shelf) not in visited_shelves:
+                return shelf
+        return -1
+
+    def cells_next_to(self, shelves: Set[Tuple[int, int]], grid: SupermarketGrid) -> Set[int]:
+        """Flat ids of the walkable cells next to any of the given shelves."""
+        cells = set()
+        for row, col in shelves:
+            for dx, dy in DIRECTIONS:
+                nx_, ny = row + dx, col + dy
+                if 0 <= nx_ < grid.rows and 0 <= ny < grid.cols and grid.walkable[nx_, ny]:
+                    cells.add(nx_ * grid.cols + ny)
+        return cells
+
     def find_closest_from_set(self, 
                            start_pos: Tuple[int, int], 
                            pending_cell_ids: Set[int], 
@@ -78,39 +226,163 @@ class CustomerSimulator:
                            visited_shelves: Set[Tuple[int, int]],
                            find_exit: bool = False
                            ) -> TargetShelf:
-        if start_pos not in grid.graph:
+        """
+        Nearest walkable cell next to an unvisited shelf of a pending aisle (or next to the exit).
+        Customers often repeat the same search, so results are kept in the layout's leg cache.
+        """
+        start = grid.flat_id(start_pos)
+        if start not in grid.graph:
             raise Exception("La posición inicial no es válida.")
-        
-        # BFS setup
-        queue = deque([start_pos])
-        visited = set()
 
-        while queue:
-            current = queue.popleft()
+        targets = grid.leg_cache().targets
+        key = (grid.fingerprint, start, frozenset(pending_cell_ids), frozenset(visited_shelves), find_exit)
+        target = targets.get(key)
+        if target is None:
+            target = self._search_closest(start, pending_cell_ids, grid, visited_shelves, find_exit)
+            targets.put(key, target)
+        return target
+
+    def _search_closest(self,
+                        start: int,
+                        pending_cell_ids: Set[int],
+                        grid: SupermarketGrid,
+                        visited_shelves: Set[Tuple[int, int]],
+                        find_exit: bool
+                        ) -> TargetShelf:
+        # Without a distance table the legs need a graph search, so the path found here is handed over to them
+        table = grid.distance_table()
+        keep_path = table is None
+        if find_exit:
+            exit_id = grid.flat_id(grid.exit)
+            if not keep_path:
+                # The table already knows whether any cell next to the exit is reachable
+                target_cells = self.get_target_cells(pending_cell_ids, grid, visited_shelves, find_exit=True)
+                if not any(table.distance(start, cell) >= 0 for cell in target_cells):
+                    raise Exception("No se encontró un pasillo contiguo a la posición inicial.")
+                return TargetShelf(grid.exit, grid.exit)
+            result = grid.graph.bfs(start, targets=(exit_id,))
+            if result.target < 0:
+                raise Exception("No se encontró un pasillo contiguo a la posición inicial.")
+            return TargetShelf(grid.exit, grid.exit, grid.graph.reconstruct_path(result, exit_id))
+
+        fields = grid.aisle_distance_fields() if pending_cell_ids else None
+        if fields is not None:
+            # Same cell the BFS below would stop at, unless the nearest one only touches visited shelves
+            descent = fields.descend_path(list(pending_cell_ids), start, grid.graph)
+            target = descent[-1] if descent is not None else -1
+            shelf = self.get_pending_shelf(target, pending_cell_ids, grid, visited_shelves) if target >= 0 else -1
+            if shelf >= 0:
+                return TargetShelf(grid.cell_position(shelf), grid.cell_position(target), descent if keep_path else None)
 
-            if current in visited:
-                continue
+            # Exact search over the remaining access cells, skipping those that only touch visited shelves
+            if table is not None:
+                candidates = fields.sources_of(list(pending_cell_ids))
+                keep = np.ones(len(candidates), dtype=bool)
+                for cell in self.cells_next_to(visited_shelves, grid):
+                    if self.get_pending_shelf(cell, pending_cell_ids, grid, visited_shelves) < 0:
+                        keep &= candidates != cell
+                target = table.nearest(start, candidates[keep])
+                if target >= 0:
+                    shelf = self.get_pending_shelf(target, pending_cell_ids, grid, visited_shelves)
+                    return TargetShelf(grid.cell_position(shelf), grid.cell_position(target))
 
-            visited.add(current)
-            neighbor_shelves = self.get_surrounding_shelves(current, grid, include_exit=find_exit)
+        result = grid.graph.bfs(start, targets=PendingShelfCells(self, pending_cell_ids, grid, visited_shelves))
+        if result.target < 0:
+            raise Exception("No se encontró un pasillo contiguo a la posición inicial.")
 
-            for shelf in neighbor_shelves:
-                shelf_id = grid.grid[shelf[0]][shelf[1]].aisle_id
-                
-                if shelf in visited_shelves:
-                    continue
-                    
-                shelf_info = grid.grid[shelf[0]][shelf[1]]
-                if shelf_info.is_exit and find_exit:
-                    return TargetShelf(shelf, shelf)
-                if shelf_info.aisle_id in pending_cell_ids:
-                    return TargetShelf(shelf, current)
+        shelf = self.get_pending_shelf(result.target, pending_cell_ids, grid, visited_shelves)
+        path = grid.graph.reconstruct_path(result, result.target) if keep_path else None
+        return TargetShelf(grid.cell_position(shelf), grid.cell_position(result.target), path)
 
-            for neighbor in grid.graph.neighbors(current):
-                if neighbor not in visited:
-                    queue.append(neighbor)
+    def find_closest_shelf(self, start_pos: Tuple[int, int], target_shelves: Container[int], grid: SupermarketGrid) -> TargetShelf:
+        """
+        Closest of the given shelves (flat ids) and the walkable cell next to it where the customer stops.
+        Ties are broken in BFS order from start_pos, and then by DIRECTIONS order around that cell.
+        """
+        start = grid.flat_id(start_pos)
+        candidates = self.cells_next_to({grid.cell_position(shelf) for shelf in target_shelves}, grid)
+        table = grid.distance_table()
+        path = None
+        if table is not None:
+            target = table.nearest(start, np.fromiter(candidates, dtype=np.int64, count=len(candidates)))
+        else:
+            # The search already holds the route to the target: keep it for the leg
+            result = grid.graph.bfs(start, targets=candidates)
+            target = result.target
+            if target >= 0:
+                path = grid.graph.reconstruct_path(result, target)
+        if target < 0:
+            raise Exception("No se puede llegar a ninguna estantería de la lista de compras.")
 
-        raise Exception("No se encontró un pasillo contiguo a la posición inicial.")
+        table = grid.shelf_adjacency()
+        first_slot = target * ShelfAdjacency.CAPACITY
+        for slot in range(first_slot, first_slot + int(table.count[target])):
+            shelf = int(table.shelves[slot])
+            if shelf in target_shelves:
+                return TargetShelf(grid.cell_position(shelf), grid.cell_position(target), path)
+        raise Exception("No se puede llegar a ninguna estantería de la lista de compras.")
+
+    def walk_to_target(self,
+                       start_pos: Tuple[int, int],
+                       target: TargetShelf,
+                       grid: SupermarketGrid,
+                       shelfs_with_impulsive_buys: Set[int],
+                       impulse_draws: Optional[np.ndarray] = None,
+                       impulse_survival: Optional[Dict[int, float]] = None
+                       ) -> GetPathResult:
+        """
+        Walk from start_pos to the cell next to the target shelf, buying on impulse along the way.
+        shelfs_with_impulsive_buys holds the flat ids of the shelves already bought on impulse.
+
+        Every cell of the path gives one try on each adjacent shelf not bought yet, and a shelf is
+        skipped once bought. So a shelf touched k times over the trip is bought with probability
+        1 - (1 - p)^k.
+
+        impulse_draws holds one uniform number per grid cell (by flat id) for the whole trip: the
+        shelf in a cell is bought as soon as its draw falls below its probability of having been
+        bought by then. With a fixed draw per shelf the purchases do not depend on how the touches
+        are split into legs. By default the numbers are drawn for this leg alone.
+
+        impulse_survival, when given, maps the flat id of every shelf touched so far to the
+        probability that it has not been bought yet, whatever the draws; the leg multiplies in its
+        (1 - p)^k factors. Legs of one trip must share it, since the purchases are decided with it.
+        """
+        if impulse_draws is None:
+            impulse_draws = default_rng().random(grid.rows * grid.cols)
+        if impulse_survival is None:
+            impulse_survival = {}
+        # The path and the shelves it touches only depend on the layout, so they are cached under its fingerprint
+        legs = grid.leg_cache().legs
+        start, end = grid.flat_id(start_pos), grid.flat_id(target.adj_walkable_pos)
+        key = (grid.fingerprint, start, end)
+        leg = legs.get(key)
+        if leg is None:
+            # A target found by a graph search carries its route from start_pos; otherwise the layout finds it
+            flat_path = target.path if target.path is not None and target.path[0] == start else grid.get_flat_path(start, end)
+            if flat_path is None:
+                raise Exception("No se puede llegar a la estantería más cercana.")
+            leg = (
+                tuple(grid.cell_position(cell) for cell in flat_path),
+                np.array(flat_path, dtype=np.int64),
+                grid.shelf_adjacency().touches(flat_path)
+            )
+            legs.put(key, leg)
+        path, flat_path, (shelves, impulse_indexes, touches) = leg
+
+        bought: List[int] = []
+        for shelf, impulse_index, shelf_touches in zip(shelves, impulse_indexes, touches):
+            survival = impulse_survival.get(shelf, 1.0) * (1.0 - impulse_index) ** shelf_touches
+            impulse_survival[shelf] = survival
+            if shelf not in shelfs_with_impulsive_buys and impulse_draws[shelf] < 1.0 - survival:
+                bought.append(shelf)
+        shelfs_with_impulsive_buys.update(bought)
+
+        return GetPathResult(
+            target.shelf_pos, 
+            path, 
+            len(bought),
+            flat_path
+            )
 
     def get_path_to_closest_pending(
             self, 
@@ -118,10 +390,15 @@ class CustomerSimulator:
             pending_cell_ids: Set[int],
             grid: SupermarketGrid,
             visited_shelves: Set[Tuple[int, int]],
-            shelfs_with_impulsive_buys: Set[Tuple[int, int]],
-            go_to_exit: bool = False
+            shelfs_with_impulsive_buys: Set[int],
+            go_to_exit: bool = False,
+            impulse_draws: Optional[np.ndarray] = None,
+            impulse_survival: Optional[Dict[int, float]] = None
             ) -> GetPathResult:
         """
+        shelfs_with_impulsive_buys holds the flat ids of the shelves already bought on impulse,
+        and impulse_draws and impulse_survival work as in walk_to_target.
+
         Returns:
             GetPathResult object containing:
                 - closest_shelf_pos: Position of the closest shelf
@@ -138,39 +415,92 @@ class CustomerSimulator:
             find_exit=go_to_exit
             )
         
-        closest_shelf, target_pos = result.shelf_pos, result.adj_walkable_pos
-        
-        impulsive_purchases = 0
-        current_path = grid.get_path(start_pos, target_pos)
-        if current_path is None:
-            raise Exception("No se puede llegar a la estantería más cercana.")
-        
-        for cell in current_path:
-            neighbor_shelves = self.get_surrounding_shelves(cell, grid)
-            for shelf in neighbor_shelves:
-                shelf_id = grid.grid[shelf[0]][shelf[1]].aisle_id
-                shelf_impulse_index = grid.aisle_info[shelf_id].impulse_index
-                if shelf not in shelfs_with_impulsive_buys:
-                    if random.random() < shelf_impulse_index:
-                        impulsive_purchases += 1
-                        shelfs_with_impulsive_buys.add(shelf)
-        
-        return GetPathResult(
-            closest_shelf, 
-            current_path, 
-            impulsive_purchases,
+        return self.walk_to_target(start_pos, result, grid, shelfs_with_impulsive_buys, impulse_draws, impulse_survival)
+
+    def _record_leg(self,
+                    leg: GetPathResult,
+                    path_taken: Optional[List[Tuple[int, int]]],
+                    accumulator: Optional[TripAccumulator]
+                    ) -> int:
+        """Append a leg, but its starting cell, to the trip path or to the accumulator and return its steps"""
+        if accumulator is None:
+            path_taken.extend(leg.path_to_shelf[1:])
+        else:
+            accumulator.add_leg(leg.flat_path)
+        return len(leg.flat_path) - 1
+
+    def _trip_result(self,
+                     grid: SupermarketGrid,
+                     impulsive_purchases: int,
+                     steps: int,
+                     path_taken: Optional[List[Tuple[int, int]]],
+                     shelves_already_bought: Set[int],
+                     impulse_survival: Dict[int, float],
+                     accumulator: Optional[TripAccumulator]
+                     ) -> SimulationResult:
+        """Build the result of a finished trip, streaming its impulse buys into the accumulator if there is one"""
+        expected_impulsive_purchases = sum(1.0 - survival for survival in impulse_survival.values())
+        if accumulator is not None:
+            accumulator.add_impulse(shelves_already_bought, impulse_survival)
+            return SimulationResult(
+                impulsive_purchases=impulsive_purchases,
+                path=None,
+                impulsive_shelfs=None,
+                impulse_probabilities=None,
+                steps=steps,
+                expected_impulsive_purchases=expected_impulsive_purchases
             )
+        return SimulationResult(
+            impulsive_purchases=impulsive_purchases,
+            path=path_taken,
+            impulsive_shelfs=[grid.cell_position(shelf) for shelf in shelves_already_bought],
+            impulse_probabilities=_impulse_probabilities(grid, impulse_survival),
+            steps=steps,
+            expected_impulsive_purchases=expected_impulsive_purchases
+        )
+
+    def simulate(self,
+                 grid: SupermarketGrid,
+                 mode: Optional[str] = None,
+                 rng: Optional[np.random.Generator] = None,
+                 accumulator: Optional[TripAccumulator] = None,
+                 impulse_rng: Optional[np.random.Generator] = None
+                 ) -> SimulationResult:
+        """
+        Simulate the customer's trip from the entrance to the exit.
+
+        Args:
+            grid: Layout to walk through.
+            mode: How products are located, one of PRODUCT_LOCATION_MODES; defaults to cfg.PRODUCT_LOCATION_MODE.
+                "search" visits the nearest shelves of each pending aisle until one holds the product,
+                "direct" walks straight to the shelf holding it, looked up in the layout's product index.
+            rng: Generator for the product ids; by default one seeded from the random module.
+            accumulator: If given, the walked cells and the impulse buys are added to it as the trip goes and the
+                result keeps only the totals (path, impulsive_shelfs and impulse_probabilities are None).
+            impulse_rng: Generator for the impulse purchases, from which one uniform number per grid cell is
+                drawn at the start of the trip (see walk_to_target); by default rng, after the product ids.
+        """
+        mode = mode or cfg.PRODUCT_LOCATION_MODE
+        if mode not in PRODUCT_LOCATION_MODES:
+            raise ValueError(f"Unknown product location mode: {mode} (options: {', '.join(PRODUCT_LOCATION_MODES)})")
+        if rng is None:
+            rng = default_rng()
+        if mode == "direct":
+            return self.simulate_direct(grid, rng, accumulator, impulse_rng)
 
-    def simulate(self, grid: SupermarketGrid) -> SimulationResult:
         impulsive_purchases = 0
-        path_taken: List[Tuple[int, int]] = []  # Track the complete path for analysis
+        steps = 0
+        # Track the complete path for analysis, unless it goes straight into the accumulator
+        path_taken: Optional[List[Tuple[int, int]]] = [] if accumulator is None else None
 
         current_pos: Tuple[int, int] = grid.entrance
-        aisles_with_product_ids = self.get_product_ids_by_aisle(grid)
+        aisles_with_product_ids = self.get_product_ids_by_aisle(grid, rng)
+        impulse_draws = (rng if impulse_rng is None else impulse_rng).random(grid.rows * grid.cols)
 
         # Mientras haya productos en la lista de compras
         visited_aisles: Set[Tuple[int, int]] = set()
-        shelves_already_bought: Set[Tuple[int, int]] = set()
+        shelves_already_bought: Set[int] = set()
+        impulse_survival: Dict[int, float] = {}
         while True:
             remaining_ailes: Set[int] = set(aisles_with_product_ids.keys())
 
@@ -180,14 +510,16 @@ class CustomerSimulator:
                 grid, 
                 visited_aisles, 
                 shelves_already_bought,
-                go_to_exit=(len(remaining_ailes) == 0)
+                go_to_exit=(len(remaining_ailes) == 0),
+                impulse_draws=impulse_draws,
+                impulse_survival=impulse_survival
                 )
             
             closest = result.closest_shelf_pos
             path_to_shelf = result.path_to_shelf
             impulsive_purchases_in_path = result.impulsive_purchases
 
-            path_taken.extend(path_to_shelf[1:])  # Add the path to the shelf
+            steps += self._record_leg(result, path_taken, accumulator)  # Add the path to the shelf
             impulsive_purchases += impulsive_purchases_in_path
 
             if len(remaining_ailes) == 0:
@@ -197,14 +529,15 @@ class CustomerSimulator:
                 raise Exception("No se puede llegar a ningún pasillo de la lista de compras.")
             
             current_pos = path_to_shelf[-1]  # Actualizar la posición actual al último paso del camino
-            closest_info = grid.grid[closest[0]][closest[1]]
+            closest_aisle_id = int(grid.aisle_ids[closest])
+            range_start, range_end = grid.product_ranges[closest].tolist()
             is_a_product_found = False
-            for product_id in aisles_with_product_ids[closest_info.aisle_id]:
-                if product_id >= closest_info.product_id_range[0] and product_id < closest_info.product_id_range[1]:
+            for product_id in aisles_with_product_ids[closest_aisle_id]:
+                if product_id >= range_start and product_id < range_end:
                     # Se encontró el producto, se elimina de la lista de compras
-                    aisles_with_product_ids[closest_info.aisle_id].remove(product_id)
-                    if len(aisles_with_product_ids[closest_info.aisle_id]) == 0:
-                        del aisles_with_product_ids[closest_info.aisle_id]
+                    aisles_with_product_ids[closest_aisle_id].remove(product_id)
+                    if len(aisles_with_product_ids[closest_aisle_id]) == 0:
+                        del aisles_with_product_ids[closest_aisle_id]
                     is_a_product_found = True
                     break
 
@@ -215,8 +548,56 @@ class CustomerSimulator:
                 # No se encontró un producto, se agrega el pasillo a la lista de visitados
                 visited_aisles.add(closest)
     
-        return SimulationResult(
-            impulsive_purchases=impulsive_purchases,
-            path=path_taken,
-            impulsive_shelfs=list(shelves_already_bought)
-        )
\ No newline at end of file
+        return self._trip_result(grid, impulsive_purchases, steps, path_taken, shelves_already_bought, impulse_survival, accumulator)
+
+    def simulate_direct(self,
+                        grid: SupermarketGrid,
+                        rng: Optional[np.random.Generator] = None,
+                        accumulator: Optional[TripAccumulator] = None,
+                        impulse_rng: Optional[np.random.Generator] = None
+                        ) -> SimulationResult:
+        """
+        Simulate the trip walking straight to the shelf that holds each product.
+        The product ids and the impulse draws are drawn as in simulate, and each leg goes to the closest
+        shelf still holding a pending product, so the customer never visits a shelf of the right aisle
+        that lacks it. accumulator works as in simulate.
+        """
+        impulsive_purchases = 0
+        steps = 0
+        path_taken: Optional[List[Tuple[int, int]]] = [] if accumulator is None else None
+
+        if rng is None:
+            rng = default_rng()
+        aisles_with_product_ids = self.get_product_ids_by_aisle(grid, rng)
+        impulse_draws = (rng if impulse_rng is None else impulse_rng).random(grid.rows * grid.cols)
+        aisle_ids = [aisle_id for aisle_id, product_ids in aisles_with_product_ids.items() for _ in product_ids]
+        product_ids = [product_id for product_ids in aisles_with_product_ids.values() for product_id in product_ids]
+        shelves = grid.product_index().locate(np.array(aisle_ids, dtype=np.int64), np.array(product_ids, dtype=np.int64))
+
+        # Products still to buy on each shelf (flat id)
+        pending_products: Dict[int, int] = {}
+        for shelf in shelves.tolist():
+            if shelf >= 0:
+                pending_products[shelf] = pending_products.get(shelf, 0) + 1
+
+        current_pos: Tuple[int, int] = grid.entrance
+        shelves_already_bought: Set[int] = set()
+        impulse_survival: Dict[int, float] = {}
+        while pending_products:
+            target = self.find_closest_shelf(current_pos, pending_products, grid)
+            result = self.walk_to_target(current_pos, target, grid, shelves_already_bought, impulse_draws, impulse_survival)
+            steps += self._record_leg(result, path_taken, accumulator)
+            impulsive_purchases += result.impulsive_purchases
+            current_pos = result.path_to_shelf[-1]
+
+            shelf = grid.flat_id(target.shelf_pos)
+            pending_products[shelf] -= 1
+            if pending_products[shelf] == 0:
+                del pending_products[shelf]
+
+        result = self.get_path_to_closest_pending(current_pos, set(), grid, set(), shelves_already_bought, go_to_exit=True,
+                                                  impulse_draws=impulse_draws, impulse_survival=impulse_survival)
+        steps += self._record_leg(result, path_taken, accumulator)
+        impulsive_purchases += result.impulsive_purchases
+
+        return self._trip_result(grid, impulsive_purchases, steps, path_taken, shelves_already_bought, impulse_survival, accumulator)
@@ -0,0 +1,42 @@
+import numpy as np
+
+# Hash de Zobrist sobre el plano de ids de pasillo: la huella de un layout es el
+# XOR de una clave pseudoaleatoria de 64 bits por cada par (celda, id de pasillo).
+# Las claves salen de splitmix64 en vez de una tabla, así no dependen del tamaño
+# del grid ni del número de pasillos y son las mismas en todos los procesos.
+
+_MASK = (1 << 64) - 1
+_VALUE_BITS = 20  # Espacio para ids de pasillo (desplazados por _VALUE_OFFSET) dentro de la clave
+_VALUE_OFFSET = 8  # Entrada y salida usan ids negativos
+
+
+def _splitmix64(x: int) -> int:
+    z = (x + 0x9E3779B97F4A7C15) & _MASK
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASK
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASK
+    return z ^ (z >> 31)
+
+
+def cell_key(cell: int, aisle_id: int) -> int:
+    """Clave de Zobrist de una celda (id plano) con el id de pasillo indicado"""
+    return _splitmix64((cell << _VALUE_BITS) | (aisle_id + _VALUE_OFFSET))
+
+
+def layout_fingerprint(aisle_ids: np.ndarray) -> int:
+    """Huella completa de un plano de ids de pasillo, XOR de las claves de todas sus celdas"""
+    cells = np.arange(aisle_ids.size, dtype=np.uint64)
+    z = (cells << np.uint64(_VALUE_BITS)) | (aisle_ids.ravel().astype(np.int64) + _VALUE_OFFSET).astype(np.uint64)
+    # La aritmética de uint64 de numpy es módulo 2**64, igual que _splitmix64
+    z = z + np.uint64(0x9E3779B97F4A7C15)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    z = z ^ (z >> np.uint64(31))
+    return int(np.bitwise_xor.reduce(z)) if len(z) else 0
+
+
+def swap_delta(cell1: int, aisle_id1: int, cell2: int, aisle_id2: int) -> int:
+    """Valor a combinar (XOR) con la huella al intercambiar los ids de pasillo de dos celdas"""
+    if aisle_id1 == aisle_id2:
+        return 0
+    return (cell_key(cell1, aisle_id1) ^ cell_key(cell1, aisle_id2)
+            ^ cell_key(cell2, aisle_id2) ^ cell_key(cell2, aisle_id1))
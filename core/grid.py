@@ -1,16 +1,17 @@
 from dataclasses import dataclass
 import json
-import networkx as nx
-from typing import List, Dict, Tuple, Optional, Any, TypedDict
+import numpy as np
+from typing import Iterator, List, Dict, Mapping, Set, Tuple, Optional, Any, TypedDict, Union
 import config as cfg
-
-# Define the structure of each aisle info entry
-@dataclass
-class AisleInfo():
-    impulse_index: float
-    name: str
-    product_count: int
-    cells: List[Tuple[int, int]]
+from core.aisles import AisleInfo, AisleRegistry, load_aisle_registry
+from core.bitboard import Bitboard, check_backend, reachable_shelves
+from core.corridor_graph import CorridorGraph
+from core.fingerprint import cell_key, layout_fingerprint, swap_delta
+from core.leg_cache import LegCache
+from core.layout_format import LayoutSnapshot, is_layout_snapshot, read_layout_snapshot, write_layout_snapshot
+from core.pathfinding import DistanceFields, DistanceTable, GridGraph, PathSearchStats
+from core.product_index import ProductIndex
+from core.shelf_adjacency import ShelfAdjacency
 
 @dataclass
 class CellInfo():
@@ -28,20 +29,261 @@ class GridInput():
     entrance: Tuple[int, int]
     exit: Tuple[int, int]
 
+class CellView:
+    """
+    Vista de compatibilidad sobre una celda del grid.
+    Lee y escribe directamente en los arreglos de SupermarketGrid, por lo que
+    refleja cualquier cambio posterior en esa posición.
+    """
+    __slots__ = ('_grid', '_row', '_col')
+
+    def __init__(self, grid: 'SupermarketGrid', row: int, col: int) -> None:
+        self._grid = grid
+        self._row = row
+        self._col = col
+
+    @property
+    def is_walkable(self) -> bool:
+        return bool(self._grid.walkable[self._row, self._col])
+
+    @is_walkable.setter
+    def is_walkable(self, value: bool) -> None:
+        self._grid._set_walkable((self._row, self._col), value)
+
+    @property
+    def aisle_id(self) -> int:
+        return int(self._grid.aisle_ids[self._row, self._col])
+
+    @aisle_id.setter
+    def aisle_id(self, value: int) -> None:
+        self._grid._set_aisle_id(self._row, self._col, value)
+
+    @property
+    def product_id_range(self) -> Tuple[int, int]:
+        start, end = self._grid.product_ranges[self._row, self._col]
+        return (int(start), int(end))
+
+    @product_id_range.setter
+    def product_id_range(self, value: Tuple[int, int]) -> None:
+        self._grid._set_product_range(self._row, self._col, value)
+
+    @property
+    def is_exit(self) -> bool:
+        return bool(self._grid.exit_mask[self._row, self._col])
+
+    @is_exit.setter
+    def is_exit(self, value: bool) -> None:
+        self._grid._writable('exit_mask')[self._row, self._col] = value
+
+    @property
+    def is_entrance(self) -> bool:
+        return bool(self._grid.entrance_mask[self._row, self._col])
+
+    @is_entrance.setter
+    def is_entrance(self, value: bool) -> None:
+        self._grid._writable('entrance_mask')[self._row, self._col] = value
+
+    def to_cell_info(self) -> CellInfo:
+        """Copia los valores actuales de la celda en un CellInfo independiente"""
+        return CellInfo(
+            is_walkable=self.is_walkable,
+            aisle_id=self.aisle_id,
+            product_id_range=self.product_id_range,
+            is_exit=self.is_exit,
+            is_entrance=self.is_entrance
+        )
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (CellView, CellInfo)):
+            other_info = other.to_cell_info() if isinstance(other, CellView) else other
+            return self.to_cell_info() == other_info
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return repr(self.to_cell_info())
+
+class RowView:
+    """Vista de compatibilidad sobre una fila del grid (grid.grid[r])"""
+    __slots__ = ('_grid', '_row')
+
+    def __init__(self, grid: 'SupermarketGrid', row: int) -> None:
+        self._grid = grid
+        self._row = row
+
+    def __len__(self) -> int:
+        return self._grid.cols
+
+    def __getitem__(self, col: int) -> CellView:
+        if col < 0:
+            col += self._grid.cols
+        if not 0 <= col < self._grid.cols:
+            raise IndexError("Columna fuera del grid")
+        return CellView(self._grid, self._row, col)
+
+    def __setitem__(self, col: int, cell: Union[CellInfo, CellView]) -> None:
+        # Copiar los valores antes de escribir, la celda origen puede ser una vista de este mismo grid
+        info = cell.to_cell_info() if isinstance(cell, CellView) else cell
+        self._grid._write_cell(self._row, col, info)
+
+    def __iter__(self) -> Iterator[CellView]:
+        for col in range(self._grid.cols):
+            yield CellView(self._grid, self._row, col)
+
+class GridView:
+    """Vista de compatibilidad List[List[CellInfo]] sobre los arreglos del grid"""
+    __slots__ = ('_grid',)
+
+    def __init__(self, grid: 'SupermarketGrid') -> None:
+        self._grid = grid
+
+    def __len__(self) -> int:
+        return self._grid.rows
+
+    def __getitem__(self, row: int) -> RowView:
+        if row < 0:
+            row += self._grid.rows
+        if not 0 <= row < self._grid.rows:
+            raise IndexError("Fila fuera del grid")
+        return RowView(self._grid, row)
+
+    def __iter__(self) -> Iterator[RowView]:
+        for row in range(self._grid.rows):
+            yield RowView(self._grid, row)
+
+class AisleInfoView(Mapping[int, AisleInfo]):
+    """
+    Vista de compatibilidad grid.aisle_info: combina el registro compartido de
+    pasillos con las celdas que cada pasillo ocupa en este layout.
+    """
+    __slots__ = ('_grid',)
+
+    def __init__(self, grid: 'SupermarketGrid') -> None:
+        self._grid = grid
+
+    def __getitem__(self, aisle_id: int) -> AisleInfo:
+        if aisle_id not in self._grid.aisles:
+            raise KeyError(aisle_id)
+        cells = self._grid.aisle_cells.get(int(aisle_id), [])
+        return self._grid.aisles.info(aisle_id, cells)
+
+    def __contains__(self, aisle_id: object) -> bool:
+        return aisle_id in self._grid.aisles
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._grid.aisles)
+
+    def __len__(self) -> int:
+        return len(self._grid.aisles)
+
 class SupermarketGrid:
+    # Arreglos con el estado del layout; se comparten entre copias hasta que se escriben
+    PLANES: Tuple[str, ...] = ('aisle_ids', 'walkable', 'entrance_mask', 'exit_mask', 'product_ranges')
+
     def __init__(self, rows: int, cols: int) -> None:
         self.rows: int = rows
         self.cols: int = cols
-        self.grid: List[List[CellInfo]] = [
-                [
-                    CellInfo(is_walkable=True, aisle_id=0, product_id_range=(0, 0)) 
-                    for _ in range(cols)
-                ] for _ in range(rows)
-            ]
-        self.aisle_info: Dict[int, AisleInfo] = {}
+        # Estado del layout en arreglos empaquetados (fila, columna)
+        self.aisle_ids: np.ndarray = np.zeros((rows, cols), dtype=np.int32)
+        self.walkable: np.ndarray = np.ones((rows, cols), dtype=bool)
+        self.entrance_mask: np.ndarray = np.zeros((rows, cols), dtype=bool)
+        self.exit_mask: np.ndarray = np.zeros((rows, cols), dtype=bool)
+        self.product_ranges: np.ndarray = np.zeros((rows, cols, 2), dtype=np.int32)  # (inicio, fin)
+        self.aisles: AisleRegistry = AisleRegistry({})  # Compartido entre todos los grids
+        # Celdas de cada pasillo en este layout; la posición i de la lista es la que tiene el rango de productos i
+        self.aisle_cells: Dict[int, List[Tuple[int, int]]] = {}
+        self._owns_aisle_cells: bool = True  # False si el diccionario se comparte con una copia
+        self._owned_aisle_lists: Set[int] = set()  # Listas ya copiadas tras dejar de compartir el diccionario
+        self._aisle_size_buckets: Optional[Dict[int, List[int]]] = None
         self.entrance: Tuple[int, int] = (0, 0)
         self.exit: Tuple[int, int] = (0, 0)
-        self.graph: nx.Graph
+        self.graph: GridGraph
+        self._owns_graph: bool = True  # False si el grafo se comparte con una copia
+        self._distance_table: Optional[DistanceTable] = None
+        self._shelf_adjacency: Optional[ShelfAdjacency] = None
+        self._owns_shelf_adjacency: bool = True  # False si la tabla se comparte con una copia
+        self._aisle_fields: Optional[DistanceFields] = None
+        self._corridor_graph: Optional[CorridorGraph] = None
+        self._product_index: Optional[ProductIndex] = None
+        self._owns_product_index: bool = True  # False si el índice se comparte con una copia
+        self.path_strategy: str = cfg.PATH_STRATEGY  # Búsqueda punto a punto cuando no hay tabla de distancias
+        self.path_stats: PathSearchStats = PathSearchStats()  # Compartido con las copias del layout
+        self._leg_cache: LegCache = LegCache(cfg.LEG_CACHE_PATHS, cfg.LEG_CACHE_TARGETS)  # Compartida con las copias
+        self.validity: Optional[bool] = None  # Resultado de validate_super_layout, None si no se conoce
+        self._fingerprint: Optional[int] = None
+        self._owned_planes: Set[str] = set(self.PLANES)  # Arreglos propios, el resto se comparten con otro layout
+        self._frozen: bool = False
+
+    @property
+    def aisle_info(self) -> AisleInfoView:
+        """Vista de compatibilidad con la información y celdas de cada pasillo"""
+        return AisleInfoView(self)
+
+    @property
+    def grid(self) -> GridView:
+        """Vista de compatibilidad para acceder a las celdas como grid.grid[r][c]"""
+        return GridView(self)
+
+    @property
+    def is_frozen(self) -> bool:
+        return self._frozen
+
+    def _check_not_frozen(self) -> None:
+        """Falla si el layout está congelado; se llama antes de tocar cualquier estado derivado"""
+        if self._frozen:
+            raise ValueError("El layout está congelado, use thaw() para obtener una copia modificable")
+
+    def _writable(self, name: str) -> np.ndarray:
+        """
+        Devuelve el arreglo indicado listo para escribir. Si se comparte con otro
+        layout se copia primero, así cada layout solo paga por lo que modifica.
+        """
+        self._check_not_frozen()
+        if name not in self._owned_planes:
+            setattr(self, name, getattr(self, name).copy())
+            self._owned_planes.add(name)
+        return getattr(self, name)
+
+    def _write_cell(self, row: int, col: int, info: CellInfo) -> None:
+        self._set_walkable((row, col), info.is_walkable)
+        self._set_aisle_id(row, col, info.aisle_id)
+        self._set_product_range(row, col, info.product_id_range)
+        self._writable('exit_mask')[row, col] = info.is_exit
+        self._writable('entrance_mask')[row, col] = info.is_entrance
+
+    def _set_product_range(self, row: int, col: int, value: Tuple[int, int]) -> None:
+        self._writable('product_ranges')[row, col] = value
+        self._product_index = None
+
+    def _set_aisle_id(self, row: int, col: int, aisle_id: int) -> None:
+        self._check_not_frozen()
+        old_aisle_id = int(self.aisle_ids[row, col])
+        self._writable('aisle_ids')[row, col] = aisle_id
+        if old_aisle_id != aisle_id:
+            if old_aisle_id > 0:
+                cells = self._writable_aisle_cells(old_aisle_id)
+                cells.remove((row, col))
+                if not cells:
+                    del self.aisle_cells[old_aisle_id]
+            if aisle_id > 0:
+                self._writable_aisle_cells(int(aisle_id)).append((row, col))
+            self._aisle_size_buckets = None
+            self._product_index = None
+        if self._fingerprint is not None:
+            cell = self.flat_id((row, col))
+            self._fingerprint ^= cell_key(cell, old_aisle_id) ^ cell_key(cell, int(aisle_id))
+        self.validity = None
+        self._on_shelves_changed([(row, col)])
+
+    @property
+    def fingerprint(self) -> int:
+        """
+        Huella de 64 bits (hash de Zobrist) del plano de ids de pasillo. Es
+        estable entre procesos, se calcula una vez y los intercambios de celdas
+        la actualizan en O(1).
+        """
+        if self._fingerprint is None:
+            self._fingerprint = layout_fingerprint(self.aisle_ids)
+        return self._fingerprint
 
     @classmethod
     def read_aisle_info(cls, aisle_info_filename: str) -> Dict[int, AisleInfo]:
@@ -54,16 +296,7 @@ class SupermarketGrid:
         Returns:
             Dict[int, AisleInfo]: Un diccionario con la información de los pasillos.
         """
-        with open(aisle_info_filename, 'r') as f:
-            aisle_info_from_file: Dict[str, Dict[str, Any]] = json.load(f)
-            aisle_info: Dict[int, AisleInfo] = {}
-
-            for aisle_id_str, info in aisle_info_from_file.items():
-                aisle_id = int(aisle_id_str)
-                aisle_info[int(aisle_id)] = AisleInfo(impulse_index=info['impulse_index'],
-                    name=info['aisle_name'], product_count=info['product_count'], cells=[])
-                
-            return aisle_info
+        return load_aisle_registry(aisle_info_filename).to_dict()
 
     @classmethod
     def from_dict(cls, layout_data: GridInput, aisle_info_file: str = cfg.AISLE_INFO_FILE) -> 'SupermarketGrid':
@@ -80,61 +313,190 @@ class SupermarketGrid:
         # Crear la instancia del grid
         grid: 'SupermarketGrid' = cls(layout_data.rows, layout_data.cols)
         
-        # Cargar información de pasillos desde el archivo de impulso
-        aisle_info = cls.read_aisle_info(aisle_info_file)
-        grid.aisle_info = aisle_info
+        # Información de pasillos compartida, se lee del archivo solo una vez por proceso
+        grid.aisles = load_aisle_registry(aisle_info_file)
         
         # Procesar el grid
-        for row in range(grid.rows):
-            for col in range(grid.cols):
-                aisle_id: int = layout_data.grid[row][col]
-                
-                grid.grid[row][col].is_walkable = (aisle_id <= 0)  # True si es un pasillo o entrada/salida
-                grid.grid[row][col].aisle_id = aisle_id
-
-                # Procesar basado en el tipo de celda
-                if aisle_id > 0:  # Es un pasillo
-                    # Mapear categoría a celdas
-                    grid.aisle_info[aisle_id].cells.append((row, col))
+        aisle_ids = np.asarray(layout_data.grid, dtype=np.int32).reshape(grid.rows, grid.cols)
+        grid.aisle_ids[:] = aisle_ids
+        grid.walkable[:] = aisle_ids <= 0  # True si es un pasillo o entrada/salida
+
+        # Mapear categoría a celdas, en orden fila por fila
+        grid._index_aisle_cells()
         
         # Utilizar los datos de entrada/salida explícitos si están disponibles
-        grid.entrance = layout_data.entrance
-        grid.exit = layout_data.exit
-        grid.grid[grid.exit[0]][grid.exit[1]].is_exit = True
-        grid.grid[grid.entrance[0]][grid.entrance[1]].is_entrance = True
+        grid._set_entrance_exit(layout_data.entrance, layout_data.exit)
         
         # Verificar conectividad
         # if not grid.is_connected():
         #     raise ValueError("El layout no tiene un camino entre entrada y salida")
         
         # Llenar rangos de ids de productos
-        for aisle_id, info in grid.aisle_info.items():
+        for aisle_id, cells in grid.aisle_cells.items():
+            product_count = int(grid.aisles.product_count[aisle_id])
 
-            if (len(info.cells) == 0 or info.product_count == 0):
+            if (len(cells) == 0 or product_count == 0):
                 continue
 
-            step_size = info.product_count // len(info.cells) if info.product_count > 0 else 0
-            for i, coord in enumerate(info.cells):
-                row, col = coord
-                cell_info = grid.grid[row][col]
-                # Asignar el rango de ids de productos a la celda
-                start = i * step_size
-                end = start + step_size if i < len(info.cells) - 1 else info.product_count+1
-                cell_info.product_id_range = (start, end)
+            step_size = product_count // len(cells) if product_count > 0 else 0
+            # Asignar el rango de ids de productos a cada celda del pasillo
+            starts = np.arange(len(cells), dtype=np.int32) * step_size
+            ends = starts + step_size
+            ends[-1] = product_count + 1
+            rows, cols = zip(*cells)
+            grid.product_ranges[rows, cols, 0] = starts
+            grid.product_ranges[rows, cols, 1] = ends
     
         cls._build_graph(grid)
+        # Huella inicial; a partir de aquí la mantienen los intercambios de celdas
+        grid._fingerprint = layout_fingerprint(grid.aisle_ids)
 
         return grid
 
+    def _index_aisle_cells(self) -> None:
+        """Agrupa las celdas de estantería por pasillo, en orden fila por fila"""
+        self.aisle_cells = {}
+        self._owns_aisle_cells = True
+        self._aisle_size_buckets = None
+        shelf_mask = self.aisle_ids > 0
+        shelf_positions = np.argwhere(shelf_mask).tolist()
+        shelf_ids = self.aisle_ids[shelf_mask].tolist()
+        for (row, col), aisle_id in zip(shelf_positions, shelf_ids):
+            self.aisle_cells.setdefault(aisle_id, []).append((row, col))
+        self._owned_aisle_lists = set(self.aisle_cells)
+
+    def _writable_aisle_cells(self, aisle_id: int) -> List[Tuple[int, int]]:
+        """Lista de celdas de un pasillo lista para modificar; si se comparte con otro layout se copia antes"""
+        if not self._owns_aisle_cells:
+            self.aisle_cells = dict(self.aisle_cells)
+            self._owns_aisle_cells = True
+            self._owned_aisle_lists = set()
+        if aisle_id not in self._owned_aisle_lists:
+            self.aisle_cells[aisle_id] = list(self.aisle_cells.get(aisle_id, []))
+            self._owned_aisle_lists.add(aisle_id)
+        return self.aisle_cells[aisle_id]
+
+    def _swap_indexed_cells(self, pos1: Tuple[int, int], aisle_id1: int, pos2: Tuple[int, int], aisle_id2: int) -> None:
+        """Mueve las dos celdas en el índice de pasillos conservando la posición de cada una en su lista"""
+        if aisle_id1 == aisle_id2:
+            if aisle_id1 > 0:
+                cells = self._writable_aisle_cells(aisle_id1)
+                i, j = cells.index(pos1), cells.index(pos2)
+                cells[i], cells[j] = pos2, pos1
+            return
+        if aisle_id1 > 0:
+            cells = self._writable_aisle_cells(aisle_id1)
+            cells[cells.index(pos1)] = pos2
+        if aisle_id2 > 0:
+            cells = self._writable_aisle_cells(aisle_id2)
+            cells[cells.index(pos2)] = pos1
+
+    def aisle_size_buckets(self) -> Dict[int, List[int]]:
+        """
+        Pasillos agrupados por número de celdas: tamaño -> ids de pasillo, ambos
+        en orden creciente. Los intercambios no cambian el tamaño de los
+        pasillos, así que solo se recalcula si se reasigna una celda a otro pasillo.
+        """
+        if self._aisle_size_buckets is None:
+            buckets: Dict[int, List[int]] = {}
+            for aisle_id in sorted(self.aisle_cells):
+                buckets.setdefault(len(self.aisle_cells[aisle_id]), []).append(aisle_id)
+            self._aisle_size_buckets = dict(sorted(buckets.items()))
+        return self._aisle_size_buckets
+
+    def _set_entrance_exit(self, entrance: Tuple[int, int], exit: Tuple[int, int]) -> None:
+        self.entrance = entrance
+        self.exit = exit
+        self.exit_mask[self.exit] = True
+        self.entrance_mask[self.entrance] = True
+
+    @classmethod
+    def from_snapshot(cls, snapshot_filename: str, aisle_info_filename: str = cfg.AISLE_INFO_FILE) -> 'SupermarketGrid':
+        """
+        Abre un layout guardado con save_snapshot. Los arreglos del archivo se
+        mapean en memoria y se comparten en modo copy-on-write: solo se copian
+        si el layout se modifica. Si el snapshot incluye el grafo o la tabla de
+        distancias, se usan directamente en vez de recalcularlos.
+        
+        Args:
+            snapshot_filename: Ruta al snapshot binario del layout
+            aisle_info_filename: Ruta al archivo con la info de los pasillos
+        
+        Returns:
+            SupermarketGrid: La instancia creada.
+        """
+        snapshot = read_layout_snapshot(snapshot_filename)
+        arrays = snapshot.arrays
+
+        grid: 'SupermarketGrid' = cls(snapshot.rows, snapshot.cols)
+        grid.aisles = load_aisle_registry(aisle_info_filename)
+        grid.aisle_ids = arrays['aisle_ids']
+        grid.product_ranges = arrays['product_ranges']
+        grid._owned_planes -= {'aisle_ids', 'product_ranges'}
+        grid.walkable[:] = grid.aisle_ids <= 0
+        grid._index_aisle_cells()
+        grid._set_entrance_exit(snapshot.entrance, snapshot.exit)
+        grid._fingerprint = layout_fingerprint(grid.aisle_ids)
+
+        if 'graph_neighbors' in arrays:
+            grid.graph = GridGraph.from_arrays(grid.walkable, arrays['graph_neighbors'])
+            grid._owns_graph = False  # Las filas de vecinos son de solo lectura
+        else:
+            grid._build_graph()
+
+        if 'shelf_neighbors' in arrays:
+            grid._shelf_adjacency = ShelfAdjacency.from_arrays(grid.aisle_ids, grid.aisles.impulse_index, arrays['shelf_neighbors'])
+            grid._owns_shelf_adjacency = False  # Los ids de estanterías son de solo lectura
+
+        if 'distance' in arrays:
+            grid._distance_table = DistanceTable.from_arrays(
+                grid.rows, grid.cols, arrays['distance_cells'], arrays['distance'], arrays['next_hop']
+            )
+
+        return grid
+
+    def save_snapshot(self, snapshot_filename: str, include_tables: bool = True) -> None:
+        """
+        Guarda el layout en el formato binario de core.layout_format.
+        
+        Args:
+            snapshot_filename: Ruta del archivo a escribir
+            include_tables: Si es True, guarda también el grafo, las estanterías vecinas y la tabla de distancias
+        """
+        arrays: Dict[str, np.ndarray] = {
+            'aisle_ids': self.aisle_ids,
+            'product_ranges': self.product_ranges,
+        }
+        if include_tables:
+            arrays['graph_neighbors'] = self.graph.neighbors.reshape(-1, GridGraph.DEGREE_CAPACITY)
+            arrays['shelf_neighbors'] = self.shelf_adjacency().shelves.reshape(-1, ShelfAdjacency.CAPACITY)
+            table = self.distance_table()
+            if table is not None:
+                arrays['distance_cells'] = table.cells
+                arrays['distance'] = table.dist
+                arrays['next_hop'] = table.next_hop
+
+        write_layout_snapshot(snapshot_filename, LayoutSnapshot(
+            rows=self.rows,
+            cols=self.cols,
+            entrance=self.entrance,
+            exit=self.exit,
+            arrays=arrays
+        ))
+
     @classmethod
     def from_file(cls, layout_filename: str, aisle_info_filename: str) -> 'SupermarketGrid':
         """
         Carga el layout desde un archivo JSON y la información de impulso desde otro archivo JSON.
+        Si el layout es un snapshot binario se abre con from_snapshot.
         
         Args:
             layout_filename: Ruta al archivo con el layout del supermercado
             aisle_info_filename: Ruta al archivo con la info de los pasillos
         """
+        if is_layout_snapshot(layout_filename):
+            return cls.from_snapshot(layout_filename, aisle_info_filename)
+
         # Cargar el archivo de layout
         with open(layout_filename, 'r') as f:
             layout_data: Dict[str, Any] = json.load(f)
@@ -149,64 +511,374 @@ class SupermarketGrid:
        
         return cls.from_dict(grid_info, aisle_info_filename)
 
-    def is_connected(self) -> bool:
-        """Verifica que exista un camino entre entrada y salida"""
+    def is_connected(self, backend: Optional[str] = None) -> bool:
+        """
+        Verifica que exista un camino entre entrada y salida. El motor de
+        búsqueda es cfg.SEARCH_BACKEND salvo que se indique otro.
+        """
         if not self.entrance or not self.exit:
             return False
-        return nx.has_path(self.graph, self.entrance, self.exit)
+        start, end = self.flat_id(self.entrance), self.flat_id(self.exit)
+        if check_backend(backend or cfg.SEARCH_BACKEND) == "bitboard":
+            return Bitboard(self.walkable).has_path(start, end)
+        return self.graph.has_path(start, end)
 
-    def _build_graph(self) -> nx.Graph:
+    def reachable_shelves(self, backend: Optional[str] = None) -> np.ndarray:
+        """
+        Máscara (rows, cols) de las estanterías a las que se puede llegar desde
+        la entrada, es decir, las que tocan alguna celda transitable alcanzable.
         """
-        Construye un grafo de NetworkX a partir del grid.
+        start = self.flat_id(self.entrance)
+        if check_backend(backend or cfg.SEARCH_BACKEND) == "bitboard":
+            return reachable_shelves(self.aisle_ids, self.walkable, start)
+        reached = np.array(self.graph.bfs(start).parents) >= 0
+        shelves = self.shelf_adjacency().shelves.reshape(-1, ShelfAdjacency.CAPACITY)[reached]
+        mask = np.zeros(self.rows * self.cols, dtype=bool)
+        mask[shelves[shelves >= 0]] = True
+        return mask.reshape(self.rows, self.cols)
+
+    def flat_id(self, pos: Tuple[int, int]) -> int:
+        """Id plano (fila * cols + columna) de una posición; -1 si está fuera del grid"""
+        row, col = pos
+        if 0 <= row < self.rows and 0 <= col < self.cols:
+            return int(row) * self.cols + int(col)
+        return -1
+
+    def cell_position(self, cell: int) -> Tuple[int, int]:
+        """Posición (fila, columna) de un id plano"""
+        return divmod(cell, self.cols)
+
+    def _build_graph(self) -> GridGraph:
+        """
+        Construye la adyacencia de celdas transitables a partir del grid.
         Los nodos son las celdas transitables (valor 0, entrada -1, o salida -2).
         Las aristas conectan celdas transitables adyacentes.
         """
-        G: nx.Graph = nx.Graph()
-        
-        # Agrega todos los nodos transitables (corredores, entrada, salida)
-        for x in range(self.rows):
-            for y in range(self.cols):
-                cell = self.grid[x][y]
-                # Considera transitables las celdas con valor 0, -1 (entrada) o -2 (salida)
-                if cell.is_walkable:
-                    G.add_node((x, y))
-        
-        # Conecta los nodos adyacentes transitables
-        for x in range(self.rows):
-            for y in range(self.cols):
-                cell = self.grid[x][y]
-                if cell.is_walkable:  # Si es transitable
-                    # Revisar vecinos en las 4 direcciones
-                    for dx, dy in [(-1,0), (1,0), (0,-1), (0,1)]:
-                        nx_pos, ny_pos = x + dx, y + dy
-                        # Verificar que está dentro de los límites del grid
-                        if 0 <= nx_pos < self.rows and 0 <= ny_pos < self.cols:
-                            neighbor_cell = self.grid[nx_pos][ny_pos]
-                            # Conectar si el vecino también es transitable
-                            if neighbor_cell.is_walkable:
-                                G.add_edge((x, y), (nx_pos, ny_pos))
-        
-        self.graph = G  # Guardar el grafo en la instancia
-        return G
+        self.graph = GridGraph(self.walkable)  # Guardar el grafo en la instancia
+        self._owns_graph = True
+        return self.graph
 
-    def get_path(self, start: Tuple[int, int], end: Tuple[int, int]) -> Optional[List[Tuple[int, int]]]:
-        """Calcula la ruta óptima con NetworkX"""
-        G = self.graph
+    def to_networkx(self) -> Any:
+        """Exporta el grafo de celdas transitables a networkx (dependencia opcional)"""
+        return self.graph.to_networkx()
+
+    def _set_walkable(self, pos: Tuple[int, int], value: bool) -> None:
+        if self.walkable[pos] == value:
+            return
+        self._writable('walkable')[pos] = value
+        self._on_walkability_changed([pos])
+        self._on_shelves_changed([pos])
+
+    def _on_walkability_changed(self, positions: List[Tuple[int, int]]) -> None:
+        """
+        Actualiza localmente el grafo para las celdas cuya transitabilidad cambió
+        y descarta la tabla de distancias.
+        """
+        self._distance_table = None
+        self._corridor_graph = None
+        # Las rutas de la caché de tramos no llevan huella porque solo dependen de la transitabilidad: este
+        # layout deja de compartir la caché con sus copias y empieza una vacía, sin tocar la de las demás
+        self._leg_cache = LegCache(cfg.LEG_CACHE_PATHS, cfg.LEG_CACHE_TARGETS)
+        if not hasattr(self, 'graph'):
+            return
+        if not self._owns_graph:
+            # El grafo se comparte con otro layout: la copia solo guarda las filas que cambian aquí
+            self.graph = self.graph.copy()
+            self._owns_graph = True
+        for pos in positions:
+            self.graph.set_walkable(self.flat_id(pos), bool(self.walkable[pos]))
+
+    def _on_shelves_changed(self, positions: List[Tuple[int, int]]) -> None:
+        """
+        Actualiza la tabla de estanterías vecinas alrededor de las celdas
+        modificadas y descarta los campos de distancia por pasillo.
+        """
+        self._aisle_fields = None
+        if self._shelf_adjacency is None:
+            return
+        if not self._owns_shelf_adjacency:
+            # La tabla se comparte con otro layout, se copia antes de modificarla
+            self._shelf_adjacency = self._shelf_adjacency.copy()
+            self._owns_shelf_adjacency = True
+        self._shelf_adjacency.update(
+            self.aisle_ids, self.walkable, self.aisles.impulse_index, [self.flat_id(pos) for pos in positions]
+        )
+
+    def shelf_adjacency(self) -> ShelfAdjacency:
+        """
+        Tabla de estanterías vecinas de cada celda transitable, con su pasillo y
+        su índice de impulsividad. Se construye la primera vez que se necesita y
+        los intercambios de celdas la actualizan localmente.
+        """
+        if self._shelf_adjacency is None:
+            self._shelf_adjacency = ShelfAdjacency(self.aisle_ids, self.walkable, self.aisles.impulse_index)
+            self._owns_shelf_adjacency = True
+        return self._shelf_adjacency
+
+    def aisle_distance_fields(self) -> Optional[DistanceFields]:
+        """
+        Campos de distancia por pasillo: la fila de cada id de pasillo guarda la
+        distancia desde cada celda hasta la celda transitable más cercana junto
+        a una estantería de ese pasillo. Se construyen la primera vez que se
+        necesitan y se descartan cuando cambia una estantería o la
+        transitabilidad. Devuelve None si ocuparían más de cfg.AISLE_FIELDS_MAX_BYTES.
+        """
+        if self._aisle_fields is None:
+            num_fields = max(self.aisles.max_id, int(self.aisle_ids.max())) + 1
+            num_cells = self.rows * self.cols
+            if DistanceFields.estimate_nbytes(num_fields, num_cells) > cfg.AISLE_FIELDS_MAX_BYTES:
+                return None
+
+            table = self.shelf_adjacency()
+            has_shelf = table.shelves >= 0
+            access_cells = np.repeat(np.arange(num_cells), ShelfAdjacency.CAPACITY)[has_shelf]
+            sources = np.zeros((num_fields, num_cells), dtype=bool)
+            sources[table.aisles[has_shelf], access_cells] = True
+            distance_table = self.distance_table()
+            if distance_table is not None:
+                self._aisle_fields = DistanceFields.from_distance_table(distance_table, sources)
+            elif check_backend(cfg.SEARCH_BACKEND) == "bitboard":
+                self._aisle_fields = DistanceFields.from_bitboard(self.walkable, sources)
+            else:
+                self._aisle_fields = DistanceFields(self.walkable, sources)
+        return self._aisle_fields
+
+    def distance_table(self, bfs_order: bool = False) -> Optional[DistanceTable]:
+        """
+        Tabla de distancias y siguiente paso entre todas las celdas transitables.
+        Se construye la primera vez que se necesita y se conserva mientras la
+        transitabilidad del layout no cambie. Devuelve None si la tabla ocuparía
+        más de cfg.DISTANCE_TABLE_MAX_BYTES.
 
-        if start not in G or end not in G:
+        Con bfs_order=True la tabla también tiene que admitir DistanceTable.bfs_order
+        (la matriz y la memoria para construirla) dentro del mismo límite; si no
+        cabe se devuelve None, aunque la tabla sin ella siga disponible.
+        """
+        if self._distance_table is None:
+            num_walkable = int(np.count_nonzero(self.walkable))
+            if DistanceTable.estimate_nbytes(num_walkable) > cfg.DISTANCE_TABLE_MAX_BYTES:
+                return None
+            self._distance_table = DistanceTable(self.walkable)
+        table = self._distance_table
+        if bfs_order and table.nbytes + table.bfs_order_nbytes() > cfg.DISTANCE_TABLE_MAX_BYTES:
+            return None
+        return table
+
+    def product_index(self) -> ProductIndex:
+        """
+        Índice de la estantería que contiene cada producto (ver ProductIndex).
+        Se construye la primera vez que se necesita; los intercambios de celdas
+        lo actualizan en el lugar y se descarta si se reasigna un pasillo o un rango.
+        """
+        if self._product_index is None:
+            self._product_index = ProductIndex(self.aisle_ids, self.product_ranges)
+            self._owns_product_index = True
+        return self._product_index
+
+    def leg_cache(self) -> LegCache:
+        """
+        Caché de tramos ya resueltos. Se comparte con las copias del layout
+        mientras no cambie la transitabilidad; los tramos y destinos de cada
+        layout se distinguen por su huella.
+        """
+        return self._leg_cache
+
+    def corridor_graph(self) -> CorridorGraph:
+        """
+        Grafo contraído de tramos: los cruces, las celdas junto a una estantería,
+        la entrada y la salida son nodos, y cada pasillo recto o con curvas entre
+        ellos es una arista con su número de pasos. Se construye la primera vez
+        que se necesita y se descarta cuando cambia la transitabilidad (intercambiar
+        estanterías entre sí no cambia qué celdas dan a una estantería).
+        """
+        if self._corridor_graph is None:
+            keep = self.shelf_adjacency().count > 0
+            keep[self.flat_id(self.entrance)] = True
+            keep[self.flat_id(self.exit)] = True
+            self._corridor_graph = CorridorGraph(self.graph, keep)
+        return self._corridor_graph
+
+    def distance_table_nbytes(self) -> int:
+        """Memoria usada por la tabla de distancias de este layout (0 si no se ha construido)"""
+        return self._distance_table.nbytes if self._distance_table is not None else 0
+
+    def distance(self, start: Tuple[int, int], end: Tuple[int, int]) -> Optional[int]:
+        """Número de pasos de la ruta mínima entre dos celdas, None si no hay ruta"""
+        table = self.distance_table()
+        start_id, end_id = self.flat_id(start), self.flat_id(end)
+        if table is not None and start_id >= 0 and end_id >= 0:
+            steps = table.distance(start_id, end_id)
+            return steps if steps >= 0 else None
+
+        path = self.get_path(start, end)
+        return len(path) - 1 if path is not None else None
+
+    def get_flat_path(self, start_id: int, end_id: int) -> Optional[List[int]]:
+        """Ruta óptima entre dos ids planos, como lista de ids planos; la lista puede venir de la caché y no debe modificarse"""
+        if start_id < 0 or end_id < 0:
             return None
 
-        try:
-            return list(nx.shortest_path(G, start, end))
-        except nx.NetworkXNoPath:
+        paths = self.leg_cache().paths
+        path = paths.get((start_id, end_id))
+        if path is None:
+            path = self._find_flat_path(start_id, end_id)
+            if path is not None:
+                paths.put((start_id, end_id), path)
+        return path
+
+    def _find_flat_path(self, start_id: int, end_id: int) -> Optional[List[int]]:
+        table = self.distance_table()
+        if table is not None:
+            return table.path(start_id, end_id)
+        if cfg.USE_CORRIDOR_GRAPH:
+            return self.corridor_graph().path(start_id, end_id)
+        return self._search_path(start_id, end_id)
+
+    def _search_path(self, start_id: int, end_id: int) -> Optional[List[int]]:
+        """Búsqueda punto a punto con la estrategia del layout, registrando los nodos expandidos"""
+        path, expanded = self.graph.find_path(start_id, end_id, self.path_strategy)
+        self.path_stats.record(self.path_strategy, expanded)
+        return path
+
+    def get_distance(self, start_id: int, end_id: int) -> int:
+        """Número de pasos de la ruta óptima entre dos ids planos, sin reconstruirla; -1 si no hay ruta"""
+        if start_id < 0 or end_id < 0:
+            return -1
+
+        table = self.distance_table()
+        if table is not None:
+            return table.distance(start_id, end_id)
+        if cfg.USE_CORRIDOR_GRAPH:
+            return self.corridor_graph().distance(start_id, end_id)
+        path = self._search_path(start_id, end_id)
+        return len(path) - 1 if path is not None else -1
+
+    def get_path(self, start: Tuple[int, int], end: Tuple[int, int]) -> Optional[List[Tuple[int, int]]]:
+        """Calcula la ruta óptima con la tabla de distancias o, si no cabe en memoria, con BFS"""
+        flat_path = self.get_flat_path(self.flat_id(start), self.flat_id(end))
+        if flat_path is None:
             return None
+        return [divmod(cell, self.cols) for cell in flat_path]
+
+    def swap_cells(self, pos1: Tuple[int, int], pos2: Tuple[int, int]) -> None:
+        """
+        Intercambia el contenido completo de dos celdas del layout.
+        Solo se copian los arreglos compartidos en los que ambas celdas difieren.
+        El grafo (si una estantería se intercambia con un pasillo) y la tabla de
+        estanterías vecinas se actualizan solo alrededor de las dos celdas.
+        """
+        self._check_not_frozen()
+        pos1 = (int(pos1[0]), int(pos1[1]))
+        pos2 = (int(pos2[0]), int(pos2[1]))
+        aisle_id1, aisle_id2 = int(self.aisle_ids[pos1]), int(self.aisle_ids[pos2])
+        if np.sign(aisle_id1) != np.sign(aisle_id2):
+            # Cambia qué celdas son pasillo o estantería, la validez deja de conocerse
+            self.validity = None
+        if self._fingerprint is not None:
+            self._fingerprint ^= swap_delta(self.flat_id(pos1), aisle_id1, self.flat_id(pos2), aisle_id2)
+        if pos1 != pos2:
+            self._swap_indexed_cells(pos1, aisle_id1, pos2, aisle_id2)
+            if self._product_index is not None:
+                if not self._owns_product_index:
+                    self._product_index = self._product_index.copy()
+                    self._owns_product_index = True
+                self._product_index.swap(self.flat_id(pos1), self.flat_id(pos2))
+        rows = [pos1[0], pos2[0]]
+        cols = [pos1[1], pos2[1]]
+        for name in self.PLANES:
+            plane = getattr(self, name)
+            if np.array_equal(plane[pos1], plane[pos2]):
+                continue
+            plane = self._writable(name)
+            plane[rows, cols] = plane[rows[::-1], cols[::-1]]
+
+        if self.walkable[pos1] != self.walkable[pos2]:
+            self._on_walkability_changed([pos1, pos2])
+        if self.aisle_ids[pos1] != self.aisle_ids[pos2] or self.walkable[pos1] != self.walkable[pos2]:
+            self._on_shelves_changed([pos1, pos2])
+
+    def copy(self) -> 'SupermarketGrid':
+        """
+        Crea un layout hijo que comparte los arreglos y las tablas derivadas con
+        este. Los arreglos compartidos quedan de solo lectura y el primero de los
+        dos layouts que escriba en uno lo copia (copy-on-write).
+        """
+        new_grid: 'SupermarketGrid' = SupermarketGrid.__new__(SupermarketGrid)
+        new_grid.rows = self.rows
+        new_grid.cols = self.cols
+        for name in self.PLANES:
+            plane = getattr(self, name)
+            plane.flags.writeable = False
+            setattr(new_grid, name, plane)
+        self._owned_planes = set()
+        new_grid._owned_planes = set()
+        new_grid._frozen = False
+        new_grid.path_strategy = self.path_strategy
+        new_grid.path_stats = self.path_stats
+        new_grid._leg_cache = self._leg_cache
+        new_grid.validity = self.validity
+        new_grid._fingerprint = self._fingerprint
+        new_grid.aisles = self.aisles
+        # El índice de celdas por pasillo se comparte hasta que alguno de los dos layouts lo modifique
+        new_grid.aisle_cells = self.aisle_cells
+        new_grid._owns_aisle_cells = False
+        new_grid._owned_aisle_lists = set()
+        new_grid._aisle_size_buckets = self._aisle_size_buckets
+        self._owns_aisle_cells = False
+        new_grid.entrance = self.entrance
+        new_grid.exit = self.exit
+        new_grid._owns_graph = True
+        if hasattr(self, 'graph'):
+            # El grafo se comparte hasta que alguno de los dos layouts cambie su transitabilidad
+            new_grid.graph = self.graph
+            new_grid._owns_graph = False
+            self._owns_graph = False
+        # La tabla de distancias no se modifica nunca, se comparte por referencia
+        new_grid._distance_table = self._distance_table
+        # La tabla de estanterías vecinas se comparte hasta que alguno de los dos la actualice
+        new_grid._shelf_adjacency = self._shelf_adjacency
+        new_grid._owns_shelf_adjacency = False
+        self._owns_shelf_adjacency = False
+        new_grid._aisle_fields = self._aisle_fields
+        new_grid._corridor_graph = self._corridor_graph  # No se modifica, solo se descarta
+        new_grid._product_index = self._product_index
+        new_grid._owns_product_index = False
+        self._owns_product_index = False
+        return new_grid
+
+    def freeze(self) -> 'SupermarketGrid':
+        """
+        Marca el layout como inmutable: cualquier intento de modificarlo lanza
+        ValueError. Es seguro compartirlo sin copiarlo. Devuelve el mismo layout.
+        """
+        for name in self.PLANES:
+            getattr(self, name).flags.writeable = False
+        self._owned_planes = set()
+        self._frozen = True
+        return self
+
+    def thaw(self) -> 'SupermarketGrid':
+        """Devuelve un layout modificable que comparte el estado con este hasta que se escriba"""
+        return self.copy()
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> 'SupermarketGrid':
+        return self.copy()
+
+    def diff(self, other: 'SupermarketGrid') -> np.ndarray:
+        """Máscara booleana (rows, cols) con las celdas cuyo pasillo difiere entre ambos layouts"""
+        return self.aisle_ids != other.aisle_ids
+
+    def to_array(self) -> np.ndarray:
+        """Codifica el layout como enteros: id de pasillo, -1 para la entrada y -2 para la salida"""
+        encoded = np.where(self.exit_mask, -2, self.aisle_ids)
+        return np.where(self.entrance_mask, -1, encoded)
 
     def to_dict(self) -> Dict[str, Any]:
         """Convierte el grid a formato JSON serializable con la estructura de enteros"""
         return {
             "rows": self.rows,
             "cols": self.cols,
-            "grid": self.grid,
+            "grid": self.aisle_ids.tolist(),
             "entrance": self.entrance,
             "exit": self.exit
         }
\ No newline at end of file
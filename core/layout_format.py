@@ -0,0 +1,128 @@
+"""
+Formato binario de snapshots de layouts.
+
+Estructura del archivo:
+    MAGIC (8 bytes) | versión (uint32) | largo del encabezado (uint32) |
+    encabezado JSON (utf-8) | arreglos crudos alineados a ARRAY_ALIGNMENT bytes
+
+El encabezado guarda las dimensiones, la entrada y la salida, y para cada
+arreglo su dtype, forma y posición dentro del archivo. Al leer, el archivo se
+mapea en memoria una sola vez y cada arreglo es una vista de solo lectura
+sobre ese mapeo, así que solo se lee del disco lo que realmente se usa.
+"""
+from dataclasses import dataclass, field
+import json
+import struct
+from typing import Any, Dict, Tuple
+import numpy as np
+
+MAGIC = b"SMGRID\x00\x00"
+FORMAT_VERSION = 1
+SNAPSHOT_EXTENSION = ".sgl"
+ARRAY_ALIGNMENT = 64
+
+_PREFIX = struct.Struct("<8sII")
+
+
+@dataclass
+class LayoutSnapshot:
+    """
+    Contenido de un snapshot de layout.
+
+    Attributes:
+        rows: Número de filas del grid.
+        cols: Número de columnas del grid.
+        entrance: Posición de la entrada.
+        exit: Posición de la salida.
+        arrays: Arreglos por nombre. Obligatorios: aisle_ids y product_ranges.
+            Opcionales: graph_neighbors, shelf_neighbors, distance_cells, distance y next_hop.
+    """
+    rows: int
+    cols: int
+    entrance: Tuple[int, int]
+    exit: Tuple[int, int]
+    arrays: Dict[str, np.ndarray] = field(default_factory=dict)
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // ARRAY_ALIGNMENT) * ARRAY_ALIGNMENT
+
+
+def is_layout_snapshot(filename: str) -> bool:
+    """Indica si el archivo empieza con la firma del formato binario"""
+    with open(filename, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def write_layout_snapshot(filename: str, snapshot: LayoutSnapshot) -> None:
+    """
+    Escribe un snapshot en formato binario.
+
+    Args:
+        filename: Ruta del archivo a escribir.
+        snapshot: Layout y arreglos a guardar.
+    """
+    arrays = {name: np.ascontiguousarray(array) for name, array in snapshot.arrays.items()}
+    header: Dict[str, Any] = {
+        "rows": snapshot.rows,
+        "cols": snapshot.cols,
+        "entrance": list(snapshot.entrance),
+        "exit": list(snapshot.exit),
+        "arrays": {},
+    }
+
+    # Las posiciones son relativas al inicio de la zona de datos, que empieza alineada tras el encabezado
+    offset = 0
+    for name, array in arrays.items():
+        header["arrays"][name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+        offset = _aligned(offset + array.nbytes)
+
+    header_bytes = json.dumps(header).encode("utf-8")
+    data_start = _aligned(_PREFIX.size + len(header_bytes))
+
+    with open(filename, 'wb') as f:
+        f.write(_PREFIX.pack(MAGIC, FORMAT_VERSION, len(header_bytes)))
+        f.write(header_bytes)
+        for name, array in arrays.items():
+            f.seek(data_start + header["arrays"][name]["offset"])
+            f.write(array.tobytes())
+        f.truncate(data_start + offset)
+
+
+def read_layout_snapshot(filename: str) -> LayoutSnapshot:
+    """
+    Abre un snapshot mapeándolo en memoria. Los arreglos devueltos son de solo
+    lectura y no se cargan del disco hasta que se accede a ellos.
+
+    Args:
+        filename: Ruta del archivo a leer.
+
+    Returns:
+        LayoutSnapshot: El snapshot con sus arreglos mapeados.
+    """
+    with open(filename, 'rb') as f:
+        magic, version, header_size = _PREFIX.unpack(f.read(_PREFIX.size))
+        if magic != MAGIC:
+            raise ValueError(f"{filename} no es un snapshot de layout")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Versión de snapshot no soportada: {version} (se esperaba {FORMAT_VERSION})")
+        header: Dict[str, Any] = json.loads(f.read(header_size).decode("utf-8"))
+
+    data_start = _aligned(_PREFIX.size + header_size)
+    raw = np.memmap(filename, dtype=np.uint8, mode='r')
+
+    arrays: Dict[str, np.ndarray] = {}
+    for name, spec in header["arrays"].items():
+        dtype = np.dtype(spec["dtype"])
+        shape = tuple(spec["shape"])
+        start = data_start + spec["offset"]
+        nbytes = int(np.prod(shape, dtype=np.int64)) * dtype.itemsize
+        arrays[name] = np.asarray(raw[start:start + nbytes]).view(dtype).reshape(shape)
+
+    return LayoutSnapshot(
+        rows=header["rows"],
+        cols=header["cols"],
+        entrance=tuple(header["entrance"]),
+        exit=tuple(header["exit"]),
+        arrays=arrays,
+    )
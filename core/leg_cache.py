@@ -0,0 +1,85 @@
+from collections import OrderedDict
+from typing import Any, Dict, Hashable
+
+_MISSING = object()
+
+
+class LRUCache:
+    """
+    Diccionario de tamaño acotado: al superar capacity descarta la entrada
+    usada hace más tiempo. Cuenta aciertos y fallos de las consultas.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity: int = capacity
+        self.hits: int = 0
+        self.misses: int = 0
+        self._entries: 'OrderedDict[Hashable, Any]' = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        value = self._entries.get(key, _MISSING)
+        if value is _MISSING:
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if self.capacity <= 0:
+            return
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class LegCache:
+    """
+    Tramos ya resueltos de los layouts que comparten transitabilidad, para no
+    repetirlos entre clientes que salen de la misma celda hacia los mismos
+    pasillos.
+
+    Las rutas solo dependen de qué celdas son transitables y se guardan por
+    (celda de inicio, celda de destino). Los tramos recorridos y los destinos
+    dependen además de los ids de pasillo, así que llevan la huella del layout
+    en la clave: (huella, inicio, destino) y (huella, inicio, pasillos
+    pendientes, estanterías visitadas, hacia la salida). Así las entradas de
+    la solución actual sobreviven mientras se puntúan sus vecinos, hasta que
+    el descarte LRU las saque.
+
+    Attributes:
+        paths: Rutas como listas de ids planos, que no deben modificarse.
+        legs: Tramos de walk_to_target: posiciones de la ruta y estanterías que toca.
+        targets: Destinos (TargetShelf) de find_closest_from_set.
+    """
+
+    def __init__(self, path_capacity: int, target_capacity: int) -> None:
+        self.paths: LRUCache = LRUCache(path_capacity)
+        self.legs: LRUCache = LRUCache(path_capacity)
+        self.targets: LRUCache = LRUCache(target_capacity)
+
+    def stats(self) -> Dict[str, float]:
+        """Aciertos, fallos y tasa de aciertos de cada caché"""
+        return {
+            "path_hits": self.paths.hits,
+            "path_misses": self.paths.misses,
+            "path_hit_rate": self.paths.hit_rate,
+            "leg_hits": self.legs.hits,
+            "leg_misses": self.legs.misses,
+            "leg_hit_rate": self.legs.hit_rate,
+            "target_hits": self.targets.hits,
+            "target_misses": self.targets.misses,
+            "target_hit_rate": self.targets.hit_rate,
+        }
@@ -0,0 +1,857 @@
+from collections import deque
+from dataclasses import dataclass, field
+import heapq
+from typing import Any, Container, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from core.bitboard import distance_fields_bitboard
+
+# Orden de exploración de vecinos: arriba, abajo, izquierda, derecha
+DIRECTIONS: Tuple[Tuple[int, int], ...] = ((-1, 0), (1, 0), (0, -1), (0, 1))
+
+# Estrategias de búsqueda punto a punto de GridGraph.find_path
+PATH_STRATEGIES: Tuple[str, ...] = ("bfs", "astar", "jps")
+
+
+def neighbor_slots(walkable: np.ndarray, targets: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Calcula, para cada celda transitable del grid, el id plano del vecino en
+    cada dirección de DIRECTIONS.
+
+    Args:
+        walkable: Máscara booleana (rows, cols) de celdas transitables.
+        targets: Máscara de los vecinos que cuentan; por defecto, las celdas transitables.
+
+    Returns:
+        np.ndarray: Arreglo (rows*cols, 4) con ids planos, -1 si no hay vecino válido.
+    """
+    if targets is None:
+        targets = walkable
+    rows, cols = walkable.shape
+    flat_ids = np.arange(rows * cols, dtype=np.int32).reshape(rows, cols)
+    slots = np.full((rows, cols, len(DIRECTIONS)), -1, dtype=np.int32)
+
+    for d, (dx, dy) in enumerate(DIRECTIONS):
+        src_rows = slice(max(0, -dx), rows - max(0, dx))
+        src_cols = slice(max(0, -dy), cols - max(0, dy))
+        dst_rows = slice(max(0, dx), rows - max(0, -dx))
+        dst_cols = slice(max(0, dy), cols - max(0, -dy))
+        connected = walkable[src_rows, src_cols] & targets[dst_rows, dst_cols]
+        slots[src_rows, src_cols, d] = np.where(connected, flat_ids[dst_rows, dst_cols], -1)
+
+    return slots.reshape(rows * cols, len(DIRECTIONS))
+
+
+class DistanceTable:
+    """
+    Distancias entre todos los pares de celdas transitables y tabla de
+    siguiente paso para reconstruir rutas mínimas.
+
+    Las consultas usan ids planos (fila * cols + columna). Internamente las
+    matrices son densas sobre las celdas transitables, en el orden de sus ids.
+    """
+    BFS_ORDER_CACHE_SIZE = 1 << 16  # Desempates recordados antes de vaciar la caché
+    BFS_ORDER_BAND = 8  # Niveles de distancia que bfs_order separa en cada recorrido de la tabla
+    BFS_ORDER_PAIR_NBYTES = 64  # Memoria temporal de bfs_order por par de la banda que está ordenando
+
+    def __init__(self, walkable: np.ndarray) -> None:
+        self.rows, self.cols = walkable.shape
+        self.cells: np.ndarray = np.flatnonzero(walkable).astype(np.int32)
+        self.index: np.ndarray = np.full(self.rows * self.cols, -1, dtype=np.int32)
+        self.index[self.cells] = np.arange(len(self.cells), dtype=np.int32)
+
+        num_cells = len(self.cells)
+        index_dtype = self._index_dtype(num_cells)
+
+        # Vecinos en índices compactos; num_cells funciona como centinela de "sin vecino"
+        slots = neighbor_slots(walkable)[self.cells]
+        compact_slots = np.where(slots >= 0, self.index[slots], num_cells)
+
+        self.dist: np.ndarray = self._all_pairs_bfs(compact_slots, num_cells)
+        self.next_hop: np.ndarray = self._next_hops(self.dist, compact_slots, num_cells, index_dtype)
+        self._bfs_order_cache: Dict[Tuple[int, Tuple[int, ...]], int] = {}
+        self._bfs_order: Optional[np.ndarray] = None
+        self._bfs_order_nbytes: Optional[int] = None
+
+    @classmethod
+    def from_arrays(cls, rows: int, cols: int, cells: np.ndarray, dist: np.ndarray, next_hop: np.ndarray) -> 'DistanceTable':
+        """
+        Reconstruye una tabla ya calculada (por ejemplo, leída de un snapshot)
+        sin repetir el BFS. Las matrices se usan tal cual, sin copiarlas.
+        """
+        table: 'DistanceTable' = cls.__new__(cls)
+        table.rows, table.cols = rows, cols
+        table.cells = cells
+        table.index = np.full(rows * cols, -1, dtype=np.int32)
+        table.index[cells] = np.arange(len(cells), dtype=np.int32)
+        table.dist = dist
+        table.next_hop = next_hop
+        table._bfs_order_cache = {}
+        table._bfs_order = None
+        table._bfs_order_nbytes = None
+        return table
+
+    @staticmethod
+    def _index_dtype(num_cells: int) -> type:
+        return np.int16 if num_cells < np.iinfo(np.int16).max else np.int32
+
+    @classmethod
+    def estimate_nbytes(cls, num_cells: int) -> int:
+        """Memoria que ocuparían las matrices para num_cells celdas transitables"""
+        index_size = np.dtype(cls._index_dtype(num_cells)).itemsize
+        return num_cells * num_cells * (np.dtype(np.int16).itemsize + index_size)
+
+    @property
+    def nbytes(self) -> int:
+        """Memoria usada por las matrices de la tabla"""
+        nbytes = self.dist.nbytes + self.next_hop.nbytes + self.cells.nbytes + self.index.nbytes
+        return nbytes if self._bfs_order is None else nbytes + self._bfs_order.nbytes
+
+    def bfs_order_nbytes(self) -> int:
+        """
+        Memoria que falta para bfs_order: la matriz y, mientras se construye,
+        lo mayor entre las máscaras de una banda de niveles sobre toda la tabla
+        y los pares de la banda más poblada. 0 si ya está construida.
+        """
+        if self._bfs_order is not None:
+            return 0
+        if self._bfs_order_nbytes is not None:
+            return self._bfs_order_nbytes
+        num_cells = len(self.cells)
+        # Pares por nivel de distancia, contados por bloques de filas para no copiar la tabla entera
+        level_sizes = np.zeros(int(self.dist.max(initial=0)) + 2, dtype=np.int64)
+        rows_per_block = max(1, (1 << 18) // max(num_cells, 1))
+        for start in range(0, num_cells, rows_per_block):
+            level_sizes += np.bincount(self.dist[start:start + rows_per_block].ravel() + 1, minlength=len(level_sizes))
+        band_sizes = np.add.reduceat(level_sizes[2:], np.arange(0, len(level_sizes) - 2, self.BFS_ORDER_BAND)) \
+            if len(level_sizes) > 2 else np.zeros(1, dtype=np.int64)
+        matrix = num_cells * num_cells * self.next_hop.itemsize
+        self._bfs_order_nbytes = matrix + max(3 * num_cells * num_cells, int(band_sizes.max()) * self.BFS_ORDER_PAIR_NBYTES)
+        return self._bfs_order_nbytes
+
+    @staticmethod
+    def _all_pairs_bfs(compact_slots: np.ndarray, num_cells: int) -> np.ndarray:
+        """BFS simultáneo desde todas las celdas: cada nivel expande todas las fronteras a la vez"""
+        dist = np.full((num_cells, num_cells), -1, dtype=np.int16)
+        np.fill_diagonal(dist, 0)
+
+        # frontier[v, s]: la celda v está en la frontera del BFS que parte de s.
+        # La fila extra, siempre en False, corresponde al centinela de "sin vecino"
+        frontier = np.zeros((num_cells + 1, num_cells), dtype=bool)
+        frontier[:num_cells] = np.eye(num_cells, dtype=bool)
+        reached = frontier[:num_cells].copy()
+
+        level = 0
+        while True:
+            level += 1
+            new = frontier[compact_slots[:, 0]]
+            for d in range(1, compact_slots.shape[1]):
+                new |= frontier[compact_slots[:, d]]
+            new &= ~reached
+            if not new.any():
+                break
+            # La matriz es simétrica, dist[v, s] == dist[s, v]
+            dist[new] = level
+            reached |= new
+            frontier[:num_cells] = new
+
+        return dist
+
+    @staticmethod
+    def _next_hops(dist: np.ndarray, compact_slots: np.ndarray, num_cells: int, index_dtype: type) -> np.ndarray:
+        """Siguiente celda de la ruta mínima: el primer vecino, en orden de DIRECTIONS, un paso más cerca del destino"""
+        next_hop = np.full((num_cells, num_cells), -1, dtype=index_dtype)
+        np.fill_diagonal(next_hop, np.arange(num_cells))
+
+        # Fila extra para el centinela, nunca coincide con una distancia válida
+        padded_dist = np.vstack([dist, np.full((1, num_cells), -2, dtype=dist.dtype)])
+        expected = dist - 1
+        for d in range(compact_slots.shape[1]):
+            neighbor = compact_slots[:, d]
+            is_next = (padded_dist[neighbor] == expected) & (next_hop < 0) & (dist > 0)
+            next_hop[is_next] = np.broadcast_to(neighbor[:, None], is_next.shape)[is_next]
+
+        return next_hop
+
+    def distance(self, start: int, end: int) -> int:
+        """Distancia en pasos entre dos ids planos, -1 si no hay ruta o alguna celda no es transitable"""
+        i, j = self.index[start], self.index[end]
+        if i < 0 or j < 0:
+            return -1
+        return int(self.dist[i, j])
+
+    def path(self, start: int, end: int) -> Optional[List[int]]:
+        """Ruta mínima como lista de ids planos, incluyendo inicio y fin"""
+        i, j = int(self.index[start]), int(self.index[end])
+        if i < 0 or j < 0 or self.dist[i, j] < 0:
+            return None
+
+        next_hop = self.next_hop
+        compact_path = [i]
+        while i != j:
+            i = int(next_hop[i, j])
+            compact_path.append(i)
+        return self.cells[compact_path].tolist()
+
+    def nearest(self, start: int, candidates: np.ndarray) -> int:
+        """
+        Candidata más cercana a start. Entre empates devuelve la primera en orden
+        de BFS desde start, que es la de menor secuencia de direcciones
+        (comparada lexicográficamente) en su ruta de la tabla.
+
+        Returns:
+            int: Id plano de la candidata, -1 si no se puede llegar a ninguna.
+        """
+        i = self.index[start]
+        compact = self.index[candidates]
+        compact = compact[compact >= 0]
+        if i < 0 or len(compact) == 0:
+            return -1
+
+        dist = self.dist[i, compact]
+        reachable = dist >= 0
+        if not reachable.any():
+            return -1
+        tied = sorted(set(compact[reachable & (dist == dist[reachable].min())].tolist()))
+        return int(self.cells[self.first_in_bfs_order(int(i), tied)])
+
+    def first_in_bfs_order(self, start: int, tied: Sequence[int]) -> int:
+        """
+        Entre celdas a la misma distancia de start (índices compactos), la
+        primera en orden de BFS: la de menor secuencia de direcciones en su ruta
+        de la tabla. Se avanza por las rutas a la vez quedándose en cada paso
+        con las que toman la primera dirección de DIRECTIONS; las que quedan
+        comparten ese paso, así que la comparación sigue desde la celda siguiente.
+
+        Los resultados se recuerdan: los layouts que comparten la tabla repiten
+        muchos de los mismos desempates.
+        """
+        remaining = [int(cell) for cell in tied]
+        key = (start, tuple(remaining))
+        cached = self._bfs_order_cache.get(key)
+        if cached is not None:
+            return cached
+
+        # Las empatadas suelen ser pocas: se recorren como enteros de Python
+        next_hop, cells = self.next_hop, self.cells
+        rank = {-self.cols: 0, self.cols: 1, -1: 2, 1: 3}
+        current = start
+        while len(remaining) > 1:
+            origin = cells.item(current)
+            hops = [next_hop.item(current, cell) for cell in remaining]
+            ranks = [rank[cells.item(hop) - origin] for hop in hops]
+            best = min(ranks)
+            remaining = [cell for cell, r in zip(remaining, ranks) if r == best]
+            current = hops[ranks.index(best)]
+
+        if len(self._bfs_order_cache) >= self.BFS_ORDER_CACHE_SIZE:
+            self._bfs_order_cache.clear()
+        self._bfs_order_cache[key] = remaining[0]
+        return remaining[0]
+
+    def bfs_order(self) -> np.ndarray:
+        """
+        bfs_order[i, j]: posición de j en el orden en que el BFS desde i saca
+        las celdas de la cola (índices compactos), o el número de celdas si j no
+        es alcanzable desde i. Entre celdas a la misma distancia de i la menor
+        es la que elegiría first_in_bfs_order, así que los desempates de muchos
+        inicios se resuelven con una sola consulta.
+
+        Se calcula la primera vez que se pide, un nivel de distancia a la vez:
+        la ruta de i a j es el paso de i a h = next_hop[i, j] seguido de la ruta
+        de h a j, así que el orden dentro del nivel d sale de la dirección de
+        ese paso y, entre iguales, del orden de j desde h. Lo que ocupa, también
+        mientras se construye, lo da bfs_order_nbytes.
+        """
+        if self._bfs_order is not None:
+            return self._bfs_order
+
+        num_cells = len(self.cells)
+        dist = self.dist.ravel()
+        next_hop = self.next_hop.ravel()
+        cells = self.cells.astype(np.int64)
+        order = np.full(num_cells * num_cells, num_cells, dtype=self.next_hop.dtype)
+        order[::num_cells + 1] = 0
+        # Celdas ya ordenadas desde cada inicio; al empezar, solo la propia
+        placed = np.ones(num_cells, dtype=np.int64)
+        # Dirección de DIRECTIONS de cada paso (diferencia de ids planos + cols)
+        step_direction = np.zeros(2 * self.cols + 1, dtype=np.int64)
+        for d, (dx, dy) in enumerate(DIRECTIONS):
+            step_direction[dx * self.cols + dy + self.cols] = d
+        max_level = int(dist.max(initial=0))
+        for band_start in range(1, max_level + 1, self.BFS_ORDER_BAND):
+            # Pares de una banda de niveles, ordenados por nivel y, dentro de cada nivel, por celda de
+            # inicio; recorrer la tabla una vez por banda y no por nivel abarata la búsqueda de los pares
+            band = np.flatnonzero((dist >= band_start) & (dist < band_start + self.BFS_ORDER_BAND))
+            band = band[np.argsort(dist[band], kind='stable')]
+            bounds = np.searchsorted(dist[band], np.arange(band_start, band_start + self.BFS_ORDER_BAND + 1))
+            for level_start, level_end in zip(bounds[:-1], bounds[1:]):
+                pairs = band[level_start:level_end]
+                starts, ends = np.divmod(pairs, num_cells)
+                hops = next_hop[pairs].astype(np.int64)
+                key = step_direction[cells[hops] - cells[starts] + self.cols] * num_cells + order[hops * num_cells + ends]
+                # Los pares ya van por celda de inicio: basta ordenar por clave dentro de cada inicio
+                counts = np.bincount(starts, minlength=num_cells)
+                sorted_pairs = np.argsort(starts * (len(DIRECTIONS) * num_cells) + key)
+                # Posición dentro del nivel, entre las parejas del mismo inicio, detrás de los niveles anteriores
+                rank = np.arange(len(pairs)) - (np.cumsum(counts) - counts)[starts]
+                order[pairs[sorted_pairs]] = placed[starts] + rank
+                placed += counts
+
+        self._bfs_order = order.reshape(num_cells, num_cells)
+        return self._bfs_order
+
+class DistanceFields:
+    """
+    Campos de distancia de BFS con múltiples orígenes. La fila k guarda, para
+    cada celda (id plano), el número de pasos hasta la celda más cercana del
+    conjunto de orígenes k, o UNREACHABLE si no se puede llegar.
+    """
+    UNREACHABLE = np.iinfo(np.int16).max
+
+    def __init__(self, walkable: np.ndarray, sources: np.ndarray) -> None:
+        """
+        Args:
+            walkable: Máscara booleana (rows, cols) de celdas transitables.
+            sources: Máscara (K, rows*cols) con las celdas de origen de cada campo.
+        """
+        num_cells = walkable.size
+        slots = neighbor_slots(walkable)
+        # num_cells funciona como centinela de "sin vecino": su columna de la frontera siempre es False
+        padded_slots = np.where(slots >= 0, slots, num_cells)
+
+        self._index_sources(sources & walkable.ravel())
+
+        frontier = np.zeros((sources.shape[0], num_cells + 1), dtype=bool)
+        frontier[:, :num_cells] = sources & walkable.ravel()
+        reached = frontier[:, :num_cells].copy()
+        self.dist: np.ndarray = np.where(reached, 0, self.UNREACHABLE).astype(np.int16)
+
+        level = 0
+        while True:
+            level += 1
+            new = frontier[:, padded_slots[:, 0]]
+            for d in range(1, padded_slots.shape[1]):
+                new |= frontier[:, padded_slots[:, d]]
+            new &= ~reached
+            if not new.any():
+                break
+            self.dist[new] = level
+            reached |= new
+            frontier[:, :num_cells] = new
+
+    @classmethod
+    def from_bitboard(cls, walkable: np.ndarray, sources: np.ndarray) -> 'DistanceFields':
+        """Calcula los mismos campos que el constructor con el motor bit a bit (ver core.bitboard)"""
+        fields: 'DistanceFields' = cls.__new__(cls)
+        fields._index_sources(sources & walkable.ravel())
+        fields.dist = distance_fields_bitboard(walkable, sources, cls.UNREACHABLE)
+        return fields
+
+    @classmethod
+    def from_distance_table(cls, table: DistanceTable, sources: np.ndarray) -> 'DistanceFields':
+        """
+        Calcula los campos a partir de una tabla de distancias ya construida:
+        cada campo es el mínimo de las filas de sus celdas de origen.
+
+        Args:
+            table: Tabla de distancias entre todas las celdas transitables.
+            sources: Máscara (K, rows*cols) con las celdas de origen de cada campo.
+        """
+        fields: 'DistanceFields' = cls.__new__(cls)
+        fields.dist = np.full(sources.shape, cls.UNREACHABLE, dtype=np.int16)
+        fields._index_sources(sources)
+
+        field_ids, cells = np.nonzero(sources)  # Agrupados por campo
+        compact = table.index[cells]
+        field_ids, compact = field_ids[compact >= 0], compact[compact >= 0]
+        if len(compact) == 0:
+            return fields
+
+        source_rows = table.dist[compact]
+        source_rows = np.where(source_rows < 0, cls.UNREACHABLE, source_rows).astype(np.int16)
+        present, group_starts = np.unique(field_ids, return_index=True)
+        fields.dist[np.ix_(present, table.cells)] = np.minimum.reduceat(source_rows, group_starts, axis=0)
+        return fields
+
+    def _index_sources(self, sources: np.ndarray) -> None:
+        """Guarda las celdas de origen de cada campo en formato CSR"""
+        field_ids, cells = np.nonzero(sources)
+        self.source_cells: np.ndarray = cells.astype(np.int32)
+        self.source_offsets: np.ndarray = np.searchsorted(field_ids, np.arange(sources.shape[0] + 1)).astype(np.int32)
+
+    def sources_of(self, fields: List[int]) -> np.ndarray:
+        """Celdas de origen (ids planos) de los campos indicados"""
+        return np.concatenate([
+            self.source_cells[self.source_offsets[field]:self.source_offsets[field + 1]] for field in fields
+        ])
+
+    @classmethod
+    def estimate_nbytes(cls, num_fields: int, num_cells: int) -> int:
+        return num_fields * num_cells * np.dtype(np.int16).itemsize
+
+    @property
+    def nbytes(self) -> int:
+        return self.dist.nbytes
+
+    def descend(self, fields: List[int], start: int, graph: 'GridGraph') -> int:
+        """
+        Celda de origen más cercana a start entre los campos indicados.
+        Baja por el mínimo de los campos tomando siempre el primer vecino, en
+        orden de DIRECTIONS, que está un paso más cerca. Así se llega a la misma
+        celda que devolvería graph.bfs(start, targets=orígenes): la primera, en
+        orden de BFS, entre las más cercanas.
+
+        Returns:
+            int: Id plano de la celda alcanzada, -1 si no se puede llegar a ningún origen.
+        """
+        path = self.descend_path(fields, start, graph)
+        return path[-1] if path is not None else -1
+
+    def descend_path(self, fields: List[int], start: int, graph: 'GridGraph') -> Optional[List[int]]:
+        """
+        Igual que descend, pero devuelve todas las celdas recorridas desde
+        start: una ruta mínima hasta la celda de origen alcanzada, o None si no
+        se puede llegar a ningún origen.
+        """
+        combined = self.dist[fields].min(axis=0) if len(fields) > 1 else self.dist[fields[0]]
+        current = start
+        remaining = int(combined[current])
+        if remaining == self.UNREACHABLE:
+            return None
+
+        path = [current]
+        while remaining > 0:
+            remaining -= 1
+            for neighbor in graph.neighbors_of(current):
+                if combined[neighbor] == remaining:
+                    current = neighbor
+                    break
+            path.append(current)
+        return path
+
+
+@dataclass
+class SearchResult:
+    """
+    Resultado de una búsqueda en anchura sobre GridGraph.
+
+    Attributes:
+        source: Id plano de la celda de inicio.
+        target: Primera celda objetivo encontrada, -1 si no se encontró ninguna.
+        parents: Predecesor de cada celda alcanzada (-1 si no se alcanzó); el inicio es su propio predecesor.
+        expanded: Número de celdas sacadas de la cola.
+    """
+    source: int
+    target: int
+    parents: List[int]
+    expanded: int
+
+
+@dataclass
+class PathSearchStats:
+    """
+    Contadores acumulados de las búsquedas punto a punto, por estrategia.
+
+    Attributes:
+        searches: Número de búsquedas realizadas.
+        expanded: Total de nodos sacados de la cola (celdas en bfs y astar, puntos de salto en jps).
+    """
+    searches: Dict[str, int] = field(default_factory=dict)
+    expanded: Dict[str, int] = field(default_factory=dict)
+
+    def record(self, strategy: str, expanded: int) -> None:
+        self.searches[strategy] = self.searches.get(strategy, 0) + 1
+        self.expanded[strategy] = self.expanded.get(strategy, 0) + expanded
+
+    def mean_expanded(self, strategy: str) -> float:
+        """Nodos expandidos por búsqueda con la estrategia indicada"""
+        searches = self.searches.get(strategy, 0)
+        return self.expanded.get(strategy, 0) / searches if searches else 0.0
+
+
+class GridGraph:
+    """
+    Adyacencia 4-conexa de las celdas transitables en arreglos tipo CSR.
+
+    Cada celda i reserva DEGREE_CAPACITY posiciones a partir de offsets[i]: sus
+    vecinos transitables ocupan las primeras degree[i], en el orden de
+    DIRECTIONS, y el resto queda en -1. Con esa holgura, cambiar la
+    transitabilidad de una celda solo reescribe su fila y las de sus vecinos.
+    Las búsquedas recorren una copia en listas de Python de esas mismas filas,
+    que se mantiene junto con los arreglos.
+
+    copy() no duplica nada: la copia apunta al grafo original como base y
+    guarda aparte solo las filas y celdas que cambie después, así que la base
+    no debe modificarse mientras tenga copias. neighbors_of y las consultas
+    de transitabilidad leen la base y los cambios sin armar los arreglos; los
+    arreglos completos (walkable, neighbors, degree y las listas que recorren
+    las búsquedas) se arman la primera vez que se piden, compartiendo con la
+    base las listas de las filas que no cambiaron.
+    """
+    DEGREE_CAPACITY = len(DIRECTIONS)
+    MAX_CHANGED_FRACTION = 0.125  # Con más celdas cambiadas, copy() arma primero los arreglos completos
+
+    def __init__(self, walkable: np.ndarray) -> None:
+        self.rows, self.cols = walkable.shape
+        num_cells = self.rows * self.cols
+        slots = neighbor_slots(walkable)
+        # Compactar cada fila dejando los vecinos válidos al inicio sin alterar su orden
+        order = np.argsort(slots < 0, axis=1, kind='stable')
+        self._set_arrays(
+            walkable.ravel().copy(),
+            np.take_along_axis(slots, order, axis=1).ravel(),
+            np.count_nonzero(slots >= 0, axis=1).astype(np.int32)
+        )
+        self.offsets: np.ndarray = np.arange(0, num_cells * self.DEGREE_CAPACITY + 1, self.DEGREE_CAPACITY, dtype=np.int32)
+
+    @classmethod
+    def from_arrays(cls, walkable: np.ndarray, neighbors: np.ndarray) -> 'GridGraph':
+        """
+        Reconstruye el grafo a partir de filas de vecinos ya calculadas (por
+        ejemplo, leídas de un snapshot). neighbors se usa sin copiarlo, así que
+        si es de solo lectura hay que copiar el grafo antes de modificarlo.
+        """
+        graph: 'GridGraph' = cls.__new__(cls)
+        graph.rows, graph.cols = walkable.shape
+        num_cells = graph.rows * graph.cols
+        graph._set_arrays(
+            walkable.ravel().copy(),
+            neighbors.ravel(),
+            np.count_nonzero(neighbors.reshape(num_cells, cls.DEGREE_CAPACITY) >= 0, axis=1).astype(np.int32)
+        )
+        graph.offsets = np.arange(0, num_cells * cls.DEGREE_CAPACITY + 1, cls.DEGREE_CAPACITY, dtype=np.int32)
+        return graph
+
+    def _set_arrays(self, walkable: np.ndarray, neighbors: np.ndarray, degree: np.ndarray) -> None:
+        """Deja el grafo con arreglos propios y sin base"""
+        self._walkable: Optional[np.ndarray] = walkable
+        self._neighbors: Optional[np.ndarray] = neighbors
+        self._degree: Optional[np.ndarray] = degree
+        neighbor_rows = neighbors.reshape(-1, self.DEGREE_CAPACITY).tolist()
+        self._rows: Optional[List[List[int]]] = [row[:count] for row, count in zip(neighbor_rows, degree.tolist())]
+        self._base: Optional['GridGraph'] = None
+        self._changed_rows: Dict[int, List[int]] = {}  # Filas de vecinos que difieren de la base
+        self._changed_walkable: Dict[int, bool] = {}  # Celdas cuya transitabilidad difiere de la base
+
+    def _materialize(self) -> None:
+        """Arma los arreglos completos a partir de la base y los cambios, y deja de depender de la base"""
+        base = self._base
+        if base is None:
+            return
+        walkable, neighbors, degree = base._walkable.copy(), base._neighbors.copy(), base._degree.copy()
+        rows = list(base._rows)
+        for cell, value in self._changed_walkable.items():
+            walkable[cell] = value
+        for cell, row in self._changed_rows.items():
+            start = cell * self.DEGREE_CAPACITY
+            neighbors[start:start + self.DEGREE_CAPACITY] = row + [-1] * (self.DEGREE_CAPACITY - len(row))
+            degree[cell] = len(row)
+            rows[cell] = row
+        self._walkable, self._neighbors, self._degree, self._rows = walkable, neighbors, degree, rows
+        self._base = None
+        self._changed_rows = {}
+        self._changed_walkable = {}
+
+    @property
+    def walkable(self) -> np.ndarray:
+        self._materialize()
+        return self._walkable
+
+    @property
+    def neighbors(self) -> np.ndarray:
+        self._materialize()
+        return self._neighbors
+
+    @property
+    def degree(self) -> np.ndarray:
+        self._materialize()
+        return self._degree
+
+    @property
+    def _adjacency(self) -> List[List[int]]:
+        self._materialize()
+        return self._rows
+
+    def copy(self) -> 'GridGraph':
+        """Copia que comparte este grafo como base; desde ahora este no debe modificarse"""
+        if len(self._changed_walkable) > self.MAX_CHANGED_FRACTION * self.rows * self.cols:
+            self._materialize()
+        new_graph: 'GridGraph' = GridGraph.__new__(GridGraph)
+        new_graph.rows, new_graph.cols = self.rows, self.cols
+        new_graph.offsets = self.offsets
+        new_graph._walkable = new_graph._neighbors = new_graph._degree = new_graph._rows = None
+        new_graph._base = self._base if self._base is not None else self
+        new_graph._changed_rows = dict(self._changed_rows)
+        new_graph._changed_walkable = dict(self._changed_walkable)
+        return new_graph
+
+    def _is_walkable(self, cell: int) -> bool:
+        if self._base is None:
+            return bool(self._walkable[cell])
+        value = self._changed_walkable.get(cell)
+        return bool(self._base._walkable[cell]) if value is None else value
+
+    def __contains__(self, cell: int) -> bool:
+        return 0 <= cell < self.rows * self.cols and self._is_walkable(cell)
+
+    def neighbors_of(self, cell: int) -> List[int]:
+        """Vecinos transitables de una celda, en el orden de DIRECTIONS"""
+        if self._base is None:
+            return self._rows[cell]
+        row = self._changed_rows.get(cell)
+        return self._base._rows[cell] if row is None else row
+
+    def _cell_row(self, cell: int) -> List[int]:
+        if not self._is_walkable(cell):
+            return []
+        row, col = divmod(cell, self.cols)
+        result: List[int] = []
+        for dx, dy in DIRECTIONS:
+            nx_, ny = row + dx, col + dy
+            if 0 <= nx_ < self.rows and 0 <= ny < self.cols and self._is_walkable(nx_ * self.cols + ny):
+                result.append(nx_ * self.cols + ny)
+        return result
+
+    def set_walkable(self, cell: int, value: bool) -> None:
+        """Cambia la transitabilidad de una celda reescribiendo solo su fila y las de sus vecinos"""
+        if self._is_walkable(cell) == value:
+            return
+        if self._base is None:
+            self._walkable[cell] = value
+        else:
+            self._changed_walkable[cell] = value
+
+        row, col = divmod(cell, self.cols)
+        affected = [cell]
+        for dx, dy in DIRECTIONS:
+            nx_, ny = row + dx, col + dy
+            if 0 <= nx_ < self.rows and 0 <= ny < self.cols:
+                affected.append(nx_ * self.cols + ny)
+
+        for affected_cell in affected:
+            new_row = self._cell_row(affected_cell)
+            if self._base is not None:
+                self._changed_rows[affected_cell] = new_row
+                continue
+            start = self.offsets[affected_cell]
+            self._neighbors[start:start + self.DEGREE_CAPACITY] = new_row + [-1] * (self.DEGREE_CAPACITY - len(new_row))
+            self._degree[affected_cell] = len(new_row)
+            self._rows[affected_cell] = new_row
+
+    def bfs(self, source: int, targets: Optional[Container[int]] = None) -> SearchResult:
+        """
+        Búsqueda en anchura desde source. Si se indican objetivos, se detiene
+        al sacar de la cola el primero de ellos, de modo que el resultado es el
+        objetivo más cercano y, entre empates, el primero en orden de BFS.
+        """
+        parents = [-1] * len(self._adjacency)
+        parents[source] = source
+        adjacency = self._adjacency
+        queue = deque([source])
+        expanded = 0
+
+        while queue:
+            current = queue.popleft()
+            expanded += 1
+            if targets is not None and current in targets:
+                return SearchResult(source, current, parents, expanded)
+            for neighbor in adjacency[current]:
+                if parents[neighbor] < 0:
+                    parents[neighbor] = current
+                    queue.append(neighbor)
+
+        return SearchResult(source, -1, parents, expanded)
+
+    @staticmethod
+    def reconstruct_path(result: SearchResult, target: int) -> Optional[List[int]]:
+        """Ruta desde el inicio de la búsqueda hasta target siguiendo los predecesores"""
+        parents = result.parents
+        if parents[target] < 0:
+            return None
+        path = [target]
+        while target != result.source:
+            target = parents[target]
+            path.append(target)
+        path.reverse()
+        return path
+
+    def shortest_path(self, start: int, end: int) -> Optional[List[int]]:
+        """Ruta mínima entre dos celdas como lista de ids planos"""
+        if start not in self or end not in self:
+            return None
+        result = self.bfs(start, targets=(end,))
+        if result.target < 0:
+            return None
+        return self.reconstruct_path(result, end)
+
+    def astar(self, source: int, target: int) -> SearchResult:
+        """
+        Búsqueda A* con la distancia de Manhattan como heurística. Entre nodos
+        con el mismo costo estimado expande primero el más alejado del inicio,
+        lo que en zonas abiertas evita recorrer todo el frente de empates.
+        """
+        cols = self.cols
+        target_row, target_col = divmod(target, cols)
+        parents = [-1] * len(self._adjacency)
+        parents[source] = source
+        cost = {source: 0}
+        adjacency = self._adjacency
+        source_row, source_col = divmod(source, cols)
+        heap = [(abs(source_row - target_row) + abs(source_col - target_col), 0, source)]
+        closed = set()
+        expanded = 0
+
+        while heap:
+            _, negative_cost, current = heapq.heappop(heap)
+            if current in closed:
+                continue
+            closed.add(current)
+            expanded += 1
+            if current == target:
+                return SearchResult(source, current, parents, expanded)
+            new_cost = 1 - negative_cost
+            for neighbor in adjacency[current]:
+                if new_cost < cost.get(neighbor, new_cost + 1):
+                    cost[neighbor] = new_cost
+                    parents[neighbor] = current
+                    row, col = divmod(neighbor, cols)
+                    heapq.heappush(heap, (new_cost + abs(row - target_row) + abs(col - target_col), -new_cost, neighbor))
+
+        return SearchResult(source, -1, parents, expanded)
+
+    def jump_point_search(self, source: int, target: int) -> Tuple[Optional[List[int]], int]:
+        """
+        Jump point search para movimientos en 4 direcciones. Entre las rutas
+        mínimas se consideran solo las que giran de horizontal a vertical cuando
+        no podían haberlo hecho una celda antes; así los tramos horizontales
+        solo se detienen en esas celdas (o en el destino), los verticales en
+        las celdas desde las que un tramo horizontal llega a una de ellas, y A*
+        solo expande esos puntos de salto.
+
+        Returns:
+            Tuple[Optional[List[int]], int]: La ruta como ids planos (None si no
+            hay) y el número de puntos de salto expandidos.
+        """
+        rows, cols = self.rows, self.cols
+        walkable = self.walkable
+        target_row, target_col = divmod(target, cols)
+
+        def is_open(row: int, col: int) -> bool:
+            return 0 <= row < rows and 0 <= col < cols and bool(walkable[row * cols + col])
+
+        def jump_horizontal(row: int, col: int, dc: int) -> int:
+            while True:
+                col += dc
+                if not is_open(row, col):
+                    return -1
+                if (row == target_row and col == target_col
+                        or is_open(row - 1, col) and not is_open(row - 1, col - dc)
+                        or is_open(row + 1, col) and not is_open(row + 1, col - dc)):
+                    return row * cols + col
+
+        def jump_vertical(row: int, col: int, dr: int) -> int:
+            while True:
+                row += dr
+                if not is_open(row, col):
+                    return -1
+                if (row == target_row and col == target_col
+                        or jump_horizontal(row, col, -1) >= 0 or jump_horizontal(row, col, 1) >= 0):
+                    return row * cols + col
+
+        if not (is_open(*divmod(source, cols)) and is_open(target_row, target_col)):
+            return None, 0
+
+        parents: Dict[int, int] = {source: source}
+        cost = {source: 0}
+        source_row, source_col = divmod(source, cols)
+        heap = [(abs(source_row - target_row) + abs(source_col - target_col), 0, source)]
+        closed = set()
+        expanded = 0
+
+        while heap:
+            _, negative_cost, current = heapq.heappop(heap)
+            if current in closed:
+                continue
+            closed.add(current)
+            expanded += 1
+            if current == target:
+                break
+
+            row, col = divmod(current, cols)
+            parent_row, parent_col = divmod(parents[current], cols)
+            if current == source:
+                directions = DIRECTIONS
+            elif parent_row == row:
+                # Llegó en horizontal: sigue en horizontal o gira en vertical
+                dc = 1 if col > parent_col else -1
+                directions = ((0, dc), (-1, 0), (1, 0))
+            else:
+                # Llegó en vertical: sigue en vertical o gira en horizontal
+                dr = 1 if row > parent_row else -1
+                directions = ((dr, 0), (0, -1), (0, 1))
+
+            for dr, dc in directions:
+                jump_point = jump_vertical(row, col, dr) if dr else jump_horizontal(row, col, dc)
+                if jump_point < 0:
+                    continue
+                jump_row, jump_col = divmod(jump_point, cols)
+                new_cost = -negative_cost + abs(jump_row - row) + abs(jump_col - col)
+                if new_cost < cost.get(jump_point, new_cost + 1):
+                    cost[jump_point] = new_cost
+                    parents[jump_point] = current
+                    heapq.heappush(heap, (new_cost + abs(jump_row - target_row) + abs(jump_col - target_col), -new_cost, jump_point))
+
+        if target not in closed:
+            return None, expanded
+
+        # Rellenar los tramos rectos entre puntos de salto consecutivos
+        path = [target]
+        current = target
+        while current != source:
+            parent = parents[current]
+            (parent_row, parent_col), (row, col) = divmod(parent, cols), divmod(current, cols)
+            step = cols * ((parent_row > row) - (parent_row < row)) + (parent_col > col) - (parent_col < col)
+            cell = current
+            while cell != parent:
+                cell += step
+                path.append(cell)
+            current = parent
+        path.reverse()
+        return path, expanded
+
+    def find_path(self, start: int, end: int, strategy: str = "bfs") -> Tuple[Optional[List[int]], int]:
+        """
+        Ruta mínima entre dos celdas con la estrategia indicada (ver
+        PATH_STRATEGIES). Todas devuelven rutas del mismo largo, aunque entre
+        varias rutas mínimas pueden elegir una distinta.
+
+        Returns:
+            Tuple[Optional[List[int]], int]: La ruta (None si no hay) y el número de nodos expandidos.
+        """
+        if strategy not in PATH_STRATEGIES:
+            raise ValueError(f"Estrategia de búsqueda desconocida: {strategy} (opciones: {', '.join(PATH_STRATEGIES)})")
+        if start not in self or end not in self:
+            return None, 0
+        if strategy == "jps":
+            return self.jump_point_search(start, end)
+        result = self.astar(start, end) if strategy == "astar" else self.bfs(start, targets=(end,))
+        if result.target < 0:
+            return None, result.expanded
+        return self.reconstruct_path(result, end), result.expanded
+
+    def has_path(self, start: int, end: int) -> bool:
+        return self.shortest_path(start, end) is not None
+
+    def to_networkx(self) -> Any:
+        """Exporta la adyacencia como networkx.Graph con nodos (fila, columna); requiere networkx"""
+        import networkx as nx
+
+        G = nx.Graph()
+        G.add_nodes_from(divmod(cell, self.cols) for cell in np.flatnonzero(self.walkable).tolist())
+        G.add_edges_from(
+            (divmod(cell, self.cols), divmod(neighbor, self.cols))
+            for cell, row in enumerate(self._adjacency)
+            for neighbor in row
+            if cell < neighbor
+        )
+        return G
@@ -0,0 +1,75 @@
+from typing import Union
+import numpy as np
+
+
+class ProductIndex:
+    """
+    Ubicación de cada producto en un layout: para cada pasillo, los inicios
+    de rango de sus estanterías ordenados, de modo que la estantería que
+    contiene un id de producto se encuentra con una búsqueda binaria.
+
+    Los tres arreglos están agrupados por pasillo y ordenados por (pasillo,
+    inicio, fin); la clave de búsqueda combina el id de pasillo y el inicio
+    del rango, así una sola llamada a searchsorted resuelve muchos productos
+    de pasillos distintos a la vez.
+
+    Attributes:
+        keys: Clave de búsqueda de cada estantería, aisle_id * key_stride + inicio.
+        ends: Fin (exclusivo) del rango de cada estantería.
+        cells: Id plano de cada estantería.
+        slot_of: Posición en los arreglos de cada celda (id plano), -1 si no es una estantería.
+    """
+
+    def __init__(self, aisle_ids: np.ndarray, product_ranges: np.ndarray) -> None:
+        flat_aisle_ids = aisle_ids.ravel()
+        cells = np.flatnonzero(flat_aisle_ids > 0)
+        aisles = flat_aisle_ids[cells].astype(np.int64)
+        starts = product_ranges.reshape(-1, 2)[cells, 0].astype(np.int64)
+        ends = product_ranges.reshape(-1, 2)[cells, 1].astype(np.int64)
+
+        # Entre rangos con el mismo inicio (pasillos con menos productos que celdas) queda último el de mayor fin
+        order = np.lexsort((ends, starts, aisles))
+        self.key_stride: int = int(max(ends.max(initial=0), starts.max(initial=0))) + 1
+        self.keys: np.ndarray = aisles[order] * self.key_stride + starts[order]
+        self.ends: np.ndarray = ends[order]
+        self.cells: np.ndarray = cells[order].astype(np.int32)
+        self.slot_of: np.ndarray = np.full(flat_aisle_ids.size, -1, dtype=np.int32)
+        self.slot_of[self.cells] = np.arange(len(self.cells), dtype=np.int32)
+
+    def copy(self) -> 'ProductIndex':
+        new_index: 'ProductIndex' = ProductIndex.__new__(ProductIndex)
+        new_index.key_stride = self.key_stride
+        new_index.keys = self.keys
+        new_index.ends = self.ends
+        new_index.cells = self.cells.copy()
+        new_index.slot_of = self.slot_of.copy()
+        return new_index
+
+    def locate(self, aisle_ids: Union[int, np.ndarray], product_ids: Union[int, np.ndarray]) -> Union[int, np.ndarray]:
+        """
+        Estantería (id plano) que contiene cada producto de su pasillo, o -1 si
+        ningún rango del pasillo lo incluye. Acepta escalares o arreglos.
+        """
+        aisle_array = np.asarray(aisle_ids, dtype=np.int64)
+        product_array = np.asarray(product_ids, dtype=np.int64)
+        slots = np.searchsorted(self.keys, aisle_array * self.key_stride + product_array, side='right') - 1
+        safe_slots = np.maximum(slots, 0)
+        found = ((slots >= 0)
+                 & (self.keys[safe_slots] // self.key_stride == aisle_array)
+                 & (product_array < self.ends[safe_slots])
+                 & (product_array >= 0) & (product_array < self.key_stride))
+        result = np.where(found, self.cells[safe_slots], -1)
+        return int(result) if result.ndim == 0 else result
+
+    def swap(self, cell1: int, cell2: int) -> None:
+        """
+        Actualiza el índice tras intercambiar el contenido de dos celdas: los
+        rangos viajan con las estanterías, así que solo cambia qué celda ocupa
+        cada posición.
+        """
+        slot1, slot2 = int(self.slot_of[cell1]), int(self.slot_of[cell2])
+        if slot1 >= 0:
+            self.cells[slot1] = cell2
+        if slot2 >= 0:
+            self.cells[slot2] = cell1
+        self.slot_of[cell1], self.slot_of[cell2] = slot2, slot1
@@ -0,0 +1,39 @@
+from typing import List, Sequence, Union
+import numpy as np
+
+
+class CustomerStreams:
+    """
+    Corrientes aleatorias independientes por cliente, que se pueden repetir.
+
+    Cada cliente tiene dos subcorrientes: una para los ids de sus productos y
+    otra para las compras por impulso, de la que se sortea un número uniforme
+    por celda del grid que decide la compra en la estantería de esa celda.
+    Cada llamada a generators() o impulse_generators() devuelve generadores
+    nuevos en el mismo estado inicial, así que al evaluar varios layouts con
+    las mismas corrientes cada cliente recibe los mismos productos y los
+    mismos sorteos (números aleatorios comunes): la diferencia entre puntajes
+    se debe al layout y no al azar. Como las subcorrientes están separadas, y
+    el sorteo de impulso depende de la estantería y no del orden en que se
+    visita, un cambio de layout que altere el recorrido no desfasa los sorteos.
+
+    Attributes:
+        entropy: Semilla de la que se derivan las corrientes de todos los clientes.
+    """
+
+    def __init__(self, entropy: Union[int, Sequence[int]], num_customers: int) -> None:
+        self.entropy = entropy
+        children = [seed.spawn(2) for seed in np.random.SeedSequence(entropy).spawn(num_customers)]
+        self._product_seeds: List[np.random.SeedSequence] = [product for product, _ in children]
+        self._impulse_seeds: List[np.random.SeedSequence] = [impulse for _, impulse in children]
+
+    def __len__(self) -> int:
+        return len(self._product_seeds)
+
+    def generators(self) -> List[np.random.Generator]:
+        """Generadores de los productos de todos los clientes, desde el principio de sus corrientes"""
+        return [np.random.default_rng(seed) for seed in self._product_seeds]
+
+    def impulse_generators(self) -> List[np.random.Generator]:
+        """Generadores de las compras por impulso de todos los clientes, desde el principio de sus corrientes"""
+        return [np.random.default_rng(seed) for seed in self._impulse_seeds]
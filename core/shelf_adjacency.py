@@ -0,0 +1,128 @@
+from typing import Dict, Iterable, List, Tuple
+import numpy as np
+from core.pathfinding import DIRECTIONS, neighbor_slots
+
+
+class ShelfAdjacency:
+    """
+    Estanterías adyacentes a cada celda transitable, en arreglos planos.
+
+    Cada celda i reserva CAPACITY posiciones a partir de i * CAPACITY: las
+    primeras count[i] guardan, en el orden de DIRECTIONS, el id plano de cada
+    estantería vecina, su pasillo y su probabilidad de compra por impulso; el
+    resto queda en -1 (0 para pasillo y probabilidad). Las celdas no
+    transitables no tienen estanterías asociadas.
+
+    Attributes:
+        shelves: Id plano de cada estantería vecina.
+        aisles: Id de pasillo de cada estantería vecina.
+        impulse: Índice de impulsividad del pasillo de cada estantería vecina.
+        count: Número de estanterías vecinas de cada celda.
+    """
+    CAPACITY = len(DIRECTIONS)
+
+    def __init__(self, aisle_ids: np.ndarray, walkable: np.ndarray, impulse_index: np.ndarray) -> None:
+        self.rows, self.cols = aisle_ids.shape
+        num_cells = self.rows * self.cols
+
+        slots = neighbor_slots(walkable, aisle_ids > 0)
+        # Compactar cada fila dejando las estanterías al inicio sin alterar su orden
+        order = np.argsort(slots < 0, axis=1, kind='stable')
+        self.shelves: np.ndarray = np.take_along_axis(slots, order, axis=1).ravel()
+        self.count: np.ndarray = np.count_nonzero(slots >= 0, axis=1).astype(np.int32)
+        self.aisles: np.ndarray = np.zeros(num_cells * self.CAPACITY, dtype=np.int32)
+        self.impulse: np.ndarray = np.zeros(num_cells * self.CAPACITY, dtype=np.float64)
+        self._fill_values(aisle_ids.ravel(), impulse_index, slice(None))
+
+    @classmethod
+    def from_arrays(cls, aisle_ids: np.ndarray, impulse_index: np.ndarray, shelves: np.ndarray) -> 'ShelfAdjacency':
+        """
+        Reconstruye la tabla a partir de los ids de estanterías ya calculados
+        (por ejemplo, leídos de un snapshot). shelves se usa sin copiarlo.
+        """
+        table: 'ShelfAdjacency' = cls.__new__(cls)
+        table.rows, table.cols = aisle_ids.shape
+        table.shelves = shelves.ravel()
+        table.count = np.count_nonzero(table.shelves.reshape(-1, cls.CAPACITY) >= 0, axis=1).astype(np.int32)
+        table.aisles = np.zeros(len(table.shelves), dtype=np.int32)
+        table.impulse = np.zeros(len(table.shelves), dtype=np.float64)
+        table._fill_values(aisle_ids.ravel(), impulse_index, slice(None))
+        return table
+
+    def _fill_values(self, flat_aisle_ids: np.ndarray, impulse_index: np.ndarray, positions: slice) -> None:
+        """Recalcula pasillo e impulso de las posiciones indicadas a partir de sus estanterías"""
+        shelves = self.shelves[positions]
+        aisles = np.where(shelves >= 0, flat_aisle_ids[shelves], 0)
+        # Pasillos sin información en el registro no generan compras por impulso
+        known = aisles < len(impulse_index)
+        self.aisles[positions] = aisles
+        self.impulse[positions] = np.where(known, impulse_index[np.where(known, aisles, 0)], 0.0)
+
+    def copy(self) -> 'ShelfAdjacency':
+        new_table: 'ShelfAdjacency' = ShelfAdjacency.__new__(ShelfAdjacency)
+        new_table.rows, new_table.cols = self.rows, self.cols
+        new_table.shelves = self.shelves.copy()
+        new_table.aisles = self.aisles.copy()
+        new_table.impulse = self.impulse.copy()
+        new_table.count = self.count.copy()
+        return new_table
+
+    @property
+    def nbytes(self) -> int:
+        return self.shelves.nbytes + self.aisles.nbytes + self.impulse.nbytes + self.count.nbytes
+
+    def touches(self, cells: List[int]) -> Tuple[List[int], List[float], List[int]]:
+        """
+        Estanterías distintas vecinas de una secuencia de celdas, con su índice
+        de impulsividad y cuántas celdas de la secuencia tocan cada una, en el
+        orden en que se tocan por primera vez.
+        """
+        rows = np.asarray(cells, dtype=np.int64)
+        shelves = self.shelves.reshape(-1, self.CAPACITY)[rows]
+        is_shelf = shelves >= 0
+        impulse = self.impulse.reshape(-1, self.CAPACITY)[rows][is_shelf]
+        # Los tramos tocan pocas estanterías: contarlas con un diccionario es más rápido que ordenarlas
+        counts: Dict[int, int] = {}
+        first_touch: List[int] = []
+        for position, shelf in enumerate(shelves[is_shelf].tolist()):
+            if shelf not in counts:
+                counts[shelf] = 0
+                first_touch.append(position)
+            counts[shelf] += 1
+        return list(counts), impulse[first_touch].tolist(), list(counts.values())
+
+    def update(self, aisle_ids: np.ndarray, walkable: np.ndarray, impulse_index: np.ndarray, positions: Iterable[int]) -> None:
+        """
+        Actualiza la tabla tras modificar las celdas indicadas, reescribiendo
+        solo sus filas y las de sus vecinos.
+
+        Args:
+            aisle_ids: Plano (rows, cols) de ids de pasillo ya modificado.
+            walkable: Máscara (rows, cols) de celdas transitables ya modificada.
+            impulse_index: Índice de impulsividad por id de pasillo.
+            positions: Ids planos de las celdas modificadas.
+        """
+        flat_aisle_ids = aisle_ids.ravel()
+        flat_walkable = walkable.ravel()
+
+        affected = set()
+        for cell in positions:
+            row, col = divmod(cell, self.cols)
+            affected.add(cell)
+            for dx, dy in DIRECTIONS:
+                nx_, ny = row + dx, col + dy
+                if 0 <= nx_ < self.rows and 0 <= ny < self.cols:
+                    affected.add(nx_ * self.cols + ny)
+
+        for cell in affected:
+            row, col = divmod(cell, self.cols)
+            new_row = []
+            if flat_walkable[cell]:
+                for dx, dy in DIRECTIONS:
+                    nx_, ny = row + dx, col + dy
+                    if 0 <= nx_ < self.rows and 0 <= ny < self.cols and flat_aisle_ids[nx_ * self.cols + ny] > 0:
+                        new_row.append(nx_ * self.cols + ny)
+            start = cell * self.CAPACITY
+            self.shelves[start:start + self.CAPACITY] = new_row + [-1] * (self.CAPACITY - len(new_row))
+            self.count[cell] = len(new_row)
+            self._fill_values(flat_aisle_ids, impulse_index, slice(start, start + self.CAPACITY))
@@ -0,0 +1,168 @@
+"""
+Listas de compras en arreglos planos.
+
+Todas las listas se guardan concatenadas en un único arreglo int32 (values)
+con los límites de cada una en offsets: la lista del cliente i es
+values[offsets[i]:offsets[i + 1]]. Junto a ellas se precalculan el largo de
+cada lista y, por cliente, sus pasillos distintos con la cantidad de veces
+que aparece cada uno.
+
+El primer acceso a un archivo .json o .csv escribe al lado un archivo binario
+(SIDECAR_EXTENSION) con todos los arreglos en un único .npy int32. Las cargas
+siguientes lo mapean en memoria sin volver a leer el texto, y varios procesos
+que abren el mismo archivo comparten las páginas sin copiar ni serializar
+las listas.
+"""
+import ast
+import csv
+import json
+import os
+from typing import Dict, List, Sequence, Tuple
+import numpy as np
+
+SIDECAR_EXTENSION = ".sls.npy"
+_SIDECAR_MAGIC = 0x534C5354  # "SLST"
+_SIDECAR_VERSION = 1
+_HEADER_SIZE = 5  # magic, versión, clientes, valores, pasillos distintos
+
+
+class ShoppingListStore:
+    """
+    Listas de compras de todos los clientes, indexadas por número de cliente.
+
+    Attributes:
+        values: Ids de pasillo de todas las listas, concatenadas en orden.
+        offsets: Inicio de cada lista en values, con un elemento extra al final.
+        lengths: Largo de cada lista.
+        aisle_offsets: Inicio de los pasillos distintos de cada lista en aisles y counts.
+        aisles: Pasillos distintos de cada lista, ordenados.
+        counts: Veces que aparece cada uno de esos pasillos en su lista.
+        source: Archivo del que se cargaron las listas ("" si se crearon en memoria).
+    """
+
+    def __init__(self, values: np.ndarray, offsets: np.ndarray, source: str = "") -> None:
+        self.values: np.ndarray = np.asarray(values, dtype=np.int32)
+        self.offsets: np.ndarray = np.asarray(offsets, dtype=np.int32)
+        self.lengths: np.ndarray = np.diff(self.offsets)
+        self.source: str = source
+
+        # Pasillos distintos por lista: se ordenan los pares (cliente, pasillo) y se cuentan las repeticiones
+        owners = np.repeat(np.arange(len(self), dtype=np.int64), self.lengths)
+        stride = int(self.values.max(initial=0)) + 1
+        keys, counts = np.unique(owners * stride + self.values, return_counts=True)
+        distinct_owners, aisles = np.divmod(keys, stride)
+        self.aisles: np.ndarray = aisles.astype(np.int32)
+        self.counts: np.ndarray = counts.astype(np.int32)
+        self.aisle_offsets: np.ndarray = np.searchsorted(distinct_owners, np.arange(len(self) + 1)).astype(np.int32)
+
+    @classmethod
+    def from_lists(cls, shopping_lists: Sequence[Sequence[int]], source: str = "") -> 'ShoppingListStore':
+        lengths = np.array([len(shopping_list) for shopping_list in shopping_lists], dtype=np.int64)
+        offsets = np.concatenate(([0], np.cumsum(lengths)))
+        values = np.fromiter((aisle_id for shopping_list in shopping_lists for aisle_id in shopping_list),
+                             dtype=np.int32, count=int(offsets[-1]))
+        return cls(values, offsets, source=source)
+
+    @classmethod
+    def _from_arrays(cls, values: np.ndarray, offsets: np.ndarray, aisle_offsets: np.ndarray,
+                     aisles: np.ndarray, counts: np.ndarray, source: str) -> 'ShoppingListStore':
+        """Arma el almacén con arreglos ya calculados (por ejemplo, vistas del archivo binario), sin copiarlos"""
+        store: 'ShoppingListStore' = cls.__new__(cls)
+        store.values, store.offsets = values, offsets
+        store.lengths = np.diff(offsets)
+        store.aisle_offsets, store.aisles, store.counts = aisle_offsets, aisles, counts
+        store.source = source
+        return store
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def shopping_list(self, customer: int) -> np.ndarray:
+        """Lista de compras de un cliente, como vista sobre values"""
+        return self.values[self.offsets[customer]:self.offsets[customer + 1]]
+
+    def aisle_multiplicities(self, customer: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Pasillos distintos de la lista de un cliente y cuántas veces aparece cada uno"""
+        start, end = self.aisle_offsets[customer], self.aisle_offsets[customer + 1]
+        return self.aisles[start:end], self.counts[start:end]
+
+    def select(self, customers: Sequence[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Pares (cliente, pasillo) de las listas indicadas, con los clientes
+        numerados según su posición en customers. Cada lista sale de sus
+        pasillos distintos en orden creciente, cada uno repetido tantas veces
+        como aparece (el orden de aisle_multiplicities).
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Posición del cliente y id de pasillo de cada elemento.
+        """
+        customers = np.asarray(customers, dtype=np.int64)
+        num_distinct = (self.aisle_offsets[customers + 1] - self.aisle_offsets[customers]).astype(np.int64)
+        # Posición de cada pasillo distinto en aisles: inicio de los de su lista más su posición entre ellos
+        starts = np.repeat(self.aisle_offsets[customers].astype(np.int64) - (np.cumsum(num_distinct) - num_distinct), num_distinct)
+        distinct = starts + np.arange(int(num_distinct.sum()))
+        counts = self.counts[distinct].astype(np.int64)
+        owners = np.repeat(np.repeat(np.arange(len(customers)), num_distinct), counts)
+        return owners, np.repeat(self.aisles[distinct].astype(np.int64), counts)
+
+    def to_lists(self) -> List[List[int]]:
+        return [self.shopping_list(customer).tolist() for customer in range(len(self))]
+
+    def write_sidecar(self, filename: str) -> None:
+        """Guarda todos los arreglos en un único .npy int32 que se puede mapear en memoria"""
+        header = np.array([_SIDECAR_MAGIC, _SIDECAR_VERSION, len(self), len(self.values), len(self.aisles)], dtype=np.int32)
+        np.save(filename, np.concatenate((header, self.offsets, self.values, self.aisle_offsets, self.aisles, self.counts)))
+
+    @classmethod
+    def read_sidecar(cls, filename: str, source: str = "") -> 'ShoppingListStore':
+        """Abre un archivo escrito con write_sidecar mapeándolo en memoria; los arreglos son de solo lectura"""
+        raw = np.load(filename, mmap_mode='r')
+        magic, version, num_customers, num_values, num_distinct = raw[:_HEADER_SIZE].tolist()
+        if magic != _SIDECAR_MAGIC or version != _SIDECAR_VERSION:
+            raise ValueError(f"{filename} no es un archivo de listas de compras compatible")
+
+        sizes = (num_customers + 1, num_values, num_customers + 1, num_distinct, num_distinct)
+        bounds = np.cumsum((_HEADER_SIZE,) + sizes)
+        offsets, values, aisle_offsets, aisles, counts = (np.asarray(raw[start:end]) for start, end in zip(bounds[:-1], bounds[1:]))
+        return cls._from_arrays(values, offsets, aisle_offsets, aisles, counts, source=source or filename)
+
+    @classmethod
+    def from_file(cls, filename: str) -> 'ShoppingListStore':
+        """
+        Carga las listas de un .json (lista de listas) o un .csv (columna
+        aisle_id con la lista como texto). Si existe el archivo binario y no es
+        más antiguo que el original se usa ese; si no, se crea.
+        """
+        sidecar = filename + SIDECAR_EXTENSION
+        if os.path.exists(sidecar) and os.path.getmtime(sidecar) >= os.path.getmtime(filename):
+            try:
+                return cls.read_sidecar(sidecar, source=filename)
+            except ValueError:
+                pass  # Archivo de otra versión: se vuelve a generar
+
+        if filename.endswith(".csv"):
+            with open(filename, 'r', encoding='utf-8') as f:
+                shopping_lists = [[int(item) for item in ast.literal_eval(row['aisle_id'])] for row in csv.DictReader(f)]
+        else:
+            with open(filename, 'r') as f:
+                shopping_lists = json.load(f)
+
+        store = cls.from_lists(shopping_lists, source=filename)
+        try:
+            store.write_sidecar(sidecar)
+        except OSError:
+            pass  # Sin permiso de escritura: se sigue con las listas en memoria
+        return store
+
+
+_stores: Dict[str, ShoppingListStore] = {}
+
+def load_shopping_list_store(filename: str) -> ShoppingListStore:
+    """
+    Devuelve las listas de compras del archivo indicado, leyéndolas solo la
+    primera vez que se piden en el proceso.
+    """
+    key = os.path.abspath(filename)
+    if key not in _stores:
+        _stores[key] = ShoppingListStore.from_file(filename)
+    return _stores[key]
@@ -0,0 +1,86 @@
+"""
+Poblaciones sintéticas de clientes.
+
+Las listas de muestra son pocas (48), así que para evaluar un layout con
+muchos más clientes se generan listas nuevas con sus mismas estadísticas. El
+largo de cada lista sale de la distribución empírica de largos; el primer
+pasillo, de la frecuencia de cada pasillo en todas las listas; y cada pasillo
+siguiente, de una cadena de Markov cuyas transiciones son las co-ocurrencias
+de pares de pasillos en una misma lista, suavizadas hacia esa frecuencia para
+que los pasillos poco vistos no queden sin salida.
+
+Las listas se entregan por bloques de tamaño fijo, cada uno como un
+ShoppingListStore, de modo que la memoria no crece con el número de clientes.
+"""
+from typing import Iterator
+import numpy as np
+from core.shopping_lists import ShoppingListStore
+
+
+class SyntheticPopulation:
+    """
+    Generador de listas de compras sintéticas.
+
+    Attributes:
+        sizes: Largos de las listas de muestra, de los que se sortea el largo de cada lista.
+        marginal: Probabilidad de cada id de pasillo (el índice es el id).
+        transition_cdf: Distribución acumulada del pasillo siguiente según el anterior, (pasillos, pasillos).
+    """
+
+    def __init__(self, sizes: np.ndarray, marginal: np.ndarray, cooccurrence: np.ndarray, smoothing: float = 1.0) -> None:
+        """
+        Args:
+            sizes: Largos de lista observados, sin ceros.
+            marginal: Veces que aparece cada id de pasillo.
+            cooccurrence: cooccurrence[a, b]: pares de elementos distintos de una misma lista con pasillos a y b.
+            smoothing: Peso de la frecuencia global en cada fila de transición, en número de co-ocurrencias.
+        """
+        self.sizes: np.ndarray = np.asarray(sizes, dtype=np.int64)
+        if len(self.sizes) == 0 or (self.sizes <= 0).any():
+            raise ValueError("Hacen falta listas de muestra no vacías para generar una población")
+        self.marginal: np.ndarray = marginal / marginal.sum()
+
+        transitions = cooccurrence + smoothing * self.marginal[None, :]
+        totals = transitions.sum(axis=1, keepdims=True)
+        transitions = np.divide(transitions, totals, out=np.tile(self.marginal, (len(self.marginal), 1)), where=totals > 0)
+        # El último valor se fija en 1 para que el redondeo de la suma no deje sorteos fuera de rango
+        self.transition_cdf: np.ndarray = np.cumsum(transitions, axis=1)
+        self.transition_cdf[:, -1] = 1.0
+        self._marginal_cdf: np.ndarray = np.cumsum(self.marginal)
+        self._marginal_cdf[-1] = 1.0
+
+    @classmethod
+    def from_store(cls, store: ShoppingListStore, smoothing: float = 1.0) -> 'SyntheticPopulation':
+        """Aprende largos, frecuencias y co-ocurrencias de pasillos de las listas no vacías de store"""
+        num_aisles = int(store.aisles.max(initial=0)) + 1
+        owners = np.repeat(np.arange(len(store)), np.diff(store.aisle_offsets))
+        # counts[c, a]: veces que el pasillo a aparece en la lista c
+        counts = np.zeros((len(store), num_aisles))
+        counts[owners, store.aisles] = store.counts
+        # Pares ordenados de posiciones distintas: un pasillo repetido co-ocurre consigo mismo
+        cooccurrence = counts.T @ counts - np.diag(counts.sum(axis=0))
+        return cls(store.lengths[store.lengths > 0], counts.sum(axis=0), cooccurrence, smoothing)
+
+    def _next_aisles(self, cdf: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        """Sortea un pasillo por fila de cdf (distribuciones acumuladas, una por fila)"""
+        return np.count_nonzero(cdf <= rng.random(len(cdf))[:, None], axis=1)
+
+    def sample(self, num_customers: int, rng: np.random.Generator) -> ShoppingListStore:
+        """Genera num_customers listas de compras"""
+        sizes = rng.choice(self.sizes, num_customers)
+        max_size = int(sizes.max(initial=0))
+        # lists[c, k]: k-ésimo pasillo de la lista c, -1 pasado su largo
+        lists = np.full((num_customers, max_size), -1, dtype=np.int32)
+        if max_size > 0:
+            lists[:, 0] = np.searchsorted(self._marginal_cdf, rng.random(num_customers), side='right')
+        for position in range(1, max_size):
+            active = np.flatnonzero(sizes > position)
+            lists[active, position] = self._next_aisles(self.transition_cdf[lists[active, position - 1]], rng)
+
+        offsets = np.concatenate(([0], np.cumsum(sizes)))
+        return ShoppingListStore(lists[lists >= 0], offsets, source="synthetic")
+
+    def chunks(self, num_customers: int, chunk_size: int, rng: np.random.Generator) -> Iterator[ShoppingListStore]:
+        """Genera num_customers listas por bloques de hasta chunk_size, sin guardar los bloques ya entregados"""
+        for start in range(0, num_customers, chunk_size):
+            yield self.sample(min(chunk_size, num_customers - start), rng)
@@ -0,0 +1,158 @@
+from collections import deque
+from typing import List, Optional, Tuple
+import numpy as np
+import config as cfg
+from core.bitboard import check_backend, validate_bitboard
+from core.grid import SupermarketGrid
+from core.pathfinding import DIRECTIONS, neighbor_slots
+
+
+def validate_aisle_ids(aisle_ids: np.ndarray, backend: Optional[str] = None) -> bool:
+    """
+    Valida un plano de ids de pasillo: todas las celdas de pasillo (valor 0)
+    deben estar conectadas entre sí y cada estantería (valor > 0) debe tocar
+    alguna de ellas. La entrada y la salida (valores negativos) no cuentan.
+    El motor de búsqueda es cfg.SEARCH_BACKEND salvo que se indique otro.
+    """
+    if check_backend(backend or cfg.SEARCH_BACKEND) == "bitboard":
+        return validate_bitboard(aisle_ids)
+    if aisle_ids.size == 0:
+        return False
+    walkway = aisle_ids == 0
+    flat_walkway = np.flatnonzero(walkway)
+    if len(flat_walkway) == 0:
+        return False
+
+    # Recorrer desde una casilla de pasillo para marcar todas las alcanzables
+    adjacency = neighbor_slots(walkway).tolist()
+    visited = np.zeros(aisle_ids.size, dtype=bool)
+    start = int(flat_walkway[0])
+    visited[start] = True
+    reached = 1
+    queue = deque([start])
+    while queue:
+        for neighbor in adjacency[queue.popleft()]:
+            if neighbor >= 0 and not visited[neighbor]:
+                visited[neighbor] = True
+                reached += 1
+                queue.append(neighbor)
+    if reached != len(flat_walkway):
+        return False
+
+    # Todas las casillas de pasillo son alcanzables: basta con que cada estantería toque una
+    rows, cols = aisle_ids.shape
+    touches_walkway = np.zeros_like(walkway)
+    for dx, dy in DIRECTIONS:
+        src_rows = slice(max(0, -dx), rows - max(0, dx))
+        src_cols = slice(max(0, -dy), cols - max(0, dy))
+        dst_rows = slice(max(0, dx), rows - max(0, -dx))
+        dst_cols = slice(max(0, dy), cols - max(0, -dy))
+        touches_walkway[src_rows, src_cols] |= walkway[dst_rows, dst_cols]
+    return not np.any((aisle_ids > 0) & ~touches_walkway)
+
+
+def validate_layout(layout: List[List[int]], backend: Optional[str] = None) -> bool:
+    """Valida un layout como matriz de enteros (ver validate_aisle_ids)"""
+    if len(layout) == 0:
+        return False
+    return validate_aisle_ids(np.asarray(layout, dtype=np.int64).reshape(len(layout), -1), backend)
+
+
+def validate_super_layout(layout: SupermarketGrid) -> bool:
+    """Valida un SupermarketGrid, reutilizando el resultado guardado en el layout si se conoce"""
+    if layout.validity is None:
+        layout.validity = validate_aisle_ids(layout.aisle_ids)
+    return layout.validity
+
+
+def _cell_kind(aisle_id: int) -> int:
+    """0 para pasillo, 1 para estantería y -1 para entrada/salida"""
+    return (aisle_id > 0) - (aisle_id < 0)
+
+
+def _check_shelf_walkway_swap(aisle_ids: np.ndarray, walkway_pos: Tuple[int, int], shelf_pos: Tuple[int, int]) -> Optional[bool]:
+    """
+    Comprueba localmente si un layout válido sigue siéndolo tras convertir
+    walkway_pos en estantería y shelf_pos en pasillo.
+
+    Returns:
+        Optional[bool]: El resultado, o None si no se puede decidir sin recorrer todo el layout.
+    """
+    rows, cols = aisle_ids.shape
+
+    def inside(pos: Tuple[int, int]) -> bool:
+        return 0 <= pos[0] < rows and 0 <= pos[1] < cols
+
+    def was_walkway(pos: Tuple[int, int]) -> bool:
+        return pos != walkway_pos and aisle_ids[pos] == 0
+
+    def is_walkway(pos: Tuple[int, int]) -> bool:
+        return pos == shelf_pos or was_walkway(pos)
+
+    def neighbors(pos: Tuple[int, int]) -> List[Tuple[int, int]]:
+        candidates = [(pos[0] + dx, pos[1] + dy) for dx, dy in DIRECTIONS]
+        return [candidate for candidate in candidates if inside(candidate)]
+
+    # Estanterías que podían depender de walkway_pos para tocar un pasillo, incluida ella misma
+    affected_shelves = [walkway_pos] + [
+        pos for pos in neighbors(walkway_pos) if pos != shelf_pos and aisle_ids[pos] > 0
+    ]
+    for shelf in affected_shelves:
+        if not any(is_walkway(pos) for pos in neighbors(shelf)):
+            return False
+
+    # Quitar walkway_pos no desconecta los pasillos si sus vecinos de pasillo
+    # siguen conectados dentro de la ventana 3x3 que la rodea
+    walkway_neighbors = [pos for pos in neighbors(walkway_pos) if was_walkway(pos)]
+    if not walkway_neighbors:
+        return None
+    row, col = walkway_pos
+    window = {
+        (r, c) for r in range(row - 1, row + 2) for c in range(col - 1, col + 2)
+        if inside((r, c)) and was_walkway((r, c))
+    }
+    reached = {walkway_neighbors[0]}
+    queue = deque([walkway_neighbors[0]])
+    while queue:
+        for pos in neighbors(queue.popleft()):
+            if pos in window and pos not in reached:
+                reached.add(pos)
+                queue.append(pos)
+    if not all(pos in reached for pos in walkway_neighbors):
+        return None
+
+    # El nuevo pasillo tiene que quedar unido al resto
+    return any(was_walkway(pos) for pos in neighbors(shelf_pos))
+
+
+def swap_keeps_valid(grid: SupermarketGrid, pos1: Tuple[int, int], pos2: Tuple[int, int]) -> bool:
+    """
+    Indica si el layout sería válido tras intercambiar dos celdas, sin modificarlo.
+    Intercambiar celdas del mismo tipo no cambia la validez. Intercambiar una
+    estantería con un pasillo en un layout válido se comprueba alrededor de las
+    dos celdas; solo si eso no basta se valida el layout completo.
+    """
+    kind1, kind2 = _cell_kind(int(grid.aisle_ids[pos1])), _cell_kind(int(grid.aisle_ids[pos2]))
+    if kind1 == kind2:
+        return validate_super_layout(grid)
+
+    if {kind1, kind2} == {0, 1} and validate_super_layout(grid):
+        walkway_pos, shelf_pos = (pos1, pos2) if kind1 == 0 else (pos2, pos1)
+        result = _check_shelf_walkway_swap(
+            grid.aisle_ids, (int(walkway_pos[0]), int(walkway_pos[1])), (int(shelf_pos[0]), int(shelf_pos[1]))
+        )
+        if result is not None:
+            return result
+
+    swapped = grid.aisle_ids.copy()
+    swapped[pos1], swapped[pos2] = swapped[pos2], swapped[pos1]
+    return validate_aisle_ids(swapped)
+
+
+def try_swap(grid: SupermarketGrid, pos1: Tuple[int, int], pos2: Tuple[int, int]) -> bool:
+    """Intercambia dos celdas solo si el layout resultante es válido. Devuelve si se intercambiaron."""
+    if not swap_keeps_valid(grid, pos1, pos2):
+        return False
+    grid.swap_cells(pos1, pos2)
+    grid.validity = True
+    return True
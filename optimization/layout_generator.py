@@ -218,7 +218,7 @@ def save_grid_to_json(grid: SupermarketGrid, filename: str, grid_attributes: Gri
         
     with open(os.path.join(cfg.LAYOUTS_DIR, filename), 'w') as file:
         json.dump({
-            "grid": grid.grid,
+            "grid": grid.aisle_ids.tolist(),
             "rows": grid_attributes.rows,
             "cols": grid_attributes.cols,
             "entrance": grid_attributes.entrance_coords,
@@ -1,7 +1,6 @@
-from copy import deepcopy
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from optimization.tabu_search import Iteration, TabuSearchScore
-from core.grid import SupermarketGrid, GridInput, CellInfo
+from core.grid import SupermarketGrid, GridInput
 from typing import List, Tuple
 import numpy as np
 import os
@@ -16,7 +15,8 @@ class ResultInterpreter:
         self.iterations.extend(iterations)
 
     def update_iterations(self, iterations: List[Iteration]):
-        self.iterations = deepcopy(iterations)
+        # Snapshots congelados: comparten los arreglos del layout en vez de copiarlos
+        self.iterations = [replace(it, grid=it.grid.copy().freeze()) for it in iterations]
 
     def store(self, directory: str = "optimization/results", filename: str = "results.npz", overwrite_folder: bool = False):
         # Define the results directory
@@ -29,22 +29,7 @@ class ResultInterpreter:
             os.makedirs(directory)
 
 
-        numeric_grids: List[List[List[int]]] = []
-        for it in self.iterations:
-            grid = it.grid.grid
-            numeric_grid: List[List[int]] = []
-            for row in grid:
-                numeric_row: List[int] = []
-                for cell in row:
-                    if cell.is_entrance:
-                        numeric_row.append(-1)
-                    elif cell.is_exit:
-                        numeric_row.append(-2)
-                    else:
-                        numeric_row.append(cell.aisle_id)
-                numeric_grid.append(numeric_row)
-            numeric_grids.append(numeric_grid)
-        grid_array = np.array(numeric_grids)
+        grid_array = np.array([it.grid.to_array() for it in self.iterations])
 
         scores_dtype = np.dtype([
             ('total_score', np.float64),
@@ -69,25 +54,19 @@ class ResultInterpreter:
             impulse_heat_maps=impulse_heat_map_array
             )
 
-    def _get_grid_object(self, numeric_grid: List[List[int]]) -> SupermarketGrid:
+    def _get_grid_object(self, numeric_grid: np.ndarray) -> SupermarketGrid:
         # Convert the numeric grid back to a SupermarketGrid object
-        rows = len(numeric_grid)
-        cols = len(numeric_grid[0]) if rows > 0 else 0
-        grid_cells: List[List[CellInfo]] = [[CellInfo(is_walkable=True, aisle_id=0, product_id_range=(0, 0)) for _ in range(cols)] for _ in range(rows)]
+        numeric_grid = np.asarray(numeric_grid)
+        rows, cols = numeric_grid.shape
         entrance_coords: Tuple[int, int] = (0, 0)
         exit_coords: Tuple[int, int] = (0, 0)
 
-        for x in range(rows):
-            for y in range(cols):
-                value = numeric_grid[x][y]
-                if value == -1:
-                    grid_cells[x][y].is_entrance = True
-                    entrance_coords = (x, y)
-                elif value == -2:
-                    grid_cells[x][y].is_exit = True
-                    exit_coords = (x, y)
-                else:
-                    grid_cells[x][y].aisle_id = value
+        entrance_cells = np.argwhere(numeric_grid == -1)
+        if len(entrance_cells) > 0:
+            entrance_coords = tuple(entrance_cells[-1].tolist())
+        exit_cells = np.argwhere(numeric_grid == -2)
+        if len(exit_cells) > 0:
+            exit_coords = tuple(exit_cells[-1].tolist())
         
         grid_input = GridInput(
             rows=rows,
@@ -1,14 +1,19 @@
-from copy import deepcopy
 from dataclasses import dataclass
 
 from matplotlib.figure import Figure
 from matplotlib.image import AxesImage
 from core.grid import SupermarketGrid, CellInfo
-from core.customer import CustomerSimulator
+from core.customer import CustomerSimulator, TripAccumulator, default_rng
+from core.batch_simulation import BatchSimulator
+from core.random_streams import CustomerStreams
+from core.shopping_lists import ShoppingListStore
+from core.synthetic_population import SyntheticPopulation
 from .neighborhood import gen_neighbors
-from typing import List, Tuple, Dict
-import hashlib
+from typing import List, Tuple, Dict, Optional
 import os
+import random
+import numpy as np
+import config as cfg
 from visualization.visualization import generate_individual_plot
 
 @dataclass
@@ -19,6 +24,8 @@ class TabuSearchScore:
 
 HeatMap = List[List[float]]
 
+IMPULSE_SCORING_MODES = ("sample", "expected")
+
 @dataclass
 class Iteration:
     grid: SupermarketGrid
@@ -46,14 +53,24 @@ class TabuSearchOptimizer:
     def __init__(self, initial_grid: SupermarketGrid, customers: List[CustomerSimulator]):
         self.tabu_list = []
         self.customers: List[CustomerSimulator] = customers
+        self.batch_simulator = BatchSimulator.for_customers(customers)
+        self.evaluation_round: int = 0  # Ronda de las corrientes aleatorias con cfg.EVALUATION_SEED
+        # Con cfg.SYNTHETIC_CUSTOMER_COUNT se evalúa con clientes sintéticos aprendidos de estas listas
+        self.population: Optional[SyntheticPopulation] = None
+        # Sin cfg.EVALUATION_SEED, (ronda, semilla) de la población sintética de la última ronda evaluada
+        self._population_seed: Optional[Tuple[int, int]] = None
+        if cfg.SYNTHETIC_CUSTOMER_COUNT > 0:
+            self.population = SyntheticPopulation.from_store(
+                ShoppingListStore.from_lists([list(customer.shopping_list) for customer in customers])
+            )
         
         self.current_solution: SupermarketGrid= initial_grid
-        curr_eval = self.evaluate_solution(self.current_solution)
+        curr_eval = self.evaluate_solution(self.current_solution, self._round_streams())
         self.current_score: TabuSearchScore = curr_eval.score
         self.current_walk_heat_map: HeatMap = curr_eval.walk_heat_map
         self.current_impulse_heat_map: HeatMap = curr_eval.impulse_heat_map
 
-        self.best_solution: SupermarketGrid = deepcopy(self.current_solution)
+        self.best_solution: SupermarketGrid = self.current_solution.copy()
         self.best_score: TabuSearchScore = self.current_score
         self.best_walk_heat_map: HeatMap = self.current_walk_heat_map
         self.best_impulse_heat_map: HeatMap = self.current_impulse_heat_map
@@ -67,7 +84,7 @@ class TabuSearchOptimizer:
 
         self.current_solution = new_grid
 
-        curr_eval = self.evaluate_solution(self.current_solution)
+        curr_eval = self.evaluate_solution(self.current_solution, self._round_streams())
         self.current_score = curr_eval.score
         self.current_walk_heat_map = curr_eval.walk_heat_map
         self.current_impulse_heat_map = curr_eval.impulse_heat_map
@@ -77,7 +94,7 @@ class TabuSearchOptimizer:
         
         if restart_score:
             self.best_score = self.current_score
-            self.best_solution = deepcopy(self.current_solution)
+            self.best_solution = self.current_solution.copy()
             self.best_walk_heat_map = self.current_walk_heat_map
             self.best_impulse_heat_map = self.current_impulse_heat_map
         
@@ -96,28 +113,55 @@ class TabuSearchOptimizer:
         ]
         return normalized_heat_map
 
-    def evaluate_solution(self, solution: SupermarketGrid) -> EvaluateResult:
-        """Evalúa una solución con simulaciones de clientes"""
+    def _round_streams(self) -> Optional[CustomerStreams]:
+        """Corrientes por cliente de la ronda actual, o None si la evaluación usa el módulo random"""
+        if cfg.EVALUATION_SEED is None:
+            return None
+        return CustomerStreams((cfg.EVALUATION_SEED, self.evaluation_round), len(self.customers))
+
+    def evaluate_solution(self, solution: SupermarketGrid, streams: Optional[CustomerStreams] = None) -> EvaluateResult:
+        """
+        Evalúa una solución con simulaciones de clientes. Con streams, cada
+        cliente sortea con su propia corriente, y dos soluciones evaluadas con
+        las mismas corrientes se comparan con los mismos números aleatorios.
+
+        Con cfg.IMPULSE_SCORING = "expected" las compras por impulso y su mapa
+        de calor son valores esperados en vez de sorteos.
+        """
+        if cfg.IMPULSE_SCORING not in IMPULSE_SCORING_MODES:
+            raise ValueError(f"Puntaje de compras por impulso desconocido: {cfg.IMPULSE_SCORING} "
+                             f"(opciones: {', '.join(IMPULSE_SCORING_MODES)})")
+        expected_impulse = cfg.IMPULSE_SCORING == "expected"
+        if self.population is not None:
+            return self._evaluate_population(solution, streams, expected_impulse)
+        # Si la tabla de distancias o su orden de BFS no caben en memoria se simula cliente por cliente
+        if cfg.SIMULATION_ENGINE == "batch" and solution.distance_table(bfs_order=True) is not None:
+            return self._evaluate_batch(solution, streams, expected_impulse)
+
         total_score: float = 0.0
         adjusted_purchases_sum: float = 0.0
         adjusted_steps_sum: float = 0.0
-        walk_heat_map: HeatMap = [[0.0 for _ in range(solution.cols)] for _ in range(solution.rows)]
-        impulse_heat_map: HeatMap = [[0.0 for _ in range(solution.cols)] for _ in range(solution.rows)]
-        for customer in self.customers:
-            result = customer.simulate(solution)
+        # Los recorridos se suman directamente a los mapas de calor, sin guardar la ruta de cada cliente
+        accumulator = TripAccumulator(solution)
+        rng = default_rng()
+        if streams is not None:
+            generators, impulse_generators = streams.generators(), streams.impulse_generators()
+        else:
+            generators, impulse_generators = [rng] * len(self.customers), [None] * len(self.customers)
+        for customer, customer_rng, impulse_rng in zip(self.customers, generators, impulse_generators):
+            result = customer.simulate(solution, rng=customer_rng, accumulator=accumulator, impulse_rng=impulse_rng)
             num_products = len(customer.shopping_list)
 
-            adjusted_purchases = result.impulsive_purchases / num_products
-            adjusted_steps = len(result.path) / num_products
+            impulsive_purchases = result.expected_impulsive_purchases if expected_impulse else result.impulsive_purchases
+            adjusted_purchases = impulsive_purchases / num_products
+            adjusted_steps = result.steps / num_products
             total_score += adjusted_purchases - adjusted_steps
             adjusted_purchases_sum += adjusted_purchases
             adjusted_steps_sum += adjusted_steps
 
-            for pos in result.path:
-                walk_heat_map[pos[0]][pos[1]] += 1.0
-            
-            for shelf_pos in result.impulsive_shelfs:
-                impulse_heat_map[shelf_pos[0]][shelf_pos[1]] += 1.0
+        walk_heat_map: HeatMap = accumulator.walk_counts.reshape(accumulator.shape).tolist()
+        impulse_counts = accumulator.expected_impulse_counts if expected_impulse else accumulator.impulse_counts
+        impulse_heat_map: HeatMap = impulse_counts.reshape(accumulator.shape).tolist()
 
         normalized_walk_heat_map = self._normalize_heat_map(walk_heat_map)
         normalized_impulse_heat_map = self._normalize_heat_map(impulse_heat_map)
@@ -132,6 +176,100 @@ class TabuSearchOptimizer:
             normalized_impulse_heat_map
             )
 
+    def _evaluate_batch(self, solution: SupermarketGrid, streams: Optional[CustomerStreams], expected_impulse: bool) -> EvaluateResult:
+        """Evalúa una solución simulando a todos los clientes a la vez"""
+        rng = default_rng() if streams is None else None
+        result = self.batch_simulator.simulate(solution, rng, cfg.PRODUCT_LOCATION_MODE, streams=streams,
+                                               expected_impulse=expected_impulse)
+        adjusted_purchases = result.adjusted_purchases
+        adjusted_steps = result.adjusted_steps
+
+        return EvaluateResult(
+            TabuSearchScore(
+            float((adjusted_purchases - adjusted_steps).mean()),
+            float(adjusted_purchases.mean()),
+            adjusted_steps=float(adjusted_steps.mean())
+            ),
+            self._normalize_heat_map(result.walk_counts.tolist()),
+            self._normalize_heat_map(result.impulse_counts.tolist())
+            )
+
+    def _evaluate_population(self,
+                             solution: SupermarketGrid,
+                             streams: Optional[CustomerStreams],
+                             expected_impulse: bool
+                             ) -> EvaluateResult:
+        """
+        Evalúa una solución con cfg.SYNTHETIC_CUSTOMER_COUNT clientes sintéticos,
+        simulados por bloques de cfg.SYNTHETIC_CHUNK_SIZE: de los recorridos de
+        cada bloque solo quedan las sumas de los puntajes y de los mapas de calor.
+
+        Los clientes sintéticos son otros que los de muestra, así que de streams
+        solo se usa su semilla (streams.entropy): de ella salen la población y
+        un generador por bloque para sus productos y compras por impulso, y
+        todos los layouts evaluados con las mismas corrientes ven los mismos
+        clientes y los mismos sorteos. Sin streams todos los layouts de una
+        ronda ven los mismos clientes, pero cada evaluación sortea productos y
+        compras por impulso nuevos.
+
+        Los bloques se vuelven a generar en cada evaluación a partir de esa
+        semilla, y cada uno se descarta, con su simulador, antes de generar el
+        siguiente: la memoria no crece con el número de clientes.
+        """
+        num_customers = cfg.SYNTHETIC_CUSTOMER_COUNT
+        num_chunks = -(-num_customers // cfg.SYNTHETIC_CHUNK_SIZE)
+        if streams is None:
+            generators = [self._round_population_rng()] + [default_rng() for _ in range(num_chunks)]
+        else:
+            generators = CustomerStreams(streams.entropy, num_chunks + 1).generators()
+        chunks = self.population.chunks(num_customers, cfg.SYNTHETIC_CHUNK_SIZE, generators[0])
+
+        use_batch = cfg.SIMULATION_ENGINE == "batch" and solution.distance_table(bfs_order=True) is not None
+        adjusted_purchases_sum: float = 0.0
+        adjusted_steps_sum: float = 0.0
+        walk_counts = np.zeros((solution.rows, solution.cols))
+        impulse_counts = np.zeros((solution.rows, solution.cols))
+        accumulator = TripAccumulator(solution)
+        for chunk, rng in zip(chunks, generators[1:]):
+            if use_batch:
+                result = BatchSimulator(chunk).simulate(solution, rng, cfg.PRODUCT_LOCATION_MODE, expected_impulse=expected_impulse)
+                adjusted_purchases_sum += float(result.adjusted_purchases.sum())
+                adjusted_steps_sum += float(result.adjusted_steps.sum())
+                walk_counts += result.walk_counts
+                impulse_counts += result.impulse_counts
+                continue
+
+            for index in range(len(chunk)):
+                result = CustomerSimulator.from_store(chunk, index).simulate(solution, rng=rng, accumulator=accumulator)
+                num_products = int(chunk.lengths[index])
+                impulsive_purchases = result.expected_impulsive_purchases if expected_impulse else result.impulsive_purchases
+                adjusted_purchases_sum += impulsive_purchases / num_products
+                adjusted_steps_sum += result.steps / num_products
+
+        if not use_batch:
+            walk_counts = accumulator.walk_counts.reshape(accumulator.shape)
+            impulse_counts = (accumulator.expected_impulse_counts if expected_impulse else accumulator.impulse_counts).reshape(accumulator.shape)
+
+        return EvaluateResult(
+            TabuSearchScore(
+            (adjusted_purchases_sum - adjusted_steps_sum) / num_customers,
+            adjusted_purchases_sum / num_customers,
+            adjusted_steps=adjusted_steps_sum / num_customers
+            ),
+            self._normalize_heat_map(walk_counts.tolist()),
+            self._normalize_heat_map(impulse_counts.tolist())
+            )
+
+    def _round_population_rng(self) -> np.random.Generator:
+        """
+        Generador de la población sintética cuando no hay corrientes: la semilla
+        se sortea la primera vez que se evalúa un layout de la ronda y se repite
+        para los demás, así que todos ven los mismos clientes.
+        """
+        if self._population_seed is None or self._population_seed[0] != self.evaluation_round:
+            self._population_seed = (self.evaluation_round, random.getrandbits(64))
+        return np.random.default_rng(self._population_seed[1])
+
     def log_iteration(self, save_it_as: int):
         print(f"Iteration {save_it_as}: Best score: {self.best_score.total_score}")
         print(f"Current score ->", end=" ")
@@ -170,6 +308,9 @@ class TabuSearchOptimizer:
     def _get_best_neighbor(self, tries_allowed: int = 5, swap_walkable_cells: bool = False, swap_amount: int = 5, swap_whole_aisles: bool = False) -> Neighbor:
         while tries_allowed > 0:
             tries_allowed -= 1
+            # Todos los vecinos de la ronda se evalúan con las mismas corrientes aleatorias
+            self.evaluation_round += 1
+            streams = self._round_streams()
             neighbors = gen_neighbors(
                 self.current_solution, 
                 n=30, 
@@ -185,19 +326,23 @@ class TabuSearchOptimizer:
             ]
 
             best_grid = valid_neighbors[0]
-            res = self.evaluate_solution(valid_neighbors[0])
+            res = self.evaluate_solution(valid_neighbors[0], streams)
             best_score = res.score
             best_walk_heat_map = res.walk_heat_map
             best_impulse_heat_map = res.impulse_heat_map
             for neighbor in valid_neighbors[1:]:
-                eval_res = self.evaluate_solution(neighbor)
+                eval_res = self.evaluate_solution(neighbor, streams)
                 if eval_res.score.total_score > best_score.total_score:
                     best_grid = neighbor
                     best_score = eval_res.score
                     best_walk_heat_map = eval_res.walk_heat_map
                     best_impulse_heat_map = eval_res.impulse_heat_map
 
-            worst_allowed = self.current_score.total_score - abs(self.current_score.total_score*0.05)
+            # Con corrientes, la solución actual se vuelve a puntuar con las de la ronda para compararla igual que a los vecinos
+            current_total = self.current_score.total_score
+            if streams is not None:
+                current_total = self.evaluate_solution(self.current_solution, streams).score.total_score
+            worst_allowed = current_total - abs(current_total*0.05)
 
             if best_score.total_score > worst_allowed:
                 return Neighbor(
@@ -260,19 +405,6 @@ class TabuSearchOptimizer:
         return self.best_solution, self.best_score
 
     # Definir una función para generar una clave única para la solución
-    def _solution_hash(self, solution: SupermarketGrid):
-        """Genera una clave única para la solución"""
-
-        matrix_tuple = tuple(tuple(id for cell_info in row) for row in solution.grid)
-
-        rows: List[List[int]] = []
-        for row in solution.grid:
-            row_ids: List[int] = []
-            for cell_info in row:
-                row_ids.append(cell_info.aisle_id)
-            rows.append(row_ids)
-
-        matrix_tuple = tuple(tuple(row) for row in rows)
-
-        matrix_str = str(matrix_tuple)  # Convert matrix to a string
-        return hashlib.sha256(matrix_str.encode('utf-8')).hexdigest()
\ No newline at end of file
+    def _solution_hash(self, solution: SupermarketGrid) -> int:
+        """Clave única para la solución: la huella de Zobrist que mantiene el propio layout"""
+        return solution.fingerprint
\ No newline at end of file
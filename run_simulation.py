@@ -1,9 +1,8 @@
 # from optimization.tabu_search import TabuSearchOptimizer
-from copy import deepcopy
 from dataclasses import dataclass
 from os import name
 from re import S
-from utils.helpers import load_shopping_lists
+from core.shopping_lists import load_shopping_list_store
 import config as cfg
 from core.customer import CustomerSimulator
 from optimization.layout_generator import get_grid_object
@@ -47,7 +46,7 @@ def gen_simulations() -> List[SimulationConfig]:
 
     # ---------------- Jaime ----------------
     for i in range(1, 11, 2):
-        balanced_grid_copy = deepcopy(balanced_grid)
+        balanced_grid_copy = balanced_grid.copy()
         sims.append(SimulationConfig(layout=balanced_grid_copy, name=f"swap_amount_{i}", swap_amount=i))
 
     return sims
@@ -58,12 +57,9 @@ def main():
 
     # plot_grid(sim_configs[0].layout)
 
-    shopping_lists = load_shopping_lists(cfg.SHOPPING_LISTS_FILE)
+    store = load_shopping_list_store(cfg.SHOPPING_LISTS_FILE)
 
-    customers: List[CustomerSimulator] = []
-    for shopping_list in shopping_lists:
-        customer = CustomerSimulator(shopping_list)
-        customers.append(customer)
+    customers: List[CustomerSimulator] = [CustomerSimulator.from_store(store, index) for index in range(len(store))]
 
     selected_customers = random.sample(customers, cfg.CUSTOMER_COUNT)
 
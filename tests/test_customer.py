@@ -0,0 +1,36 @@
+from pathlib import Path
+import numpy as np
+import pytest
+import config as cfg
+from core.batch_simulation import BatchSimulator
+from core.customer import CustomerSimulator
+from core.grid import SupermarketGrid
+from core.random_streams import CustomerStreams
+from core.shopping_lists import load_shopping_list_store
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture
+def store(monkeypatch):
+    monkeypatch.chdir(ROOT)
+    return load_shopping_list_store(cfg.SHOPPING_LISTS_FILE)
+
+
+@pytest.mark.parametrize("mode", ["search", "direct"])
+def test_batch_engine_matches_customer_engine(store, mode):
+    grid = SupermarketGrid.from_file("layouts/grid_0.json", cfg.AISLE_INFO_FILE)
+    grid.distance_table()
+    customers = [CustomerSimulator.from_store(store, index) for index in range(len(store))]
+    streams = CustomerStreams(7, len(customers))
+
+    batch = BatchSimulator.for_customers(customers).simulate(grid, None, mode, streams=streams)
+    results = [
+        customer.simulate(grid, mode, rng=rng, impulse_rng=impulse_rng)
+        for customer, rng, impulse_rng in zip(customers, streams.generators(), streams.impulse_generators())
+    ]
+
+    # Con las mismas corrientes cada cliente hace el mismo recorrido y las mismas compras por impulso
+    assert batch.steps.tolist() == [result.steps for result in results]
+    assert batch.impulsive_purchases.tolist() == [result.impulsive_purchases for result in results]
+    assert batch.impulsive_purchases.sum() > 0
@@ -0,0 +1,139 @@
+from pathlib import Path
+import numpy as np
+import pytest
+import config as cfg
+from core.fingerprint import layout_fingerprint
+from core.grid import SupermarketGrid
+from core.validation import _check_shelf_walkway_swap, try_swap, validate_aisle_ids
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def random_valid_layouts(rng: np.random.Generator, count: int):
+    """Planos de ids de pasillo válidos al azar, con estanterías de ids 1 a 5"""
+    layouts = []
+    while len(layouts) < count:
+        rows, cols = rng.integers(4, 9, size=2)
+        aisle_ids = np.where(rng.random((rows, cols)) < 0.45, rng.integers(1, 6, size=(rows, cols)), 0)
+        if validate_aisle_ids(aisle_ids, backend="queue"):
+            layouts.append(aisle_ids)
+    return layouts
+
+
+def test_local_swap_check_matches_full_validation():
+    rng = np.random.default_rng(0)
+    decided = 0
+    for aisle_ids in random_valid_layouts(rng, 150):
+        walkways = np.argwhere(aisle_ids == 0)
+        shelves = np.argwhere(aisle_ids > 0)
+        for _ in range(20):
+            walkway_pos = tuple(int(i) for i in walkways[rng.integers(len(walkways))])
+            shelf_pos = tuple(int(i) for i in shelves[rng.integers(len(shelves))])
+            result = _check_shelf_walkway_swap(aisle_ids, walkway_pos, shelf_pos)
+            if result is None:
+                continue
+            swapped = aisle_ids.copy()
+            swapped[walkway_pos], swapped[shelf_pos] = swapped[shelf_pos], swapped[walkway_pos]
+            assert result == validate_aisle_ids(swapped, backend="queue"), (aisle_ids, walkway_pos, shelf_pos)
+            decided += 1
+    # La comprobación local tiene que decidir buena parte de los intercambios para que la prueba sirva
+    assert decided > 1000
+
+
+def test_fingerprint_tracks_swaps_copies_and_thaw(monkeypatch):
+    monkeypatch.chdir(ROOT)
+    rng = np.random.default_rng(1)
+    grid = SupermarketGrid.from_file("layouts/grid_0.json", cfg.AISLE_INFO_FILE)
+    layouts = [grid]
+    swapped = 0
+    for step in range(300):
+        if step == 100:
+            grid = grid.copy()
+            layouts.append(grid)
+        elif step == 200:
+            grid = grid.freeze().thaw()
+            layouts.append(grid)
+        pos1, pos2 = (tuple(int(i) for i in rng.integers(0, (grid.rows, grid.cols))) for _ in range(2))
+        swapped += try_swap(grid, pos1, pos2)
+        # La huella incremental tiene que coincidir con la calculada desde cero en cada paso
+        assert grid.fingerprint == layout_fingerprint(grid.aisle_ids), (step, pos1, pos2)
+    assert swapped > 100
+    # Los intercambios en una copia no cambian la huella del layout del que salió
+    for layout in layouts:
+        assert layout.fingerprint == layout_fingerprint(layout.aisle_ids)
+    assert len({layout.fingerprint for layout in layouts}) == len(layouts)
+
+
+@pytest.mark.parametrize("include_tables", [True, False])
+def test_snapshot_round_trip_matches_json_layout(monkeypatch, tmp_path, include_tables):
+    monkeypatch.chdir(ROOT)
+    grid = SupermarketGrid.from_file("layouts/grid_0.json", cfg.AISLE_INFO_FILE)
+    snapshot_filename = str(tmp_path / "grid_0.snapshot")
+    grid.save_snapshot(snapshot_filename, include_tables=include_tables)
+    loaded = SupermarketGrid.from_snapshot(snapshot_filename, cfg.AISLE_INFO_FILE)
+
+    for name in SupermarketGrid.PLANES:
+        assert np.array_equal(getattr(loaded, name), getattr(grid, name)), name
+    assert (loaded.entrance, loaded.exit) == (grid.entrance, grid.exit)
+    assert loaded.fingerprint == grid.fingerprint
+    assert np.array_equal(loaded.graph.neighbors, grid.graph.neighbors)
+    # Sin tablas en el snapshot, el layout cargado las reconstruye igual que el leído del JSON
+    table, loaded_table = grid.distance_table(), loaded.distance_table()
+    assert np.array_equal(loaded_table.cells, table.cells)
+    assert np.array_equal(loaded_table.dist, table.dist)
+    assert np.array_equal(loaded_table.next_hop, table.next_hop)
+
+
+def layout_state(grid: SupermarketGrid):
+    """Copia de los planos, el índice de productos, el grafo y los vecinos de estantería de un layout"""
+    index = grid.product_index()
+    return (
+        {name: getattr(grid, name).copy() for name in SupermarketGrid.PLANES},
+        (index.keys.copy(), index.ends.copy(), index.cells.copy()),
+        grid.graph.neighbors.copy(),
+        grid.shelf_adjacency().shelves.copy(),
+        {aisle_id: list(cells) for aisle_id, cells in grid.aisle_cells.items()},
+    )
+
+
+def assert_same_state(grid: SupermarketGrid, state) -> None:
+    planes, (keys, ends, cells), neighbors, shelves, aisle_cells = state
+    for name, plane in planes.items():
+        assert np.array_equal(getattr(grid, name), plane), name
+    index = grid.product_index()
+    assert np.array_equal(index.keys, keys) and np.array_equal(index.ends, ends) and np.array_equal(index.cells, cells)
+    assert np.array_equal(grid.graph.neighbors, neighbors)
+    assert np.array_equal(grid.shelf_adjacency().shelves, shelves)
+    assert {aisle_id: list(cells) for aisle_id, cells in grid.aisle_cells.items()} == aisle_cells
+
+
+def test_swaps_on_a_copy_leave_the_original_unchanged(monkeypatch):
+    monkeypatch.chdir(ROOT)
+    rng = np.random.default_rng(2)
+    grid = SupermarketGrid.from_file("layouts/grid_0.json", cfg.AISLE_INFO_FILE)
+    state = layout_state(grid)
+    child = grid.copy()
+    # Los planos pasan a compartirse: ninguno de los dos layouts es dueño de ellos ni puede escribirlos sin copiarlos
+    assert grid._owned_planes == set() and child._owned_planes == set()
+    assert not any(getattr(grid, name).flags.writeable for name in SupermarketGrid.PLANES)
+
+    walkability_swaps = 0
+    while walkability_swaps < 5:
+        pos1, pos2 = (tuple(int(i) for i in rng.integers(0, (grid.rows, grid.cols))) for _ in range(2))
+        if try_swap(child, pos1, pos2):
+            walkability_swaps += bool(child.walkable[pos1] != child.walkable[pos2])
+    assert {'aisle_ids', 'walkable', 'product_ranges'} <= child._owned_planes
+    assert grid._owned_planes == set()
+    assert_same_state(grid, state)
+    assert not np.array_equal(child.aisle_ids, grid.aisle_ids)
+    assert not np.array_equal(child.graph.neighbors, grid.graph.neighbors)
+
+    # Un layout congelado rechaza los cambios y su copia descongelada no lo modifica
+    grid.freeze()
+    with pytest.raises(ValueError):
+        grid.swap_cells(grid.entrance, grid.exit)
+    thawed = grid.thaw()
+    while np.array_equal(thawed.aisle_ids, grid.aisle_ids):
+        try_swap(thawed, *(tuple(int(i) for i in rng.integers(0, (grid.rows, grid.cols))) for _ in range(2)))
+    assert grid.is_frozen and not thawed.is_frozen
+    assert_same_state(grid, state)
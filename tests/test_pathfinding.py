@@ -0,0 +1,78 @@
+from pathlib import Path
+import numpy as np
+import pytest
+import config as cfg
+from core.corridor_graph import CorridorGraph
+from core.grid import SupermarketGrid
+from core.pathfinding import PATH_STRATEGIES, DistanceTable, GridGraph
+
+ROOT = Path(__file__).resolve().parent.parent
+LAYOUTS = sorted(path.name for path in (ROOT / "layouts").glob("grid_*.json"))
+
+
+@pytest.fixture
+def load_layout(monkeypatch):
+    monkeypatch.chdir(ROOT)
+    return lambda name: SupermarketGrid.from_file(f"layouts/{name}", cfg.AISLE_INFO_FILE)
+
+
+def random_pairs(rng: np.random.Generator, walkable: np.ndarray, count: int):
+    cells = np.flatnonzero(walkable)
+    return [(int(a), int(b)) for a, b in rng.choice(cells, size=(count, 2))]
+
+
+def assert_valid_path(path, start: int, end: int, cols: int, walkable: np.ndarray) -> None:
+    """La ruta va de start a end por celdas transitables, un paso ortogonal a la vez"""
+    assert path[0] == start and path[-1] == end
+    assert walkable.ravel()[path].all()
+    rows, columns = np.divmod(np.asarray(path), cols)
+    assert (np.abs(np.diff(rows)) + np.abs(np.diff(columns)) == 1).all()
+
+
+def random_corridor_walkable(rng: np.random.Generator, rows: int, cols: int) -> np.ndarray:
+    """Pasillos rectos al azar sobre un plano de estanterías, con cruces, callejones y tramos largos"""
+    walkable = np.zeros((rows, cols), dtype=bool)
+    walkable[rng.choice(rows, size=rows // 3, replace=False), :] = True
+    walkable[:, rng.choice(cols, size=cols // 3, replace=False)] = True
+    walkable &= rng.random((rows, cols)) > 0.05
+    return walkable
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_corridor_graph_distances_match_bfs(seed):
+    rng = np.random.default_rng(seed)
+    walkable = random_corridor_walkable(rng, 30, 40)
+    keep = walkable.ravel() & (rng.random(walkable.size) < 0.05)
+    corridors = CorridorGraph(GridGraph(walkable), keep)
+    assert corridors.num_nodes < np.count_nonzero(walkable)
+    table = DistanceTable(walkable)
+
+    for start, end in random_pairs(rng, walkable, 300):
+        steps = table.distance(start, end)
+        assert corridors.distance(start, end) == steps, (start, end)
+        path = corridors.path(start, end)
+        if steps < 0:
+            assert path is None
+        else:
+            assert len(path) - 1 == steps
+            assert_valid_path(path, start, end, walkable.shape[1], walkable)
+
+
+@pytest.mark.parametrize("layout", LAYOUTS)
+def test_layout_paths_match_bfs_lengths(load_layout, layout):
+    grid = load_layout(layout)
+    table = grid.distance_table()
+    corridors = grid.corridor_graph()
+    rng = np.random.default_rng(0)
+
+    for start, end in random_pairs(rng, grid.walkable, 100):
+        steps = table.distance(start, end)
+        assert corridors.distance(start, end) == steps, (start, end)
+        # Entre rutas mínimas cada estrategia puede elegir otra, pero todas tienen el largo de la de BFS
+        for strategy in PATH_STRATEGIES:
+            path, _ = grid.graph.find_path(start, end, strategy)
+            if steps < 0:
+                assert path is None, strategy
+            else:
+                assert len(path) - 1 == steps, (strategy, start, end)
+                assert_valid_path(path, start, end, grid.cols, grid.walkable)
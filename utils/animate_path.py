@@ -8,7 +8,7 @@ import os
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(project_root)
 
-from core.grid import SupermarketGrid, CellInfo # Assuming CellInfo is needed for type hints if you inspect grid directly
+from core.grid import SupermarketGrid
 # from optimization.tabu_search import TabuSearchOptimizer
 import config as cfg
 from typing import List, Tuple
@@ -22,14 +22,8 @@ def animate_path(grid: SupermarketGrid, path: List[Tuple[int, int]], speed: int
 
     # Create a numerical representation of the grid for display
     # 0: Walkable, 1: Aisle/Shelf
-    grid_layout_matrix = np.zeros((grid.rows, grid.cols), dtype=int)
-    for r in range(grid.rows):
-        for c in range(grid.cols):
-            # grid.grid[r][c] is a CellInfo object
-            cell_info: CellInfo = grid.grid[r][c]
-            if cell_info.aisle_id > 0:  # If it's an aisle/shelf
-                grid_layout_matrix[r, c] = 1
-            # Walkable areas (aisle_id == 0 or not an aisle) remain 0
+    # Walkable areas (aisle_id == 0 or not an aisle) remain 0
+    grid_layout_matrix = (grid.aisle_ids > 0).astype(int)
 
     cmap = ListedColormap(['white', 'lightgray'])  # 0: white (walkable), 1: lightgray (aisle)
 
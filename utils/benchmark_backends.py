@@ -0,0 +1,109 @@
+import glob
+import os
+import random
+import sys
+import time
+# Add the parent directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import numpy as np
+import config as cfg
+from core.grid import SupermarketGrid
+from core.pathfinding import PATH_STRATEGIES, DistanceFields, PathSearchStats
+from core.validation import validate_aisle_ids
+
+def time_call(func, repeats: int) -> float:
+    """
+    Mide el tiempo medio de una llamada.
+    :param func: Función sin argumentos a medir.
+    :param repeats: Número de repeticiones.
+    :return: Tiempo medio en milisegundos.
+    """
+    start = time.perf_counter()
+    for _ in range(repeats):
+        func()
+    return (time.perf_counter() - start) * 1000 / repeats
+
+def shuffled_layouts(grid: SupermarketGrid, count: int, seed: int = 0):
+    """
+    Genera variantes del layout intercambiando celdas al azar, válidas o no,
+    para comparar ambos motores también con layouts inválidos.
+    """
+    rng = random.Random(seed)
+    for _ in range(count):
+        aisle_ids = grid.aisle_ids.copy()
+        for _ in range(rng.randint(1, 5)):
+            r1, c1 = rng.randrange(grid.rows), rng.randrange(grid.cols)
+            r2, c2 = rng.randrange(grid.rows), rng.randrange(grid.cols)
+            aisle_ids[r1, c1], aisle_ids[r2, c2] = aisle_ids[r2, c2], aisle_ids[r1, c1]
+        yield aisle_ids
+
+def benchmark(layout_filename: str, repeats: int = 50):
+    grid = SupermarketGrid.from_file(layout_filename, cfg.AISLE_INFO_FILE)
+    print(f"{layout_filename} ({grid.rows}x{grid.cols})")
+
+    # Los dos motores tienen que dar los mismos resultados
+    variants = list(shuffled_layouts(grid, 200))
+    for aisle_ids in variants:
+        assert validate_aisle_ids(aisle_ids, "queue") == validate_aisle_ids(aisle_ids, "bitboard")
+    assert grid.is_connected("queue") == grid.is_connected("bitboard")
+    assert np.array_equal(grid.reachable_shelves("queue"), grid.reachable_shelves("bitboard"))
+
+    table = grid.shelf_adjacency()
+    has_shelf = table.shelves >= 0
+    num_cells = grid.rows * grid.cols
+    sources = np.zeros((int(table.aisles.max()) + 1, num_cells), dtype=bool)
+    sources[table.aisles[has_shelf], np.repeat(np.arange(num_cells), table.CAPACITY)[has_shelf]] = True
+    assert np.array_equal(DistanceFields(grid.walkable, sources).dist, DistanceFields.from_bitboard(grid.walkable, sources).dist)
+
+    results = {
+        "validate_layout": {
+            backend: time_call(lambda: [validate_aisle_ids(a, backend) for a in variants], 1) / len(variants)
+            for backend in ("queue", "bitboard")
+        },
+        "is_connected": {backend: time_call(lambda: grid.is_connected(backend), repeats) for backend in ("queue", "bitboard")},
+        "reachable_shelves": {backend: time_call(lambda: grid.reachable_shelves(backend), repeats) for backend in ("queue", "bitboard")},
+        "distance_fields": {
+            "queue": time_call(lambda: DistanceFields(grid.walkable, sources), repeats // 10 or 1),
+            "bitboard": time_call(lambda: DistanceFields.from_bitboard(grid.walkable, sources), repeats // 10 or 1),
+        },
+    }
+
+    try:
+        import networkx as nx
+        G = grid.to_networkx()
+        walkway = [tuple(pos) for pos in np.argwhere(grid.aisle_ids == 0).tolist()]
+        results["is_connected"]["networkx"] = time_call(lambda: nx.has_path(G, grid.entrance, grid.exit), repeats)
+        results["validate_layout"]["networkx"] = time_call(lambda: nx.is_connected(G.subgraph(walkway)), repeats)
+    except ImportError:
+        pass
+
+    for name, timings in results.items():
+        print(f"  {name}: " + ", ".join(f"{backend} {ms:.3f} ms" for backend, ms in timings.items()))
+
+    # Estrategias de búsqueda punto a punto: mismas rutas en largo (ver tests/test_pathfinding.py), distinto número de nodos expandidos
+    rng = random.Random(0)
+    cells = np.flatnonzero(grid.walkable).tolist()
+    pairs = [(rng.choice(cells), rng.choice(cells)) for _ in range(repeats)]
+    stats = PathSearchStats()
+    timings = {}
+    for strategy in PATH_STRATEGIES:
+        start = time.perf_counter()
+        for a, b in pairs:
+            _, expanded = grid.graph.find_path(a, b, strategy)
+            stats.record(strategy, expanded)
+        timings[strategy] = (time.perf_counter() - start) * 1000 / len(pairs)
+    print("  find_path: " + ", ".join(
+        f"{strategy} {timings[strategy]:.3f} ms ({stats.mean_expanded(strategy):.0f} expandidos)" for strategy in PATH_STRATEGIES
+    ))
+
+def main():
+    # Uso: python utils/benchmark_backends.py [layout ...]
+    # Sin archivos, compara los motores sobre layouts/grid_*.json y el layout de ejemplo
+    layout_filenames = sys.argv[1:]
+    if not layout_filenames:
+        layout_filenames = sorted(glob.glob(os.path.join(cfg.LAYOUTS_DIR, "grid_*.json"))) + [cfg.LAYOUT_FILE]
+    for layout_filename in layout_filenames:
+        benchmark(layout_filename)
+
+if __name__ == "__main__":
+    main()
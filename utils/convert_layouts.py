@@ -0,0 +1,42 @@
+import glob
+import os
+import sys
+import time
+# Add the parent directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config as cfg
+from core.grid import SupermarketGrid
+from core.layout_format import SNAPSHOT_EXTENSION
+
+def convert_layout(layout_filename: str, include_tables: bool = True) -> str:
+    """
+    Convierte un layout JSON al formato binario, junto al archivo original.
+    :param layout_filename: Ruta del layout JSON.
+    :param include_tables: Si es True, guarda también el grafo y la tabla de distancias.
+    :return: Ruta del snapshot generado.
+    """
+    grid = SupermarketGrid.from_file(layout_filename, cfg.AISLE_INFO_FILE)
+    snapshot_filename = os.path.splitext(layout_filename)[0] + SNAPSHOT_EXTENSION
+    grid.save_snapshot(snapshot_filename, include_tables=include_tables)
+    return snapshot_filename
+
+def main():
+    # Uso: python utils/convert_layouts.py [--no-tables] [layout.json ...]
+    # Sin archivos, convierte layouts/grid_*.json y el layout de ejemplo
+    args = sys.argv[1:]
+    include_tables = "--no-tables" not in args
+    layout_filenames = [arg for arg in args if arg != "--no-tables"]
+    if not layout_filenames:
+        layout_filenames = sorted(glob.glob(os.path.join(cfg.LAYOUTS_DIR, "grid_*.json"))) + [cfg.LAYOUT_FILE]
+
+    for layout_filename in layout_filenames:
+        snapshot_filename = convert_layout(layout_filename, include_tables)
+
+        start = time.perf_counter()
+        SupermarketGrid.from_file(snapshot_filename, cfg.AISLE_INFO_FILE)
+        elapsed = (time.perf_counter() - start) * 1000
+        size_kb = os.path.getsize(snapshot_filename) / 1024
+        print(f"{layout_filename} -> {snapshot_filename} ({size_kb:.1f} KB, abre en {elapsed:.1f} ms)")
+
+if __name__ == "__main__":
+    main()
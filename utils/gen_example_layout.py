@@ -1,5 +1,5 @@
-import json
 import numpy as np
+from core.aisles import load_aisle_registry
 from core.grid import SupermarketGrid, GridInput
 import config as cfg
 
@@ -9,15 +9,12 @@ def gen_example_layout() -> SupermarketGrid:
     Layout fills from top to bottom, left to right.
     """
     # Load aisle data
-    with open(cfg.AISLE_INFO_FILE, 'r') as file:
-        aisles_data = json.load(file)
+    aisles = load_aisle_registry(cfg.AISLE_INFO_FILE)
 
-    # print("Aisles data loaded:", len(aisles_data.keys()))
+    # print("Aisles data loaded:", len(aisles))
     
     # Sort aisle IDs by impulse_index
-    aisle_ids_with_impulse = []
-    for aisle_id, data in aisles_data.items():
-        aisle_ids_with_impulse.append((int(aisle_id), data.get('impulse_index', 0)))
+    aisle_ids_with_impulse = list(zip(aisles.ids.tolist(), aisles.impulse_index[aisles.ids].tolist()))
     
     # Sort by impulse_index (descending)
     aisle_ids_with_impulse.sort(key=lambda x: x[1], reverse=True)
@@ -4,19 +4,10 @@ from core.grid import SupermarketGrid
 
 def plot_grid(grid: SupermarketGrid):
     """Visualiza el layout del supermercado"""
-    rows = grid.rows
-    cols = grid.cols
-    matrix = np.zeros((rows, cols))
-    
-    for x in range(rows):
-        for y in range(cols):
-            cell = grid.grid[x][y]
-            if not cell.is_walkable:
-                matrix[x][y] = grid.aisle_info[cell.aisle_id].impulse_index * 10
-            elif cell.is_entrance:
-                matrix[x][y] = 0.9
-            elif cell.is_exit:
-                matrix[x][y] = 0.9
+    matrix = np.zeros((grid.rows, grid.cols))
+    shelves = ~grid.walkable
+    matrix[shelves] = grid.aisles.impulse_index[grid.aisle_ids[shelves]] * 10
+    matrix[grid.walkable & (grid.entrance_mask | grid.exit_mask)] = 0.9
 
     plt.imshow(matrix, cmap="viridis")
     plt.colorbar()
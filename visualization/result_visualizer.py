@@ -9,23 +9,23 @@ from typing import List, Dict, Any
 from optimization.tabu_search import Iteration
 import matplotlib.widgets as widgets
 import config as cfg
+from core.aisles import AisleRegistry, load_aisle_registry
 
 class ResultVisualizer:
     def __init__(self, iterations: List[Iteration]):
         self.iterations: List[Iteration] = iterations
         self.current_iteration = 0
         self.grid_matrices = []
-        self.aisle_info = self._load_aisle_info()
+        self.aisles = self._load_aisles()
         self._prepare_grid_data()
         
-    def _load_aisle_info(self) -> Dict[str, Dict[str, Any]]:
-        """Load aisle information from the JSON file"""
+    def _load_aisles(self) -> AisleRegistry:
+        """Get the shared aisle registry (loaded once per process)"""
         try:
-            with open(cfg.AISLE_INFO_FILE, 'r') as f:
-                return json.load(f)
+            return load_aisle_registry(cfg.AISLE_INFO_FILE)
         except Exception as e:
             print(f"Warning: Could not load aisle info: {e}")
-            return {}
+            return AisleRegistry({})
     
     def _prepare_grid_data(self):
         """Convert iteration data to grid matrices for visualization"""
@@ -33,14 +33,7 @@ class ResultVisualizer:
             return
             
         for iteration in self.iterations:
-            grid = iteration.grid
-            rows, cols = grid.rows, grid.cols
-            matrix = np.zeros((rows, cols), dtype=int)
-            
-            for i in range(rows):
-                for j in range(cols):
-                    matrix[i, j] = grid.grid[i][j].aisle_id
-                    
+            matrix = iteration.grid.aisle_ids.astype(int)
             self.grid_matrices.append(matrix)
     
     def print_stats(self):
@@ -134,39 +127,25 @@ class ResultVisualizer:
         def create_impulse_grid(grid):
             impulse_grid = np.zeros_like(grid, dtype=float)
             
-            # First pass: collect all valid impulse index values to find min/max
-            all_impulse_values = []
-            for aisle_id_str, aisle_data in self.aisle_info.items():
-                if 'impulse_index' in aisle_data:
-                    all_impulse_values.append(aisle_data['impulse_index'])
+            # Collect all valid impulse index values to find min/max
+            all_impulse_values = self.aisles.impulse_index[self.aisles.ids]
             
             # If we have values, calculate min and max for normalization
-            if all_impulse_values:
-                min_impulse = min(all_impulse_values)
-                max_impulse = max(all_impulse_values)
+            if len(all_impulse_values) > 0:
+                min_impulse = all_impulse_values.min()
+                max_impulse = all_impulse_values.max()
                 impulse_range = max_impulse - min_impulse
             else:
                 # Default values if no impulse data found
                 min_impulse = 0
                 impulse_range = 1  # Avoid division by zero
             
-            # Second pass: build the grid with normalized values
-            for i in range(grid.shape[0]):
-                for j in range(grid.shape[1]):
-                    aisle_id = grid[i, j]
-                    if aisle_id > 0 and str(aisle_id) in self.aisle_info:
-                        raw_value = self.aisle_info[str(aisle_id)].get('impulse_index', 0)
-                        # Normalize to 0-1 range
-                        if impulse_range > 0:
-                            impulse_grid[i, j] = (raw_value - min_impulse) / impulse_range
-                        else:
-                            impulse_grid[i, j] = 0
-                    else:
-                        # Keep special values for entrance/exit
-                        if aisle_id < 0:
-                            impulse_grid[i, j] = -1  # We'll handle these specially
-                        else:
-                            impulse_grid[i, j] = 0
+            # Build the grid with normalized values
+            known_shelves = (grid > 0) & np.isin(grid, self.aisles.ids)
+            if impulse_range > 0:
+                impulse_grid[known_shelves] = (self.aisles.impulse_index[grid[known_shelves]] - min_impulse) / impulse_range
+            # Keep special values for entrance/exit, we'll handle these specially
+            impulse_grid[grid < 0] = -1
                             
             return impulse_grid
         
@@ -354,11 +333,10 @@ class ResultVisualizer:
                         highlighted_grid = grid_data.copy()
                         
                         # Update info text with aisle data if available
-                        if aisle_id > 0 and str(aisle_id) in self.aisle_info:
-                            aisle_data = self.aisle_info[str(aisle_id)]
-                            aisle_name = aisle_data.get('aisle_name', 'Unknown')
-                            impulse_idx = aisle_data.get('impulse_index', 0)
-                            product_count = aisle_data.get('product_count', 0)
+                        if aisle_id > 0 and aisle_id in self.aisles:
+                            aisle_name = self.aisles.names[aisle_id]
+                            impulse_idx = self.aisles.impulse_index[aisle_id]
+                            product_count = self.aisles.product_count[aisle_id]
                             
                             info_str = (f"Aisle ID: {aisle_id}\n\n"
                                     f"Name: {aisle_name}\n\n"
@@ -383,8 +361,9 @@ class ResultVisualizer:
                             highlighted_grid[non_walkable_mask] = max_aisle_id + 1  # Gray color
 
                             # Then highlight matching cells in orange
-                            matching_mask = (grid_data == aisle_id)
-                            highlighted_grid[matching_mask] = max_aisle_id + 0  # Orange color
+                            aisle_cells = self.iterations[current_grid_idx].grid.aisle_cells.get(int(aisle_id), [])
+                            if aisle_cells:
+                                highlighted_grid[tuple(np.array(aisle_cells).T)] = max_aisle_id + 0  # Orange color
                             
                             # Update the image data
                             im.set_array(highlighted_grid)
@@ -19,7 +19,7 @@ def display_layout(layout: SupermarketGrid):
     Desplegar la distribución de la tienda en la consola.
     :param layout: Lista de listas que representa la distribución de la tienda.
     """
-    for row in layout.grid:
+    for row in layout.aisle_ids.tolist():
         for cell in row:
             if cell == 0:
                 print("{:^3}".format(" "), end=" ")
@@ -33,21 +33,10 @@ def display_layout(layout: SupermarketGrid):
 
 def plot_grid(grid: SupermarketGrid):
     """Visualiza el layout del supermercado"""
-    rows = grid.rows
-    cols = grid.cols
-    matrix = np.zeros((rows, cols))
-    
-    for x in range(rows):
-        for y in range(cols):
-            cell = grid.grid[x][y]
-            if cell.aisle_id == 0:
-                matrix[x][y] = 0.0
-            elif cell.is_entrance:
-                matrix[x][y] = 1.0
-            elif cell.is_exit:
-                matrix[x][y] = 2.0
-            else:
-                matrix[x][y] = 3.0
+    matrix = np.full((grid.rows, grid.cols), 3.0)
+    matrix[grid.exit_mask] = 2.0
+    matrix[grid.entrance_mask] = 1.0
+    matrix[grid.aisle_ids == 0] = 0.0
     
     plt.imshow(matrix, cmap="viridis")
     plt.colorbar()
@@ -69,17 +58,8 @@ def plot_grid_difference(grid1: SupermarketGrid, grid2: SupermarketGrid):
     :param grid1: Primera cuadrícula.
     :param grid2: Segunda cuadrícula.
     """
-    rows = grid1.rows
-    cols = grid1.cols
-
-    # Create a difference grid
-    difference_grid = np.zeros((rows, cols))
-    for i in range(rows):
-        for j in range(cols):
-            if grid1.grid[i][j] != grid2.grid[i][j]:
-                difference_grid[i][j] = 1  # Mark differences with 1
-            else:
-                difference_grid[i][j] = 0  # Mark no differences with 0
+    # Create a difference grid: 1 = different, 0 = equal
+    difference_grid = grid1.diff(grid2).astype(float)
 
     # Create the figure with 3 subplots
     fig, axes = plt.subplots(1, 3, figsize=(18, 6))
@@ -125,16 +105,12 @@ def generate_individual_plot(grid: SupermarketGrid, ax=None) -> AxesImage:
     :param grid: La cuadrícula a visualizar.
     :param ax: El eje de matplotlib donde se dibujará la cuadrícula. Si es None, se crea una nueva figura.
     """
-    rows = grid.rows
-    cols = grid.cols
-    matrix = np.zeros((rows, cols))
-    
     # Define custom colors for specific values
     custom_colors = {
         0: "white",    # Pasillo
     }
     # Generate distinct colors for shelf IDs
-    unique_ids = sorted(set(cell.aisle_id for row in grid.grid for cell in row if not cell.is_walkable))
+    unique_ids = np.unique(grid.aisle_ids[~grid.walkable]).tolist()
     for i, shelf_id in enumerate(unique_ids):
         color_tuple = plt.get_cmap('tab20')(i % 20)  # Use tab20 for shelf IDs
         custom_colors[shelf_id] = mcolors.to_hex(color_tuple)  # Convert to hex color
@@ -145,14 +121,9 @@ def generate_individual_plot(grid: SupermarketGrid, ax=None) -> AxesImage:
     cmap = ListedColormap(color_list)
 
     # Fill the matrix with the corresponding values
-    for x in range(rows):
-        for y in range(cols):
-            cell = grid.grid[x][y]
-            matrix[x][y] = cell.aisle_id
-            if cell.is_exit:
-                matrix[x][y] = max_value + 1  # Exit
-            elif cell.is_entrance:
-                matrix[x][y] = max_value + 2
+    matrix = grid.aisle_ids.astype(float)
+    matrix[grid.exit_mask] = max_value + 1  # Exit
+    matrix[grid.entrance_mask & ~grid.exit_mask] = max_value + 2
 
     # Plot on the provided axis or create a new figure
     if ax is None:
@@ -165,10 +136,8 @@ def generate_individual_plot(grid: SupermarketGrid, ax=None) -> AxesImage:
     ax.axis("off")
 
     # Overlay IDs on the grid
-    for x in range(rows):
-        for y in range(cols):
-            cell = grid.grid[x][y]
-            if not cell.is_walkable:  # Only display IDs for non-pasillo cells
-                ax.text(y, x, str(cell.aisle_id), ha="center", va="center", color="black", fontsize=5)
+    for (x, y), aisle_id in zip(np.argwhere(~grid.walkable).tolist(), grid.aisle_ids[~grid.walkable].tolist()):
+        # Only display IDs for non-pasillo cells
+        ax.text(y, x, str(aisle_id), ha="center", va="center", color="black", fontsize=5)
 
     return im